@@ -0,0 +1,140 @@
+"""
+流式音频解码模块
+Base64 音频增量可以在任意位置被切开：解码器保留每次不足 4 个字符的尾部，
+把解码结果直接写入预分配（按需倍增）的输出缓冲，并在每段音频开头识别和去掉 WAV 文件头
+"""
+import binascii
+import struct
+
+
+RIFF_B64_PREFIX = "UklGR"  # "RIFF" 的 Base64 前缀，出现在片段开头时表示新的一段 WAV
+
+
+class WavFormat:
+    """WAV 文件头中的音频格式"""
+
+    def __init__(self, channels: int, sample_rate: int, bits_per_sample: int):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.bits_per_sample = bits_per_sample
+
+    def __repr__(self):
+        return f"WavFormat({self.channels}ch, {self.sample_rate}Hz, {self.bits_per_sample}bit)"
+
+
+def parse_wav_header(data):
+    """解析 WAV 文件头
+
+    流式输出的 WAV 中 data 块长度通常是占位值，因此 data 块头之后的全部内容都视为 PCM。
+
+    Returns:
+        (WavFormat 或 None, PCM 起始偏移)；不是 WAV 时返回 (None, 0)，
+        文件头还不完整时返回 (None, None)
+    """
+    if len(data) < 12:
+        return (None, None) if b"RIFF".startswith(bytes(data[:4])) else (None, 0)
+    if bytes(data[:4]) != b"RIFF" or bytes(data[8:12]) != b"WAVE":
+        return None, 0
+
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = bytes(data[pos:pos + 4])
+        chunk_size = struct.unpack_from("<I", data, pos + 4)[0]
+        if chunk_id == b"data":
+            return fmt, pos + 8
+        if pos + 8 + chunk_size > len(data):
+            break
+        if chunk_id == b"fmt " and chunk_size >= 16:
+            _, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, pos + 8)
+            fmt = WavFormat(channels, sample_rate, bits)
+        pos += 8 + chunk_size + (chunk_size & 1)  # 块按偶数字节对齐
+    return None, None
+
+
+class StreamingAudioDecoder:
+    """增量 Base64 → PCM 解码器（非线程安全，由一个线程使用）
+
+    feed() 返回本次新增的完整 16 位样本（输出缓冲的 memoryview）。
+    keep=False 时输出缓冲在每次 feed() 时复用，返回的视图只在下一次 feed() 之前有效；
+    keep=True 时保留全部 PCM，最后用 getvalue() 取出。
+    """
+
+    SAMPLE_BYTES = 2
+
+    def __init__(self, capacity=48000, keep=False):
+        """初始化解码器
+
+        Args:
+            capacity: 输出缓冲的初始字节数，不足时倍增
+            keep: 是否保留全部解码结果
+        """
+        self.keep = keep
+        self.buffer = bytearray(capacity)
+        self.reset()
+
+    def reset(self):
+        """丢弃所有状态，下一个片段视为新一段音频的开头"""
+        self.tail = ""  # 不足 4 个字符的 Base64 尾部
+        self.header = bytearray()  # 正在识别的 WAV 文件头
+        self.probing = True  # 是否处于一段音频的开头
+        self.length = 0  # 输出缓冲中的有效字节数
+        self.emitted = 0  # 已通过 feed() 返回的字节数
+        self.format = None  # 最近一段音频的 WavFormat
+
+    def feed(self, fragment: str) -> memoryview:
+        """输入一个 Base64 片段，返回新增的完整样本"""
+        if not self.keep:
+            # 复用缓冲：把上次剩下的半个样本移到开头
+            rest = self.length - self.emitted
+            self.buffer[:rest] = self.buffer[self.emitted:self.length]
+            self.length = rest
+            self.emitted = 0
+
+        if not self.tail and fragment.startswith(RIFF_B64_PREFIX):
+            # 新的一段 WAV（逐句合成时每句都有自己的文件头）
+            self.probing = True
+            self.header.clear()
+
+        text = self.tail + fragment
+        usable = len(text) - len(text) % 4
+        self.tail = text[usable:]
+        if usable:
+            self._write_decoded(binascii.a2b_base64(text[:usable]))
+
+        end = self.emitted + (self.length - self.emitted) // self.SAMPLE_BYTES * self.SAMPLE_BYTES
+        view = memoryview(self.buffer)[self.emitted:end]
+        self.emitted = end
+        return view
+
+    def _write_decoded(self, data: bytes):
+        """处理解码后的字节：识别文件头，其余写入输出缓冲"""
+        if self.probing:
+            self.header += data
+            fmt, offset = parse_wav_header(self.header)
+            if offset is None:
+                return  # 文件头还不完整
+            self.probing = False
+            if fmt:
+                self.format = fmt
+            data = bytes(self.header[offset:])
+            self.header.clear()
+
+        needed = self.length + len(data)
+        if needed > len(self.buffer):
+            # 换用更大的新缓冲（调用方可能仍持有旧缓冲的视图，不能原地扩容）
+            buffer = bytearray(max(needed, len(self.buffer) * 2))
+            buffer[:self.length] = self.buffer[:self.length]
+            self.buffer = buffer
+        self.buffer[self.length:needed] = data
+        self.length = needed
+
+    def getvalue(self) -> bytes:
+        """keep=True 时返回全部解码得到的 PCM"""
+        return bytes(self.buffer[:self.length])
+
+
+def pcm_from_wav(data: bytes) -> memoryview:
+    """去掉完整 WAV 数据的文件头，不是 WAV 时原样返回"""
+    _, offset = parse_wav_header(data)
+    return memoryview(data)[offset or 0:]
@@ -1,95 +1,153 @@
 """
 音频播放器模块
-从 qwen_omini_api.py 提取并优化的音频播放器
+从 qwen_omini_api.py 提取并优化的音频播放器：边收边播的 Base64 PCM 播放器和整段播放的 WAV 播放器
 """
-import base64
-import queue
+import collections
 import threading
-import contextlib
-import pyaudio
+import time
+import numpy as np
+
+from audio_decode import StreamingAudioDecoder, pcm_from_wav
+from i18n import t
+from pcm_ring import PcmRingBuffer
+from time_stretch import TimeStretcher
+
+
+# 一段音频异常结束的标记：丢弃解码和变速状态，不输出剩余样本
+_DISCARD = object()
 
 
 class AudioPlayer:
     """Base64 PCM 音频播放器
 
-    支持流式接收 Base64 编码的 PCM 音频数据并实时播放
-    使用双线程 + 双队列架构实现解码和播放的异步处理
+    支持流式接收 Base64 编码的 PCM 音频数据并实时播放。
+    解码线程在有数据时才被条件变量唤醒，把解码结果直接写入预分配的 int16 环形缓冲；
+    常驻的回调模式输出流由声卡按需从缓冲取样本，没有数据时输出静音，不需要播放线程。
     """
 
-    def __init__(self, sample_rate=24000, chunk_size_ms=100):
+    def __init__(self, sample_rate=24000, chunk_size_ms=20, buffer_seconds=1.0, speed=1.0):
         """初始化音频播放器
 
         Args:
             sample_rate: 采样率（Hz），默认 24000
-            chunk_size_ms: 音频块大小（毫秒），默认 100
+            chunk_size_ms: 每次声卡回调的时长（毫秒），默认 20
+            buffer_seconds: 环形缓冲长度（秒），默认 1；更多的数据以 Base64 形式排队，
+                            调整语速时最多这么长的已处理音频仍按原速度播放
+            speed: 播放速度（变速不变调）
         """
+        import pyaudio  # 打开音频设备较慢，应用启动时在后台线程中创建播放器
+        self.pyaudio = pyaudio
         self.pya = pyaudio.PyAudio()
         self.sample_rate = sample_rate
-        self.chunk_size_bytes = chunk_size_ms * sample_rate * 2 // 1000
+        self.chunk_frames = chunk_size_ms * sample_rate // 1000
+        self.out_block = np.zeros(self.chunk_frames, dtype=np.int16)  # 回调使用的预分配输出块
+        self.ring = PcmRingBuffer(int(sample_rate * buffer_seconds))
+        self.stretcher = TimeStretcher(sample_rate, speed)  # 只在解码线程中使用
+
+        # 待解码的 Base64 数据
+        self.cond = threading.Condition()
+        self.b64_audio_buffer = collections.deque()
+        self.decoder = StreamingAudioDecoder(sample_rate * 2)  # 只在解码线程中使用
+        self.decoder_generation = self.ring.generation
+
+        # 状态控制
+        self.status = 'playing'
+
+        # 已提交但尚未写入环形缓冲的数据数量（包括结束标记，避免解码中途误判播放完成）
+        self.pending = 0
 
-        # 初始化播放流
+        # 播放开始回调：每段音频首个样本交给设备时调用，参数为 time.perf_counter() 时间戳
+        self.on_playback_start = None
+        self.is_idle = True
+
+        # 完成事件：最后一个样本交给设备时设置
+        self.complete_event = threading.Event()
+        self.complete_event.set()
+
+        # 初始化播放流（回调模式，一直运行）
         self.player_stream = self.pya.open(
             format=pyaudio.paInt16,
             channels=1,
             rate=sample_rate,
-            output=True
+            output=True,
+            frames_per_buffer=self.chunk_frames,
+            stream_callback=self.stream_callback
         )
 
-        # 双队列缓冲
-        self.raw_audio_buffer: queue.Queue = queue.Queue()
-        self.b64_audio_buffer: queue.Queue = queue.Queue()
-
-        # 状态控制
-        self.status_lock = threading.Lock()
-        self.status = 'playing'
-
-        # 启动处理线程
+        # 启动解码线程
         self.decoder_thread = threading.Thread(target=self.decoder_loop, daemon=True)
-        self.player_thread = threading.Thread(target=self.player_loop, daemon=True)
         self.decoder_thread.start()
-        self.player_thread.start()
-
-        # 完成事件
-        self.complete_event: threading.Event = None
 
     def decoder_loop(self):
-        """解码器循环 - 将 Base64 音频解码为原始 PCM 数据"""
-        while self.status != 'stop':
-            recv_audio_b64 = None
-            with contextlib.suppress(queue.Empty):
-                recv_audio_b64 = self.b64_audio_buffer.get(timeout=0.1)
+        """解码器循环 - 将 Base64 音频解码后写入环形缓冲"""
+        while True:
+            with self.cond:
+                while not self.b64_audio_buffer and self.status != 'stop':
+                    self.cond.wait()
+                if self.status == 'stop':
+                    return
+                recv_audio_b64 = self.b64_audio_buffer.popleft()
+                generation = self.ring.generation
+
+            if generation != self.decoder_generation:
+                # 播放被取消过：丢弃上一段残留的 Base64 尾部、文件头状态和变速缓存
+                self.decoder.reset()
+                self.stretcher.reset()
+                self.decoder_generation = generation
 
             if recv_audio_b64 is None:
-                continue
-
-            # 解码 Base64
-            recv_audio_raw = base64.b64decode(recv_audio_b64)
-
-            # 将原始音频数据按块推入队列
-            for i in range(0, len(recv_audio_raw), self.chunk_size_bytes):
-                chunk = recv_audio_raw[i:i + self.chunk_size_bytes]
-                self.raw_audio_buffer.put(chunk)
-
-    def player_loop(self):
-        """播放器循环 - 从队列读取 PCM 数据并播放"""
-        while self.status != 'stop':
-            recv_audio_raw = None
-            with contextlib.suppress(queue.Empty):
-                recv_audio_raw = self.raw_audio_buffer.get(timeout=0.1)
-
-            if recv_audio_raw is None:
-                # 队列为空，检查是否需要触发完成事件
-                if self.complete_event:
+                # 一段音频结束：输出变速器中剩余的样本
+                samples = self.stretcher.flush()
+                self.decoder.reset()
+            elif recv_audio_b64 is _DISCARD:
+                # 一段音频中途出错：残留的 Base64 尾部、文件头状态和变速缓存不能带入下一段
+                self.decoder.reset()
+                self.stretcher.reset()
+                samples = np.zeros(0, dtype=np.int16)
+            else:
+                # 增量解码 Base64（片段可在任意位置切开，WAV 文件头会被去掉），得到完整的 int16 样本，再变速
+                samples = self.stretcher.process(
+                    np.frombuffer(self.decoder.feed(recv_audio_b64), dtype=np.int16)
+                )
+
+            # 缓冲已满时等待声卡读取；期间被取消则丢弃
+            self.ring.write(samples, generation=generation)
+
+            with self.cond:
+                self.pending -= 1
+                if self.pending == 0 and self.is_idle and not len(self.ring):
+                    self.complete_event.set()  # 全部数据都不含样本，不会再有回调来结束
+
+    def stream_callback(self, in_data, frame_count, time_info, status):
+        """声卡回调（PortAudio 线程中调用，不能阻塞）"""
+        out = self.out_block if frame_count == self.chunk_frames else np.zeros(frame_count, dtype=np.int16)
+        n = self.ring.read_into(out)
+
+        if n and self.is_idle:
+            # 一段音频的首个样本
+            self.is_idle = False
+            if self.on_playback_start:
+                self.on_playback_start(time.perf_counter())
+
+        if not self.is_idle and n < frame_count:
+            # 缓冲已空：没有待解码数据时，最后一个样本已交给设备
+            with self.cond:
+                if self.pending == 0 and not len(self.ring):
+                    self.is_idle = True
                     self.complete_event.set()
-                continue
 
-            # 播放音频块
-            self.player_stream.write(recv_audio_raw)
+        return out.tobytes(), self.pyaudio.paContinue
 
     def cancel_playing(self):
-        """取消当前播放，清空缓冲队列"""
-        self.b64_audio_buffer.queue.clear()
-        self.raw_audio_buffer.queue.clear()
+        """取消当前播放，清空缓冲"""
+        with self.cond:
+            self.pending -= len(self.b64_audio_buffer)
+            self.b64_audio_buffer.clear()
+            # 解码中的数据会因 generation 变化被丢弃
+            self.ring.clear()
+            if self.pending == 0:
+                self.is_idle = True
+                self.complete_event.set()
 
     def add_data(self, audio_b64: str):
         """添加 Base64 音频数据到播放队列
@@ -97,18 +155,171 @@ class AudioPlayer:
         Args:
             audio_b64: Base64 编码的音频数据
         """
-        self.b64_audio_buffer.put(audio_b64)
+        with self.cond:
+            self.pending += 1
+            self.complete_event.clear()
+            self.b64_audio_buffer.append(audio_b64)
+            self.cond.notify()
+
+    def end_stream(self, discard=False):
+        """标记当前一段音频的数据已全部添加
+
+        Args:
+            discard: 音频没有正常结束（请求出错或被取消）：丢弃解码和变速中的残留数据，而不是输出
+        """
+        with self.cond:
+            self.pending += 1
+            self.complete_event.clear()
+            self.b64_audio_buffer.append(_DISCARD if discard else None)
+            self.cond.notify()
+
+    def set_speed(self, speed: float):
+        """设置播放速度，对尚未处理的音频立即生效"""
+        self.stretcher.speed = speed
 
     def wait_for_complete(self):
         """等待当前音频播放完成"""
-        self.complete_event = threading.Event()
         self.complete_event.wait()
-        self.complete_event = None
 
     def shutdown(self):
         """关闭音频播放器，释放资源"""
-        self.status = 'stop'
+        with self.cond:
+            self.status = 'stop'
+            self.cond.notify_all()
+        self.ring.clear()
         self.decoder_thread.join()
-        self.player_thread.join()
+        self.player_stream.stop_stream()
         self.player_stream.close()
         self.pya.terminate()
+
+
+class WavPlayer:
+    """WAV 音频播放器 - 通过常驻的回调模式输出流播放完整的 PCM 音频
+
+    输出流在初始化时打开一次并一直运行：声卡回调从预分配的环形缓冲中取样本，
+    没有数据时输出静音。播放时只需把样本写入缓冲，省去每段音频打开设备的延迟。
+    """
+
+    def __init__(self, sample_rate=24000, buffer_seconds=0.5, block_ms=20, speed=1.0):
+        """初始化 WAV 音频播放器
+
+        Args:
+            sample_rate: 采样率（Qwen 输出 24kHz）
+            buffer_seconds: 环形缓冲长度（秒），更长的音频边播边变速、边写入
+            block_ms: 每次声卡回调的时长（毫秒），越小延迟越低
+            speed: 播放速度（变速不变调）
+        """
+        import pyaudio
+        self.pyaudio = pyaudio
+        self.pya = pyaudio.PyAudio()
+        self.sample_rate = sample_rate
+        self.ring = PcmRingBuffer(int(sample_rate * buffer_seconds))
+        self.stretcher = TimeStretcher(sample_rate, speed)
+        self.block_frames = sample_rate * block_ms // 1000
+        self.out_block = np.zeros(self.block_frames, dtype=np.int16)  # 回调使用的预分配输出块
+        self.is_playing = False
+        self.cancel_event = threading.Event()
+        self.feeding = False  # 当前音频是否还有样本未写入缓冲
+        self.primed = False  # 当前音频的首批样本是否已写入缓冲（之前缓冲为空不算欠载）
+        self.drained = threading.Event()
+        self.underruns = 0
+
+        self.stream = self.pya.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=sample_rate,
+            output=True,
+            frames_per_buffer=self.block_frames,
+            stream_callback=self._callback
+        )
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """声卡回调（PortAudio 线程中调用，不能阻塞）"""
+        out = self.out_block if frame_count == self.block_frames else np.zeros(frame_count, dtype=np.int16)
+        n = self.ring.read_into(out)
+        if self.is_playing:
+            if not self.primed:
+                pass  # 首批样本尚未写入，缓冲为空是正常的
+            elif n < frame_count and self.feeding:
+                self.underruns += 1  # 音频还没写完缓冲就空了
+            elif status & self.pyaudio.paOutputUnderflow:
+                self.underruns += 1
+            if not self.feeding and not len(self.ring):
+                self.drained.set()
+        return out.tobytes(), self.pyaudio.paContinue
+
+    def play_wav_audio(self, wav_bytes: bytes):
+        """播放 WAV 格式音频，返回时播放已结束或被取消"""
+        try:
+            # 去掉 WAV 文件头（如有），得到 PCM 数据
+            pcm = pcm_from_wav(wav_bytes)
+            audio_np = np.frombuffer(pcm[:len(pcm) & ~1], dtype=np.int16)
+
+            self.cancel_event.clear()
+            self.drained.clear()
+            self.stretcher.reset()
+            self.primed = False
+            self.feeding = True
+            self.is_playing = True
+            try:
+                # 每 100ms 变速一次后写入缓冲；缓冲写满时等待声卡读取，取消时立即停止写入
+                block = self.sample_rate // 10
+                for i in range(0, len(audio_np), block):
+                    if self.cancel_event.is_set():
+                        break
+                    self.write(self.stretcher.process(audio_np[i:i + block]))
+                if not self.cancel_event.is_set():
+                    self.write(self.stretcher.flush())
+            finally:
+                self.feeding = False
+
+            while not self.cancel_event.is_set():
+                if self.drained.wait(0.05):
+                    # 最后一块样本交给声卡后，还要经过设备输出延迟才真正播完
+                    self.cancel_event.wait(self.stream.get_output_latency())
+                    break
+            self.is_playing = False
+
+        except Exception as e:
+            self.is_playing = False
+            print(t("log_play_failed", e))
+
+    def write(self, samples):
+        """写入样本（缓冲写满时等待声卡读取，取消时停止），首批样本写入后才开始统计欠载"""
+        self.ring.write(samples, cancel_event=self.cancel_event)
+        if len(samples):
+            self.primed = True
+
+    def set_speed(self, speed: float):
+        """设置播放速度，对尚未写入缓冲的音频立即生效"""
+        self.stretcher.speed = speed
+
+    def buffered_ms(self) -> float:
+        """缓冲中尚未播放的时长（毫秒）"""
+        return len(self.ring) * 1000 / self.sample_rate
+
+    def describe_stats(self) -> dict:
+        """播放统计：欠载次数、缓冲时长和设备输出延迟"""
+        return {
+            "underruns": self.underruns,
+            "buffered_ms": self.buffered_ms(),
+            "latency_ms": self.stream.get_output_latency() * 1000,
+        }
+
+    def flush(self):
+        """立即丢弃缓冲中尚未播放的音频"""
+        self.ring.clear()
+
+    def cancel_playing(self):
+        """停止当前播放"""
+        self.cancel_event.set()
+        self.flush()
+
+    def shutdown(self):
+        """关闭输出流和音频播放器"""
+        self.cancel_playing()
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+        if self.pya:
+            self.pya.terminate()
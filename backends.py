@@ -0,0 +1,384 @@
+"""
+模型后端模块
+所有后端都实现 stream(image_b64, prompt)，返回 (事件类型, 数据) 的迭代器：
+  ("text", str)    文本增量
+  ("audio", str)   Base64 音频增量
+  ("usage", dict)  用量统计
+
+后端还实现 warm_up()（预先建立连接）和 last_activity（最近一次网络活动的
+time.perf_counter() 时间戳），供 KeepAlive 在空闲时发送心跳。
+"""
+import socket
+import threading
+import time
+
+
+EVENT_TEXT = "text"
+EVENT_AUDIO = "audio"
+EVENT_USAGE = "usage"
+
+HTTP_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+# 预热和心跳请求的 httpx 请求扩展标记，连接统计不把它们计为请求
+WARM_UP_EXTENSION = "warm_up"
+
+
+class RequestCancelled(Exception):
+    """请求在接收过程中被取消"""
+
+
+class EventStream:
+    """可从其他线程中止的事件流
+
+    迭代和 close() 在读取事件的线程中使用；abort() 可以在任意线程调用，
+    关闭底层响应，让卡在网络读取上的迭代立即出错返回。
+    """
+
+    def __init__(self, events, abort=None):
+        """初始化事件流
+
+        Args:
+            events: 事件生成器
+            abort: 中止函数（线程安全），为空时 abort() 不做任何事
+        """
+        self.events = events
+        self._abort = abort
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.events)
+
+    def close(self):
+        """结束迭代并释放资源（读取事件的线程中调用）"""
+        self.events.close()
+
+    def abort(self):
+        """中止底层响应（任意线程中调用）"""
+        if self._abort:
+            self._abort()
+
+
+def image_mime(image_b64: str) -> str:
+    """根据 Base64 数据开头的文件签名判断图像类型（WebP 为 RIFF 容器）"""
+    return "image/webp" if image_b64.startswith("UklGR") else "image/jpeg"
+
+
+def build_messages(image_b64: str, prompt: str) -> list:
+    """构建包含图像和提示词的用户消息"""
+    return [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{image_mime(image_b64)};base64,{image_b64}"
+                    }
+                },
+                {
+                    "type": "text",
+                    "text": prompt
+                }
+            ]
+        }
+    ]
+
+
+class ConnectionStats:
+    """HTTP 连接复用统计（通过 httpcore 的 trace 扩展采集）
+
+    预热和心跳请求（带 WARM_UP_EXTENSION 标记）单独计数：它们建立的连接被之后的
+    识别请求使用时算作复用，但它们本身不计入请求数和新建连接数。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.warm_ups = 0
+        self.http_version = None
+
+    def on_request(self, request: "httpx.Request"):
+        """httpx 请求钩子：计数并为请求挂上 trace 回调"""
+        if request.extensions.get(WARM_UP_EXTENSION):
+            with self.lock:
+                self.warm_ups += 1
+            request.extensions["trace"] = self.trace_warm_up
+            return
+        with self.lock:
+            self.requests += 1
+        request.extensions["trace"] = self.trace
+
+    def trace(self, event_name: str, info: dict):
+        """httpcore trace 回调（识别请求）"""
+        if event_name == "connection.connect_tcp.complete":
+            with self.lock:
+                self.new_connections += 1
+        elif event_name == "connection.start_tls.complete":
+            with self.lock:
+                self.tls_handshakes += 1
+        else:
+            self.trace_warm_up(event_name, info)
+
+    def trace_warm_up(self, event_name: str, info: dict):
+        """httpcore trace 回调（预热和心跳请求只记录协议版本）"""
+        if event_name.endswith("send_request_headers.started"):
+            self.http_version = "HTTP/2" if event_name.startswith("http2.") else "HTTP/1.1"
+
+    @property
+    def reused(self) -> int:
+        """复用已有连接的请求数"""
+        return max(0, self.requests - self.new_connections)
+
+    def snapshot(self) -> dict:
+        """当前统计快照"""
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": self.reused,
+                "tls_handshakes": self.tls_handshakes,
+                "warm_ups": self.warm_ups,
+                "http_version": self.http_version,
+            }
+
+
+class HttpBackend:
+    """OpenAI 兼容模式后端 - 每次截图发起一次流式 chat completions 请求
+
+    所有请求共享一个显式配置的 httpx 连接池（可选 HTTP/2），
+    配合 warm_up 和 KeepAlive 让每次按键都能用上已建立的连接。
+    """
+
+    def __init__(self, config):
+        """初始化 HTTP 后端"""
+        # httpx 和 openai 导入较慢，创建后端时才导入（应用启动时在后台线程中进行）
+        import httpx
+        from openai import OpenAI
+
+        self.config = config
+        self.model_name = config.HTTP_MODEL
+        self.stats = ConnectionStats()
+        self.last_activity = time.perf_counter()
+
+        self.http_client = httpx.Client(
+            http2=config.HTTP2 and self.http2_available(),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            # 读超时兜底，让被放弃的卡住请求也能最终释放连接；精确的首包/块间超时由 ResilientBackend 负责
+            timeout=httpx.Timeout(
+                max(config.FIRST_BYTE_TIMEOUT, config.CHUNK_TIMEOUT), connect=config.CONNECT_TIMEOUT
+            ),
+            event_hooks={"request": [self.on_request]},
+        )
+        self.client = OpenAI(
+            api_key=config.DASHSCOPE_API_KEY,
+            base_url=HTTP_BASE_URL,
+            http_client=self.http_client,
+            max_retries=0,  # 重试由 ResilientBackend 统一处理
+        )
+
+    @staticmethod
+    def http2_available() -> bool:
+        """是否安装了 HTTP/2 支持（h2 包）"""
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def on_request(self, request: "httpx.Request"):
+        """httpx 请求钩子"""
+        self.last_activity = time.perf_counter()
+        self.stats.on_request(request)
+
+    def warm_up(self):
+        """预先完成 DNS、TCP、TLS（和 HTTP/2）握手，连接留在连接池中复用
+
+        只关心连接是否建立，不关心响应状态码；带上 API Key，避免服务端把未认证的
+        心跳请求拒绝后关闭连接。
+        """
+        self.http_client.head(
+            HTTP_BASE_URL + "/models",
+            headers={"Authorization": f"Bearer {self.config.DASHSCOPE_API_KEY}"},
+            extensions={WARM_UP_EXTENSION: True},
+        )
+
+    def stream(self, image_b64: str, prompt: str, spoken_text: str = ""):
+        """发起流式请求，返回事件迭代器
+
+        文字和语音由同一个请求一起生成，无法只合成新增部分，忽略 spoken_text。
+        """
+        return self.stream_messages(build_messages(image_b64, prompt))
+
+    def stream_messages(self, messages: list, with_audio=True):
+        """以任意消息发起流式请求
+
+        Args:
+            messages: chat completions 消息列表
+            with_audio: 是否同时输出音频；False 时只输出文本（更快）
+        """
+        if with_audio:
+            extra = {
+                "modalities": ["text", "audio"],  # 输出文本和音频
+                "audio": {"voice": self.config.VOICE, "format": "wav"},
+            }
+        else:
+            extra = {"modalities": ["text"]}
+
+        completion = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **extra,
+        )
+        return EventStream(self._iter_events(completion), abort=lambda: self._abort_response(completion))
+
+    @staticmethod
+    def _abort_response(completion):
+        """从其他线程中止响应
+
+        只关闭响应不会唤醒卡在 recv 上的读取线程。HTTP/1.1 连接只服务这一个请求，
+        先关闭套接字让读取立即出错（连接随后被连接池丢弃）；HTTP/2 连接由多个请求共享，
+        只关闭这个流。
+        """
+        response = completion.response
+        if response.http_version != "HTTP/2":
+            network_stream = response.extensions.get("network_stream")
+            sock = network_stream.get_extra_info("socket") if network_stream else None
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        completion.close()
+
+    @staticmethod
+    def _iter_events(completion):
+        """将 chat completions 数据块转换为后端事件
+
+        迭代提前结束（取消或出错）时关闭响应，释放底层 HTTP 流。
+        """
+        try:
+            for chunk in completion:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta
+
+                    # 文本部分
+                    if delta.content:
+                        yield EVENT_TEXT, delta.content
+
+                    # 音频部分
+                    audio = getattr(delta, "audio", None)
+                    if audio:
+                        audio_data = audio.get("data", "")
+                        if audio_data:
+                            yield EVENT_AUDIO, audio_data
+
+                # 用量（最后一个数据块）
+                if getattr(chunk, "usage", None):
+                    yield EVENT_USAGE, chunk.usage.model_dump()
+        finally:
+            completion.close()
+
+    def describe_stats(self) -> dict:
+        """连接复用统计"""
+        return self.stats.snapshot()
+
+    def close(self):
+        """关闭 HTTP 客户端和连接池"""
+        self.client.close()
+        self.http_client.close()
+
+
+class KeepAlive:
+    """后台心跳 - 后端空闲超过 interval 秒时调用 warm_up() 保持连接"""
+
+    def __init__(self, backend, interval: float, on_error=None):
+        """初始化心跳
+
+        Args:
+            backend: 实现 warm_up() 和 last_activity 的后端
+            interval: 空闲多少秒后发送心跳
+            on_error: 心跳失败回调，参数为异常
+        """
+        self.backend = backend
+        self.interval = interval
+        self.on_error = on_error
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """启动心跳线程"""
+        self.thread.start()
+
+    def run(self):
+        """心跳循环"""
+        while not self.stop_event.wait(self.interval / 4):
+            idle = time.perf_counter() - self.backend.last_activity
+            if idle < self.interval:
+                continue
+            try:
+                self.backend.warm_up()
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+            finally:
+                self.backend.last_activity = time.perf_counter()
+
+    def stop(self):
+        """停止心跳线程"""
+        self.stop_event.set()
+
+
+def create_speech_cache(config):
+    """根据 Config.SPEECH_CACHE_* 创建逐句合成使用的语音缓存，未启用时返回 None"""
+    if not config.SPEECH_CACHE_ENABLED:
+        return None
+    from response_cache import ResponseCache
+    from speech_cache import SpeechCache
+
+    disk = None
+    if config.SPEECH_CACHE_DIR:
+        disk = ResponseCache(config.SPEECH_CACHE_DIR, config.SPEECH_CACHE_MAX_MB * 1024 * 1024)
+    return SpeechCache(config.SPEECH_CACHE_MEMORY_MB * 1024 * 1024, disk)
+
+
+def create_backend(config, log=None):
+    """根据 Config.SPEECH_MODE 和 Config.BACKEND 创建后端，加上超时、重试和对冲，并按需录制
+
+    Args:
+        config: 配置
+        log: 可选日志函数 log(key, *args)，用于输出重试和对冲信息
+    """
+    from resilience import ResilientBackend
+
+    if config.BACKEND == "replay":
+        # 离线回放录制的响应，不需要网络
+        from recording import ReplayBackend
+        return ResilientBackend(ReplayBackend(config.RECORDINGS_DIR, config.REPLAY_SPEED), config, log=log)
+
+    if config.SPEECH_MODE == "sentence":
+        # 逐句合成需要并发的独立请求，只能使用 HTTP 后端
+        from sentence_tts import SentenceBackend
+        backend = SentenceBackend(HttpBackend(config), config, create_speech_cache(config))
+    elif config.BACKEND == "realtime":
+        # 仅实时后端需要 dashscope 的实时会话 SDK
+        from realtime_backend import RealtimeBackend
+        backend = RealtimeBackend(config)
+    else:
+        backend = HttpBackend(config)
+    backend = ResilientBackend(backend, config, log=log)
+
+    if config.RECORD_RESPONSES:
+        # 录制最外层的事件，时间戳包含重试和对冲，与用户实际感受一致
+        from recording import RecordingBackend
+        backend = RecordingBackend(backend, config.RECORDINGS_DIR)
+    return backend
@@ -0,0 +1,152 @@
+"""
+截图引擎模块
+长期持有 mss 会话，复用预分配帧缓冲，以 NumPy 视图的形式提供帧数据
+"""
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mss
+import numpy as np
+from PIL import Image
+
+
+class CaptureEngine:
+    """持久化截图引擎
+
+    整个应用生命周期内只创建一次 mss 会话。mss 在 Windows 上的 GDI 句柄
+    绑定到创建它的线程，因此所有截图都在引擎自己的单线程执行器上完成。
+    帧是预分配 RGB 缓冲的视图，下一次截图会覆盖其内容，因此只在 process() 的
+    处理函数中（截图线程内）提供给调用方。
+    """
+
+    def __init__(self, monitor_index=1):
+        """初始化截图引擎
+
+        Args:
+            monitor_index: mss 显示器序号，1 为主显示器
+        """
+        self.monitor_index = monitor_index
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+        self._sct = None  # 仅在截图线程中访问
+        self._rgb = None  # 预分配 RGB 帧缓冲 (H, W, 3)
+        self._closed = False
+        self._lock = threading.Lock()
+
+    # ============ 截图线程内部方法 ============
+
+    def _session(self):
+        """获取（必要时创建）截图线程持有的 mss 会话"""
+        if self._sct is None:
+            self._sct = mss.mss()
+        return self._sct
+
+    def _frame_buffer(self, height, width):
+        """获取尺寸匹配的预分配 RGB 缓冲，尺寸变化时才重新分配"""
+        if self._rgb is None or self._rgb.shape[:2] != (height, width):
+            self._rgb = np.empty((height, width, 3), dtype=np.uint8)
+        return self._rgb
+
+    def _grab(self, region=None):
+        """在截图线程中抓取一帧，返回 RGB 缓冲视图"""
+        sct = self._session()
+        monitor = region or sct.monitors[self.monitor_index]
+        shot = sct.grab(monitor)
+        width, height = shot.size
+
+        # BGRA 原始数据的零拷贝视图
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(height, width, 4)
+
+        # 直接写入复用的 RGB 缓冲（与 mss 的 .rgb 像素完全一致）
+        rgb = self._frame_buffer(height, width)
+        np.copyto(rgb, bgra[..., 2::-1])
+        return rgb
+
+    def _grab_and_process(self, region, fn, timings=None):
+        """在截图线程中抓取一帧并交给处理函数"""
+        start = time.perf_counter()
+        frame = self._grab(region)
+        if timings is not None:
+            timings["capture_ms"] = (time.perf_counter() - start) * 1000
+        return fn(frame)
+
+    def _close_session(self):
+        """在截图线程中释放 mss 会话"""
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+        self._rgb = None
+
+    # ============ 公共接口 ============
+
+    def process(self, fn, region=None, timings=None):
+        """抓取一帧并在截图线程中调用 fn(frame)
+
+        抓取和处理都在截图线程中完成，处理期间帧缓冲不会被其他截图覆盖，
+        因此 fn 可以直接使用帧视图而无需拷贝。
+
+        Args:
+            fn: 处理函数
+            region: 截图区域
+            timings: 可选字典，写入抓取耗时 capture_ms
+
+        Returns:
+            fn 的返回值
+        """
+        return self._executor.submit(self._grab_and_process, region, fn, timings).result()
+
+    @staticmethod
+    def frame_to_image(frame: np.ndarray) -> Image.Image:
+        """将 RGB 帧（或 (H, W) 灰度帧）包装为 PIL 图像（共享内存，不拷贝像素）"""
+        height, width = frame.shape[:2]
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame)
+        mode = 'L' if frame.ndim == 2 else 'RGB'
+        return Image.frombuffer(mode, (width, height), frame, 'raw', mode, 0, 1)
+
+    @staticmethod
+    def fit_size(size, max_size):
+        """按最长边上限等比缩放尺寸，max_size 为 None 或图像已足够小时返回原尺寸"""
+        width, height = size
+        if not max_size or max(width, height) <= max_size:
+            return size
+        if width > height:
+            return max_size, int(height * (max_size / width))
+        return int(width * (max_size / height)), max_size
+
+    @classmethod
+    def encode_jpeg(cls, frame: np.ndarray, max_size=1280, quality=85, timings=None, optimize=True) -> bytes:
+        """将 RGB 帧缩放并压缩为 JPEG 字节
+
+        Args:
+            frame: RGB 帧
+            max_size: 最长边上限，None 表示保持原始分辨率
+            quality: JPEG 质量
+            timings: 可选字典，写入缩放耗时 resize_ms 和编码耗时 encode_ms
+            optimize: 是否优化霍夫曼表
+        """
+        start = time.perf_counter()
+        img = cls.frame_to_image(frame)
+
+        # 压缩图像
+        size = cls.fit_size(img.size, max_size)
+        if size != img.size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        resized = time.perf_counter()
+
+        img_bytes = io.BytesIO()
+        img.save(img_bytes, format='JPEG', quality=quality, optimize=optimize)
+        if timings is not None:
+            timings["resize_ms"] = (resized - start) * 1000
+            timings["encode_ms"] = (time.perf_counter() - resized) * 1000
+        return img_bytes.getvalue()
+
+    def close(self):
+        """关闭截图引擎，释放 mss 会话和截图线程"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.submit(self._close_session).result()
+        self._executor.shutdown(wait=True)
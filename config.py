@@ -3,8 +3,6 @@
 """
 import os
 from dotenv import load_dotenv
-import dashscope
-from dashscope.audio.qwen_omni import AudioFormat
 
 # 加载环境变量
 load_dotenv()
@@ -16,23 +14,126 @@ class Config:
     # ============ API 配置 ============
     DASHSCOPE_API_KEY = os.getenv('DASHSCOPE_API_KEY')
 
-    # 设置全局 API Key（dashscope SDK 要求）
-    if DASHSCOPE_API_KEY:
-        dashscope.api_key = DASHSCOPE_API_KEY
-
     API_URL = "wss://dashscope.aliyuncs.com/api-ws/v1/realtime"
     MODEL = "qwen3-omni-flash-realtime"
+    HTTP_MODEL = "qwen3-omni-flash"  # OpenAI 兼容模式使用的模型
+
+    # 后端选择："http" 每次截图一次 OpenAI 兼容请求；"realtime" 复用 WebSocket 实时会话；
+    # "replay" 离线回放 RECORDINGS_DIR 中录制的响应
+    BACKEND = "http"
+    REALTIME_MAX_TURNS = 20  # 单个实时会话最多对话轮数，超过后重建以限制上下文增长
+
+    # ============ 连接配置 ============
+    WARMUP_ON_START = True  # 启动时在后台预先建立连接（DNS/TLS/会话）
+    KEEPALIVE_INTERVAL = 45  # 空闲超过该秒数时发送心跳保持连接，0 表示关闭
+    HTTP2 = False  # 使用 HTTP/2（需要 pip install "httpx[http2]"，未安装时回退到 HTTP/1.1）
+    HTTP_MAX_CONNECTIONS = 4  # 连接池大小
+    HTTP_KEEPALIVE_EXPIRY = 120  # 空闲连接在连接池中保留的秒数（应大于心跳间隔）
+
+    # ============ 超时与重试配置 ============
+    CONNECT_TIMEOUT = 10  # 建立连接超时（秒）
+    FIRST_BYTE_TIMEOUT = 15  # 发出请求到收到第一个数据块的超时（秒）
+    CHUNK_TIMEOUT = 10  # 相邻两个数据块之间的超时（秒）
+    RETRY_MAX_ATTEMPTS = 3  # 最多尝试次数（只在尚未收到任何内容时重试）
+    RETRY_BACKOFF_BASE = 0.5  # 退避基数（秒），第 n 次重试前随机等待 0 ~ base*2^n 秒
+    RETRY_BACKOFF_MAX = 4.0  # 单次退避最长等待（秒）
+    # 对冲请求：主请求迟迟没有响应时再发一个相同请求，先响应的胜出（会增加用量，默认关闭）
+    HEDGE_ENABLED = False
+    HEDGE_PERCENTILE = 95  # 以近期首包延迟的该分位数作为对冲等待时长
+    HEDGE_MIN_SAMPLES = 10  # 样本不足时使用 HEDGE_DELAY
+    HEDGE_DELAY = 3.0  # 默认对冲等待时长（秒）
+
+    # ============ 录制与回放配置 ============
+    RECORD_RESPONSES = False  # 将每次请求收到的事件和到达时间录制到 RECORDINGS_DIR
+    RECORDINGS_DIR = "recordings"
+    REPLAY_SPEED = 1.0  # 回放速度倍数，1 为原始节奏，0 表示不等待
+
+    # ============ 性能统计配置 ============
+    METRICS_WINDOW = 200  # 计算 p50/p95/p99 的最近任务数
+    METRICS_EXPORT_FILE = "metrics/runs.jsonl"  # 每次任务的统计追加写入该文件，留空表示不导出
+    STARTUP_TIMING_FILE = "metrics/startup.jsonl"  # 每次启动的耗时（首次绘制、就绪、模块导入）追加写入该文件，留空表示不导出
 
     # ============ 快捷键配置 ============
     SCREENSHOT_HOTKEY = "<f9>"  # pynput 格式
 
+    # ============ 预截图配置 ============
+    # 后台持续抓取字幕区域的最近几帧，按键时直接挑选文字最完整、最清晰的一帧（无截图等待），
+    # 适合逐字显示的对话；全屏时每帧约 6MB，会持续占用少量 CPU
+    FRAME_RING_ENABLED = False
+    FRAME_RING_SIZE = 8  # 保存的帧数
+    FRAME_RING_INTERVAL = 0.1  # 抓帧间隔（秒）
+    FRAME_RING_WINDOW = 1.0  # 触发时从最近多少秒内的帧中挑选
+
+    # ============ 监视模式配置 ============
+    WATCH_MODE = False  # 启动时开启监视模式（也可在界面中勾选）
+    WATCH_INTERVAL = 0.25  # 字幕变化时的采样间隔（秒）
+    WATCH_IDLE_INTERVAL = 1.0  # 画面长时间不变时逐步放慢到的采样间隔（秒）
+    WATCH_SETTLE_TIME = 0.6  # 字幕停止变化多久后触发朗读（秒，用于等待逐字出现的文字显示完整）
+    WATCH_CHANGE_RATIO = 0.01  # 变化像素比例超过该值视为字幕发生变化
+    WATCH_SAMPLE_STEP = 4  # 采样时的降采样步长
+
+    # ============ 流水线配置 ============
+    PIPELINE_QUEUE_SIZE = 1  # 每个阶段最多排队的任务数
+    COALESCE_WINDOW = 0.3  # 距上一次触发不足该秒数的按键会被合并（忽略）
+
+    # ============ 截图配置 ============
+    PROFILE_FILE = "game_profiles.json"  # 游戏档案文件
+    # 自适应编码：在 LANCZOS/快速缩放、彩色/灰度、JPEG/WebP 和不同质量之间，
+    # 为每个游戏档案选出满足字节和耗时预算、且识别成功的最高保真方案（结果保存在档案中）
+    ADAPTIVE_ENCODER = True
+    IMAGE_BYTE_BUDGET = 120 * 1024  # 单张图像的目标字节数
+    ENCODE_LATENCY_BUDGET_MS = 40  # 缩放加编码的目标耗时（毫秒）（保存字幕区域等）
+    ENCODER_REPROBE_INTERVAL = 30 * 60  # 因识别失败停用的方案过多久后重新试用（秒）
+    MAX_IMAGE_SIZE = 1280  # 全屏截图缩放后的最长边
+    JPEG_QUALITY = 85  # 基准编码方案（最高保真）的 JPEG 质量
+    # 字幕预处理：全屏截图时自动裁剪到底部字幕带（DEDUP_FULLSCREEN_BAND）中文字最密集的区域，
+    # 字幕带中找不到完整的文字区域时不裁剪（设置了字幕区域时不裁剪）
+    SUBTITLE_AUTO_CROP = True
+    SUBTITLE_ENHANCE = "none"  # "none" 保持彩色；"stretch" 灰度对比度拉伸；"binarize" 二值化
+
+    # ============ 画面去重配置 ============
+    DEDUP_ENABLED = True  # 画面未变化时直接重放上一次结果，不调用 API
+    DEDUP_HASH_SIZE = 32  # dHash 边长（哈希位数为其平方）
+    DEDUP_MAX_DISTANCE = 2  # 汉明距离不超过该值视为同一画面
+    DEDUP_HISTORY_SIZE = 8  # 保留最近多少帧用于比较
+    DEDUP_FULLSCREEN_BAND = 0.33  # 未设置字幕区域时，只对屏幕底部该比例的区域计算哈希
+
+    # ============ 响应缓存配置 ============
+    RESPONSE_CACHE_ENABLED = True  # 相同画面 + 提示词 + 语音 + 模型直接读取磁盘缓存
+    RESPONSE_CACHE_DIR = "cache/responses"
+    RESPONSE_CACHE_MAX_MB = 200  # 超出后淘汰最久未使用的条目
+
+    # ============ 语音缓存配置 ============
+    # 逐句合成模式下，文字相同（忽略空白和全角/半角差异）且语音相同的句子直接播放缓存的音频，
+    # 不再请求合成；适合商店、教程提示和战斗台词等反复出现的对话
+    SPEECH_CACHE_ENABLED = True
+    SPEECH_CACHE_MEMORY_MB = 32  # 内存中保留的音频上限（LRU）
+    SPEECH_CACHE_DIR = "cache/speech"  # 磁盘缓存目录，为空时只缓存在内存中
+    SPEECH_CACHE_MAX_MB = 100  # 磁盘缓存上限
+
     # ============ 语音配置 ============
     VOICE = "Cherry"  # 童音（女童）
+    # 播放语速（变速不变调，不需要重新请求），可在界面上用滑块调整
+    PLAYBACK_SPEED = 1.0
+    PLAYBACK_SPEED_RANGE = (0.6, 1.8)
     # 可选语音列表
     AVAILABLE_VOICES = ["Cherry", "Chelsie", "Stella", "Luna"]
 
-    # 音频格式
-    OUTPUT_AUDIO_FORMAT = AudioFormat.PCM_24000HZ_MONO_16BIT
+    # 音频格式（dashscope AudioFormat 的成员名，实时后端创建时才导入 dashscope）
+    OUTPUT_AUDIO_FORMAT = "PCM_24000HZ_MONO_16BIT"
+
+    # ============ 语音生成模式 ============
+    # "combined"：一次请求同时识别文字并生成语音
+    # "sentence"：先用纯文本请求识别文字，再按句并发合成语音并按顺序播放（长对话首音更快）
+    SPEECH_MODE = "combined"
+    SENTENCE_TTS_WORKERS = 3  # 同时进行的逐句合成请求数
+    SENTENCE_MIN_CHARS = 6  # 短于该长度的句子与下一句合并
+    TTS_PROMPT_TEMPLATE = (
+        "请使用童声朗读下面这段文字，只朗读原文，不要添加、删改或解释任何内容：\n{text}"
+    )
+    # 增量朗读（仅逐句合成模式）：对话框在原有内容后追加新行时，只合成和播放新增的句子；
+    # 内容与上一次完全相同时仍完整朗读
+    INCREMENTAL_SPEECH = True
 
     # ============ 提示词配置 ============
     PROMPT_TEMPLATE = (
@@ -43,10 +144,16 @@ class Config:
     # ============ 其他配置 ============
     ENABLE_LOG = True  # 是否启用日志
     LOG_LEVEL = "INFO"  # 日志级别
+    LOG_MAX_LINES = 500  # 日志区域最多保留的行数，超出后删除最早的行
+    UI_REFRESH_MS = 50  # 界面批量刷新间隔（毫秒），工作线程的日志和状态更新按该频率应用
 
     @classmethod
     def validate(cls):
         """验证配置是否有效"""
+        if cls.BACKEND == "replay":
+            # 离线回放不需要 API Key
+            return True
+
         if not cls.DASHSCOPE_API_KEY:
             raise ValueError(
                 "未找到 DASHSCOPE_API_KEY！\n"
@@ -54,9 +161,5 @@ class Config:
                 "DASHSCOPE_API_KEY=your-api-key-here"
             )
 
-        # 确保全局 API key 已设置
-        if not dashscope.api_key:
-            dashscope.api_key = cls.DASHSCOPE_API_KEY
-
         print(f"[Config] API Key 已加载: {cls.DASHSCOPE_API_KEY[:10]}...")
         return True
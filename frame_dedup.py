@@ -0,0 +1,112 @@
+"""
+画面去重模块
+基于 NumPy 的感知哈希（dHash），识别重复按键时画面未变化的情况，
+直接重放上一次的识别结果而不再调用 API
+"""
+from collections import deque
+
+import numpy as np
+
+
+def dhash(frame: np.ndarray, hash_size=32, sample_step=None) -> int:
+    """计算 RGB 帧的差值哈希（dHash）
+
+    先按步长抽样并转为灰度，再用块均值缩小到 hash_size × (hash_size + 1)，
+    比较水平相邻块的亮度得到 hash_size² 位哈希。
+
+    Args:
+        frame: (H, W, 3) uint8 RGB 帧
+        hash_size: 哈希边长，位数为 hash_size²
+        sample_step: 抽样步长，None 时按帧大小自动选择
+
+    Returns:
+        整数形式的哈希值
+    """
+    height, width = frame.shape[:2]
+    if sample_step is None:
+        # 抽样后每个块仍保留约 8×8 个像素
+        step_y = max(1, height // (hash_size * 8))
+        step_x = max(1, width // ((hash_size + 1) * 8))
+    else:
+        step_y = step_x = sample_step
+    sampled = frame[::step_y, ::step_x]
+
+    # ITU-R 601 亮度（整数运算）
+    gray = (sampled[..., 0].astype(np.uint32) * 299
+            + sampled[..., 1].astype(np.uint32) * 587
+            + sampled[..., 2].astype(np.uint32) * 114)
+
+    rows = np.linspace(0, gray.shape[0], hash_size + 1).astype(np.intp)
+    cols = np.linspace(0, gray.shape[1], hash_size + 2).astype(np.intp)
+    if np.any(np.diff(rows) == 0) or np.any(np.diff(cols) == 0):
+        # 帧太小，无法划分块
+        gray = np.repeat(np.repeat(gray, hash_size + 1, axis=0), hash_size + 2, axis=1)
+        rows = np.linspace(0, gray.shape[0], hash_size + 1).astype(np.intp)
+        cols = np.linspace(0, gray.shape[1], hash_size + 2).astype(np.intp)
+
+    # 块求和再除以块面积，得到块均值
+    block_sums = np.add.reduceat(np.add.reduceat(gray, rows[:-1], axis=0), cols[:-1], axis=1)
+    block_area = np.outer(np.diff(rows), np.diff(cols))
+    blocks = block_sums / block_area
+
+    # 亮度差小于 1 级的视为平坦区域，避免噪声在纯色区域随机翻转比特
+    bits = (blocks[:, 1:] - blocks[:, :-1]) > 1000
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """计算两个哈希的汉明距离"""
+    return bin(hash_a ^ hash_b).count('1')
+
+
+class DedupEntry:
+    """一条去重记录"""
+
+    def __init__(self, frame_hash: int, context, recognized_text: str, audio_bytes: bytes):
+        self.frame_hash = frame_hash
+        self.context = context
+        self.recognized_text = recognized_text
+        self.audio_bytes = audio_bytes
+
+
+class FrameDeduplicator:
+    """画面去重器 - 保存最近若干帧的哈希和对应的识别结果"""
+
+    def __init__(self, max_distance=4, history_size=8):
+        """初始化去重器
+
+        Args:
+            max_distance: 判定为同一画面的最大汉明距离
+            history_size: 保留的历史帧数量
+        """
+        self.max_distance = max_distance
+        self.history = deque(maxlen=history_size)
+
+    def lookup(self, frame_hash: int, context):
+        """查找与当前帧近似相同的历史记录
+
+        Args:
+            frame_hash: 当前帧的 dHash
+            context: 影响结果的其他条件（如提示词、语音），必须完全相同才会命中
+
+        Returns:
+            (entry, distance)，未命中时返回 (None, None)
+        """
+        best_entry = None
+        best_distance = None
+        for entry in self.history:
+            if entry.context != context:
+                continue
+            distance = hamming_distance(frame_hash, entry.frame_hash)
+            if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                best_entry = entry
+                best_distance = distance
+        return best_entry, best_distance
+
+    def remember(self, frame_hash: int, context, recognized_text: str, audio_bytes: bytes):
+        """记录一次成功的识别结果"""
+        self.history.append(DedupEntry(frame_hash, context, recognized_text, audio_bytes))
+
+    def clear(self):
+        """清空历史"""
+        self.history.clear()
@@ -0,0 +1,151 @@
+"""
+预截图环形缓冲模块
+后台持续抓取字幕区域，最近 N 帧保存在预分配的 NumPy 数组中；
+触发时直接从中挑选文字最完整、最清晰的一帧，无需等待新的截图
+"""
+import threading
+import time
+
+import numpy as np
+
+from subtitle_preprocess import luma
+
+
+class FrameRing:
+    """最近 N 帧的环形缓冲（线程安全）
+
+    每帧同时保存一个降采样的文字边缘图和边缘能量（边缘像素比例）。
+    挑选时只考虑"与最新帧属于同一段对话"的帧：它的大部分边缘在最新帧中仍然存在
+    （逐字显示的文字只会增加笔画），从而不会选中上一句对话；其中边缘能量最高的
+    一帧就是文字最完整、最清晰的一帧（淡入淡出或动画中的帧笔画更少更模糊）。
+    """
+
+    EDGE_THRESHOLD = 32  # 亮度差超过该值视为笔画边缘
+    MAX_MISSING = 0.3  # 候选帧的边缘在最新帧中缺失超过该比例时视为不同的对话
+
+    def __init__(self, capacity=8, edge_step=2, text_band=None):
+        """初始化环形缓冲
+
+        Args:
+            capacity: 保存的帧数
+            edge_step: 计算边缘图时的降采样步长
+            text_band: 计算边缘时只使用帧底部的该比例（全屏截图时只看字幕带），None 表示整帧
+        """
+        self.capacity = capacity
+        self.edge_step = edge_step
+        self.text_band = text_band
+        self.lock = threading.Lock()
+        self.frames = None  # (N, H, W, 3) uint8，首次写入时按帧尺寸分配
+        self.edges = None  # (N, h, w) bool
+        self.energy = np.zeros(capacity)
+        self.timestamps = np.zeros(capacity)
+        self.count = 0  # 已写入的帧数
+        self.next_index = 0
+
+    def clear(self):
+        """清空缓冲（截图区域变化时调用）"""
+        with self.lock:
+            self.count = 0
+            self.next_index = 0
+
+    def _edge_map(self, frame: np.ndarray) -> np.ndarray:
+        """降采样的文字边缘图"""
+        if self.text_band:
+            frame = frame[int(frame.shape[0] * (1 - self.text_band)):]
+        y = luma(frame, self.edge_step)
+        return np.abs(np.diff(y, axis=1)) > self.EDGE_THRESHOLD
+
+    def store(self, frame: np.ndarray, timestamp=None):
+        """写入一帧（拷贝到预分配的存储中）"""
+        edges = self._edge_map(frame)
+        with self.lock:
+            if self.frames is None or self.frames.shape[1:] != frame.shape:
+                # 尺寸变化时重新分配并清空
+                self.frames = np.empty((self.capacity,) + frame.shape, dtype=np.uint8)
+                self.edges = np.empty((self.capacity,) + edges.shape, dtype=bool)
+                self.count = 0
+                self.next_index = 0
+
+            index = self.next_index
+            np.copyto(self.frames[index], frame)
+            self.edges[index] = edges
+            self.energy[index] = edges.mean()
+            self.timestamps[index] = time.perf_counter() if timestamp is None else timestamp
+            self.next_index = (index + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+
+    def newest_age(self):
+        """最新一帧距今的秒数，缓冲为空时返回 None"""
+        with self.lock:
+            if not self.count:
+                return None
+            newest = (self.next_index - 1) % self.capacity
+            return time.perf_counter() - self.timestamps[newest]
+
+    def best(self, window: float):
+        """挑选最近 window 秒内文字最完整、最清晰的一帧
+
+        Returns:
+            (frame 拷贝, 该帧距今秒数)；缓冲为空时返回 (None, None)
+        """
+        with self.lock:
+            if not self.count:
+                return None, None
+            now = time.perf_counter()
+            newest = (self.next_index - 1) % self.capacity
+            newest_edges = self.edges[newest]
+
+            best_index = newest
+            for age_rank in range(1, self.count):
+                index = (newest - age_rank) % self.capacity
+                if now - self.timestamps[index] > window:
+                    break
+                edges = self.edges[index]
+                total = edges.sum()
+                if total and (edges & ~newest_edges).sum() / total > self.MAX_MISSING:
+                    break  # 更早的帧属于上一段对话
+                if self.energy[index] > self.energy[best_index]:
+                    best_index = index
+
+            return self.frames[best_index].copy(), now - self.timestamps[best_index]
+
+
+class RingRecorder:
+    """后台线程按固定间隔抓帧写入环形缓冲"""
+
+    def __init__(self, grab_into, interval=0.1):
+        """初始化
+
+        Args:
+            grab_into: 抓取一帧并写入缓冲的函数（在后台线程中调用）
+            interval: 抓帧间隔（秒）
+        """
+        self.grab_into = grab_into
+        self.interval = interval
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """启动后台抓帧"""
+        if self.running:
+            return
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(self.stop_event,), daemon=True)
+        self.thread.start()
+
+    def run(self, stop_event: threading.Event):
+        """抓帧循环"""
+        while not stop_event.wait(self.interval):
+            try:
+                self.grab_into()
+            except Exception:
+                continue  # 截图偶尔失败时跳过
+
+    def stop(self):
+        """停止后台抓帧"""
+        self.stop_event.set()
+        self.thread = None
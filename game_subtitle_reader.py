@@ -5,19 +5,32 @@
 import os
 import sys
 import base64
+import sqlite3
 import time
 import threading
-import io
+
+from startup import StartupTimer
+
+# 尽早开始计时，并记录之后每个模块首次导入的耗时
+startup_timer = StartupTimer()
+startup_timer.install_import_hook()
+
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-import mss
-from PIL import Image, ImageDraw
-from pynput import keyboard
-import numpy as np
-from openai import OpenAI
 
+# NumPy、Pillow 和 mss 导入较慢：依赖它们的截图、编码、去重、监视和播放模块
+# 都在显示窗口后由 init_components 在后台线程中导入
+from audio_decode import StreamingAudioDecoder
+from backends import EVENT_AUDIO, EVENT_TEXT, EVENT_USAGE, KeepAlive, RequestCancelled, create_backend
 from config import Config
 from i18n import I18n, t
+from metrics import MetricsRecorder, RunRecord
+from pipeline import PipelineJob, StagedPipeline
+from profiles import ProfileManager, format_region, make_region, parse_region
+from response_cache import ResponseCache
+from scheduler import RequestScheduler
+from sentence_tts import split_sentences, spoken_prefix
+from ui_sink import ConsoleWriter, UiSink
 
 
 class FloatingWindow:
@@ -160,11 +173,7 @@ class FloatingWindow:
 
     def on_capture(self):
         """截图按钮点击"""
-        self.set_processing(True)
-        threading.Thread(
-            target=self.parent_app.process_screenshot,
-            daemon=True
-        ).start()
+        self.parent_app.process_screenshot("floating")
 
     def on_double_click(self, event):
         """双击返回主窗口"""
@@ -206,77 +215,70 @@ class FloatingWindow:
         self.window.destroy()
 
 
-class ScreenshotHandler:
-    """处理屏幕截图"""
+class RegionSelector:
+    """区域框选窗口 - 全屏半透明遮罩，拖动鼠标选择字幕区域"""
 
-    @staticmethod
-    def capture_screen(max_size=1280, quality=85) -> bytes:
-        """截取屏幕并返回压缩后的 JPEG 字节"""
-        with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            screenshot = sct.grab(monitor)
-            img = Image.frombytes('RGB', screenshot.size, screenshot.rgb)
-
-            # 压缩图像
-            width, height = img.size
-            if max(width, height) > max_size:
-                if width > height:
-                    new_width = max_size
-                    new_height = int(height * (max_size / width))
-                else:
-                    new_height = max_size
-                    new_width = int(width * (max_size / height))
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format='JPEG', quality=quality, optimize=True)
-            return img_bytes.getvalue()
+    def __init__(self, root, on_selected):
+        """初始化框选窗口
 
-    @staticmethod
-    def image_to_base64(image_bytes: bytes) -> str:
-        """图像字节转 Base64"""
-        return base64.b64encode(image_bytes).decode('ascii')
-
-
-class AudioPlayer:
-    """音频播放器 - 实时播放 WAV 格式音频"""
-
-    def __init__(self):
-        """初始化音频播放器"""
-        import pyaudio
-        self.pya = pyaudio.PyAudio()
-        self.sample_rate = 24000  # Qwen 输出 24kHz
-        self.audio_buffer = []
-        self.is_playing = False
-
-    def play_wav_audio(self, wav_bytes: bytes):
-        """播放 WAV 格式音频"""
-        try:
-            # 解码 WAV 字节为 PCM 数据
-            audio_np = np.frombuffer(wav_bytes, dtype=np.int16)
-
-            # 打开播放流
-            stream = self.pya.open(
-                format=self.pya.get_format_from_width(2),  # 16-bit
-                channels=1,
-                rate=self.sample_rate,
-                output=True
-            )
+        Args:
+            root: tkinter 根窗口
+            on_selected: 选择完成回调，参数为 mss 区域字典（取消时不调用）
+        """
+        self.on_selected = on_selected
+        self.start_x = 0
+        self.start_y = 0
+        self.rect_id = None
+
+        self.window = tk.Toplevel(root)
+        self.window.attributes('-fullscreen', True)
+        self.window.attributes('-topmost', True)
+        self.window.attributes('-alpha', 0.3)
+        self.window.configure(bg="black")
+
+        self.canvas = tk.Canvas(self.window, cursor="cross", bg="black", highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.create_text(
+            self.window.winfo_screenwidth() // 2, 40,
+            text=t("region_hint"),
+            fill="white",
+            font=("Arial", 16, "bold")
+        )
 
-            # 播放音频
-            self.is_playing = True
-            stream.write(audio_np.tobytes())
-            stream.stop_stream()
-            stream.close()
-            self.is_playing = False
+        self.canvas.bind('<Button-1>', self.on_press)
+        self.canvas.bind('<B1-Motion>', self.on_drag)
+        self.canvas.bind('<ButtonRelease-1>', self.on_release)
+        self.window.bind('<Escape>', lambda e: self.window.destroy())
+        self.window.focus_force()
+
+    def on_press(self, event):
+        """开始框选"""
+        self.start_x = event.x_root
+        self.start_y = event.y_root
+        if self.rect_id:
+            self.canvas.delete(self.rect_id)
+        self.rect_id = self.canvas.create_rectangle(
+            event.x, event.y, event.x, event.y, outline="red", width=2
+        )
 
-        except Exception as e:
-            print(t("log_play_failed", e))
+    def on_drag(self, event):
+        """更新框选矩形"""
+        x0 = self.start_x - self.window.winfo_rootx()
+        y0 = self.start_y - self.window.winfo_rooty()
+        self.canvas.coords(self.rect_id, x0, y0, event.x, event.y)
+
+    def on_release(self, event):
+        """完成框选"""
+        left = min(self.start_x, event.x_root)
+        top = min(self.start_y, event.y_root)
+        width = abs(event.x_root - self.start_x)
+        height = abs(event.y_root - self.start_y)
+        self.window.destroy()
 
-    def shutdown(self):
-        """关闭音频播放器"""
-        if self.pya:
-            self.pya.terminate()
+        # 忽略误触产生的过小区域
+        if width < 10 or height < 10:
+            return
+        self.on_selected(make_region(left, top, width, height))
 
 
 class QwenMultimodalHandler:
@@ -286,11 +288,15 @@ class QwenMultimodalHandler:
         """初始化 API 处理器"""
         self.config = config
         self.log_callback = log_callback
-        self.client = OpenAI(
-            api_key=config.DASHSCOPE_API_KEY,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
+        self.backend = create_backend(config, log=self.log_t)
+        self.keepalive = None
         self.recognized_text = ""
+        self.request_start_time = None
+
+    @property
+    def model_name(self) -> str:
+        """当前后端使用的模型名"""
+        return self.backend.model_name
 
     def log(self, message: str):
         """记录日志"""
@@ -299,91 +305,123 @@ class QwenMultimodalHandler:
         else:
             print(f"[QwenAPI] {message}")
 
+    def warm_up(self):
+        """预热连接并启动心跳（在后台线程中调用）"""
+        if self.config.WARMUP_ON_START:
+            start = time.perf_counter()
+            try:
+                self.backend.warm_up()
+                self.log_t("log_warmup_done", (time.perf_counter() - start) * 1000)
+            except Exception as e:
+                self.log_t("log_warmup_failed", e)
+
+        if self.config.KEEPALIVE_INTERVAL > 0 and self.keepalive is None:
+            self.keepalive = KeepAlive(
+                self.backend,
+                self.config.KEEPALIVE_INTERVAL,
+                on_error=lambda e: self.log_t("log_keepalive_failed", e)
+            )
+            self.keepalive.start()
+
+    def log_connection_stats(self):
+        """输出连接复用统计"""
+        stats = self.backend.describe_stats()
+        self.log_t(
+            "log_connection_stats",
+            stats["requests"], stats["new_connections"], stats["reused"], stats["http_version"]
+        )
+        if stats["retries"] or stats["timeouts"] or stats["hedges"]:
+            self.log_t("log_retry_stats", stats["retries"], stats["timeouts"], stats["hedges"], stats["hedge_wins"])
+        if stats.get("speech_cache_hits"):
+            self.log_t("log_speech_cache_stats", stats["speech_cache_hits"], stats["speech_cache_misses"])
+
     def log_t(self, key: str, *args):
         """记录翻译后的日志"""
         message = t(key, *args)
         self.log(message)
 
-    def process_image_and_prompt(self, image_b64: str, prompt: str):
+    def process_image_and_prompt(self, image_b64: str, prompt: str, on_audio=None, cancel_event=None,
+                                 record=None, spoken_text=""):
         """处理图像和提示词，返回文本和音频
 
         Args:
             image_b64: Base64 编码的图像
             prompt: 文本提示词
+            on_audio: 可选回调，每收到一段 Base64 音频就立即调用，用于边收边播
+            cancel_event: 可选 threading.Event，被设置时关闭响应流并抛出 RequestCancelled
+            record: 可选 RunRecord，写入首字/首音延迟、流耗时、用量和字节数
+            spoken_text: 上一次已朗读的文本，逐句合成时开头相同的句子不再合成
 
         Returns:
             (recognized_text, audio_bytes): 识别的文本和音频字节
         """
         try:
             self.log_t("log_sending_request")
+            start = self.request_start_time = time.perf_counter()
+            if record is not None:
+                record.upload_bytes = len(image_b64)
 
-            # 构建消息
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_b64}"
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": prompt
-                        }
-                    ]
-                }
-            ]
-
-            # 发起流式请求
-            completion = self.client.chat.completions.create(
-                model="qwen3-omni-flash",
-                messages=messages,
-                modalities=["text", "audio"],  # 输出文本和音频
-                audio={"voice": self.config.VOICE, "format": "wav"},
-                stream=True,
-                stream_options={"include_usage": True},
-            )
+            # 发起流式请求（等待数据、重试和退避期间被取消时由后端立即抛出 RequestCancelled）
+            events = self.backend.stream(image_b64, prompt, spoken_text, cancel_event=cancel_event)
 
             # 处理流式响应
             self.log_t("log_receiving")
             text_parts = []
-            audio_base64_string = ""
-
-            for chunk in completion:
-                # 处理文本部分
-                if chunk.choices and chunk.choices[0].delta.content:
-                    text_part = chunk.choices[0].delta.content
-                    text_parts.append(text_part)
-                    self.log_t("log_recognized", text_part)
-
-                # 收集音频部分
-                if (chunk.choices and
-                    hasattr(chunk.choices[0].delta, "audio") and
-                    chunk.choices[0].delta.audio):
-                    audio_data = chunk.choices[0].delta.audio.get("data", "")
-                    if audio_data:
-                        audio_base64_string += audio_data
+            audio_decoder = StreamingAudioDecoder(keep=True)  # 音频边收边解码，避免最后集中解码
+
+            for kind, data in events:
+                if cancel_event is not None and cancel_event.is_set():
+                    events.close()
+                    raise RequestCancelled()
+
+                if kind == EVENT_TEXT:
+                    # 处理文本部分
+                    if record is not None and record.first_text_ms is None:
+                        record.first_text_ms = (time.perf_counter() - start) * 1000
+                    text_parts.append(data)
+                    self.log_t("log_recognized", data)
+                elif kind == EVENT_AUDIO:
+                    # 收集音频部分
+                    if record is not None and record.first_audio_ms is None:
+                        record.first_audio_ms = (time.perf_counter() - start) * 1000
+                    audio_decoder.feed(data)
+                    if on_audio:
+                        on_audio(data)
+                elif kind == EVENT_USAGE and record is not None:
+                    record.add_usage(data)
+
+            if record is not None:
+                record.stream_ms = (time.perf_counter() - start) * 1000
 
             # 合并文本
             recognized_text = "".join(text_parts)
             self.recognized_text = recognized_text
 
             # 解码音频
-            audio_bytes = None
-            if audio_base64_string:
-                audio_bytes = base64.b64decode(audio_base64_string)
+            audio_bytes = audio_decoder.getvalue() or None
+            if audio_bytes:
                 self.log_t("log_audio_size", len(audio_bytes))
+                if record is not None:
+                    record.audio_bytes_received = len(audio_bytes)
             else:
                 self.log_t("log_no_audio")
 
+            self.log_connection_stats()
             return recognized_text, audio_bytes
 
+        except RequestCancelled:
+            self.log_t("log_request_cancelled")
+            raise
         except Exception as e:
             self.log_t("log_api_failed", e)
             raise
 
+    def close(self):
+        """停止心跳并关闭后端连接"""
+        if self.keepalive:
+            self.keepalive.stop()
+        self.backend.close()
+
 
 class GameSubtitleReaderApp:
     """主应用程序"""
@@ -391,6 +429,7 @@ class GameSubtitleReaderApp:
     def __init__(self):
         """初始化应用"""
         self.config = Config()
+        self.console = ConsoleWriter()
 
         # 验证配置
         try:
@@ -399,21 +438,55 @@ class GameSubtitleReaderApp:
             print(f"配置错误: {e}")
             sys.exit(1)
 
-        # 初始化组件
-        self.audio_player = AudioPlayer()
-        self.api_handler = QwenMultimodalHandler(self.config, self.log)
-        self.screenshot_handler = ScreenshotHandler()
+        # 初始化组件（音频设备、API 客户端、截图引擎和响应缓存较慢，
+        # 显示窗口后由 init_components 在后台创建）
+        self.audio_player = None
+        self.streaming_player = None
+        self.api_handler = None
+        self.response_cache = None
+        self.ready = threading.Event()  # 后台组件全部创建完成后设置
+        self.first_sound_pending = False
+        self.sound_record = None  # 等待记录首音延迟的任务统计
+        self.profile_manager = ProfileManager(self.config.PROFILE_FILE)
+        # 截图、编码、去重和监视组件依赖 NumPy、Pillow 和 mss，同样由 init_components 创建
+        self.screenshot_handler = None
+        self.encoder_ladder = None
+        self.image_encoder = None
+        self.deduplicator = None
+        self.watcher = None
+
+        # 每次任务的耗时和用量统计
+        self.metrics = MetricsRecorder(
+            self.config.METRICS_WINDOW,
+            self.config.METRICS_EXPORT_FILE or None
+        )
+
+        # 处理流水线和最新优先调度器
+        self.pipeline = self.create_pipeline()
+        self.pipeline.start()
+        self.scheduler = RequestScheduler(
+            self.pipeline,
+            self.config.COALESCE_WINDOW,
+            on_preempt=self.flush_playback
+        )
 
         # 状态
-        self.is_processing = False
         self.is_floating = False  # 是否处于悬浮模式
 
         # GUI 组件
         self.root = None
+        self.ui = None  # 界面更新队列，创建界面后可用
         self.status_label = None
         self.log_text = None
         self.result_text = None
+        self.stats_label = None
         self.prompt_text = None
+        # 当前提示词：只在主线程随编辑框更新，热键和监视线程读取它而不访问 Tk 控件
+        self.prompt = self.config.PROMPT_TEMPLATE.strip()
+        self.profile_var = None
+        self.region_var = None
+        self.watch_var = None
+        self.speed_var = None
         self.floating_window = None  # 悬浮窗口
 
         # 快捷键监听器
@@ -423,61 +496,455 @@ class GameSubtitleReaderApp:
         self.last_screenshot = None
         self.last_recognized_text = ""
 
-    # ============ 核心处理流程 ============
+    # ============ 启动 ============
+
+    def init_components(self):
+        """后台线程：并行打开音频设备、创建 API 客户端和截图组件，完成后在主线程中启用截图
 
-    def process_screenshot(self):
-        """主处理流程：截图 → API → 播放"""
-        if self.is_processing:
-            self.log(t("log_processing"))
+        依赖 NumPy、Pillow 和 mss 的模块也在这里导入，不拖慢窗口的首次显示。
+        """
+        def timed(name, func):
+            start = time.perf_counter()
+            func()
+            startup_timer.record(name, (time.perf_counter() - start) * 1000)
+
+        def init_audio():
+            from audio_player import AudioPlayer as StreamingAudioPlayer, WavPlayer
+            self.audio_player = WavPlayer(speed=self.config.PLAYBACK_SPEED)
+            self.streaming_player = StreamingAudioPlayer(speed=self.config.PLAYBACK_SPEED)
+            self.streaming_player.on_playback_start = self.on_playback_start
+
+        def init_api():
+            self.api_handler = QwenMultimodalHandler(self.config, self.log)
+
+        def init_capture():
+            from frame_dedup import FrameDeduplicator
+            from image_encoder import AdaptiveEncoder, build_ladder, webp_available
+            from screenshot import ScreenshotHandler
+            from watcher import SubtitleWatcher
+
+            # 区域以 on_components_ready 时的当前档案为准（期间可能切换了档案）
+            self.screenshot_handler = ScreenshotHandler(
+                self.profile_manager.active.region,
+                self.config.DEDUP_HASH_SIZE,
+                self.config.DEDUP_FULLSCREEN_BAND,
+                self.config.SUBTITLE_AUTO_CROP,
+                self.config.SUBTITLE_ENHANCE
+            )
+            # 实时接口只接受 JPEG 图像
+            self.encoder_ladder = build_ladder(
+                self.config.JPEG_QUALITY,
+                allow_webp=self.config.BACKEND != "realtime" and webp_available()
+            )
+            self.image_encoder = AdaptiveEncoder(
+                self.encoder_ladder,
+                self.config.IMAGE_BYTE_BUDGET,
+                self.config.ENCODE_LATENCY_BUDGET_MS,
+                reprobe_interval=self.config.ENCODER_REPROBE_INTERVAL
+            )
+            self.deduplicator = FrameDeduplicator(
+                self.config.DEDUP_MAX_DISTANCE,
+                self.config.DEDUP_HISTORY_SIZE
+            )
+            # 监视模式：字幕变化并稳定后自动朗读
+            self.watcher = SubtitleWatcher(
+                lambda: self.screenshot_handler.sample_luma(self.config.WATCH_SAMPLE_STEP),
+                self.on_subtitle_changed,
+                interval=self.config.WATCH_INTERVAL,
+                idle_interval=self.config.WATCH_IDLE_INTERVAL,
+                settle_time=self.config.WATCH_SETTLE_TIME,
+                change_ratio=self.config.WATCH_CHANGE_RATIO
+            )
+            if self.config.RESPONSE_CACHE_ENABLED:
+                self.response_cache = ResponseCache(
+                    self.config.RESPONSE_CACHE_DIR,
+                    self.config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+                )
+
+        errors = []
+
+        def run(name, func):
+            try:
+                timed(name, func)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=run, args=(name, func), daemon=True)
+            for name, func in (("audio_init", init_audio), ("capture_init", init_capture))
+        ]
+        for thread in threads:
+            thread.start()
+        run("api_init", init_api)
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            self.log(t("log_startup_failed", errors[0]))
+            self.update_status(t("status_error"))
             return
+        self.post_ui("ready", self.on_components_ready)
+
+    def on_components_ready(self):
+        """后台组件创建完成（主线程）：启用截图、快捷键和监视模式，并预热连接"""
+        # 窗口显示前调整的语速
+        speed = self.speed_var.get()
+        self.audio_player.set_speed(speed)
+        self.streaming_player.set_speed(speed)
+
+        # 后台创建截图组件期间切换的档案
+        self.screenshot_handler.set_region(self.profile_manager.active.region)
+        # 预截图：后台持续抓帧，触发时直接使用最近最好的一帧
+        if self.config.FRAME_RING_ENABLED:
+            self.screenshot_handler.start_ring(self.config.FRAME_RING_SIZE, self.config.FRAME_RING_INTERVAL)
+
+        self.ready.set()
+        self.capture_btn_main.config(state=tk.NORMAL)
+        self.update_status(t("status_ready"))
+
+        # 自动启用快捷键
+        self.setup_hotkey()
+
+        # 按配置启动监视模式
+        if self.watch_var.get():
+            self.toggle_watch_mode()
+
+        # 后台预热 API 连接
+        threading.Thread(target=self.api_handler.warm_up, daemon=True).start()
+
+        self.report_startup()
+
+    def on_first_paint(self):
+        """窗口首次绘制完成（主线程空闲时调用）"""
+        startup_timer.mark("first_paint")
+
+    def report_startup(self):
+        """记录启动耗时：首次绘制、就绪、设备初始化和最慢的模块导入"""
+        ready_ms = startup_timer.mark("ready")
+        startup_timer.remove_import_hook()
+        durations = startup_timer.durations
+        self.log(t("log_startup_timing",
+                   startup_timer.marks.get("first_paint", 0.0), ready_ms,
+                   durations.get("audio_init", 0.0), durations.get("api_init", 0.0),
+                   durations.get("capture_init", 0.0)))
+        slowest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in startup_timer.slowest_imports())
+        if slowest:
+            self.log(t("log_startup_imports", slowest))
+        if self.config.STARTUP_TIMING_FILE:
+            try:
+                startup_timer.export(self.config.STARTUP_TIMING_FILE)
+            except OSError as e:
+                self.log(t("log_startup_export_failed", e))
+
+    # ============ 核心处理流程 ============
+
+    def create_pipeline(self) -> StagedPipeline:
+        """创建处理流水线：截图/编码 → 识别（流式接收）→ 播放"""
+        return StagedPipeline(
+            [
+                ("capture", self.stage_capture),
+                ("recognize", self.stage_recognize),
+                ("playback", self.stage_playback),
+            ],
+            queue_size=self.config.PIPELINE_QUEUE_SIZE,
+            on_done=self.on_job_done,
+            on_error=self.on_job_failed,
+            on_cancelled=self.on_job_cancelled,
+        )
+
+    def process_screenshot(self, source="manual") -> bool:
+        """提交一次截图处理任务：截图 → API → 播放
+
+        任务交给流水线异步执行，调用方不会被阻塞。最新的触发优先：
+        有任务在途时会取消它们并清空播放，短时间内的连续触发会被合并。
+
+        Returns:
+            True 表示任务已提交；触发被合并或仍在启动时返回 False
+        """
+        if not self.ready.is_set():
+            self.log(t("log_not_ready"))
+            return False
+
+        job = PipelineJob(source, prompt=self.prompt)
+        result = self.scheduler.trigger(job)
+        if result == "coalesced":
+            self.log(t("log_trigger_coalesced"))
+            return False
+
+        if result == "preempted":
+            stats = self.scheduler.stats
+            self.log(t("log_preempted", stats.preemptions, stats.cancelled_jobs, stats.coalesced))
 
-        self.is_processing = True
         self.update_status(t("status_processing"))
+        self.post_ui("processing", self.set_floating_processing, True)
+        return True
 
-        try:
-            # 1. 截图
-            self.log(t("log_capturing"))
-            image_bytes = self.screenshot_handler.capture_screen()
-            image_b64 = self.screenshot_handler.image_to_base64(image_bytes)
-            self.log(t("log_capture_done", len(image_bytes)))
-            self.last_screenshot = image_bytes
-
-            # 2. 发送到 API 并获取结果
-            prompt = self.prompt_text.get('1.0', tk.END).strip()
-            recognized_text, audio_bytes = self.api_handler.process_image_and_prompt(
-                image_b64, prompt
+    def flush_playback(self):
+        """清空两个播放器中尚未播放的音频"""
+        if not self.ready.is_set():
+            return
+        self.streaming_player.cancel_playing()
+        self.audio_player.cancel_playing()
+
+    def cancel_processing(self):
+        """取消所有在途任务并停止当前播放"""
+        self.pipeline.cancel_all()
+        self.flush_playback()
+
+    def stage_capture(self, job: PipelineJob):
+        """阶段 1：截图并编码"""
+        latency_ms = self.scheduler.on_job_started(job)
+        job.record = RunRecord(job.id, job.source)
+        job.record.queue_ms = latency_ms
+        self.log(t("log_job_started", job.id, job.source, latency_ms))
+        self.log(t("log_capturing"))
+        job.encoder_settings = self.choose_encoder_settings()
+        timings = {}
+        job.image_bytes, job.frame_hash, job.has_text = self.screenshot_handler.capture_screen(
+            self.config.MAX_IMAGE_SIZE, job.encoder_settings, timings,
+            self.config.FRAME_RING_WINDOW if self.config.FRAME_RING_ENABLED else None
+        )
+        job.record.update(timings)
+        job.record.encoder = job.encoder_settings.key
+        if self.config.ADAPTIVE_ENCODER:
+            self.image_encoder.record_encode(
+                self.profile_manager.active.encoder, job.encoder_settings,
+                len(job.image_bytes), timings["resize_ms"] + timings["encode_ms"]
             )
+        self.log(t("log_capture_done", len(job.image_bytes)))
+        self.last_screenshot = job.image_bytes
+
+    def stage_recognize(self, job: PipelineJob):
+        """阶段 2：画面未变化时重放上一次结果，否则识别（音频边收边播）"""
+        dedup_context = (job.prompt, self.config.VOICE)
+        entry = None
+        if self.config.DEDUP_ENABLED:
+            entry, distance = self.deduplicator.lookup(job.frame_hash, dedup_context)
+
+        if entry:
+            self.log(t("log_dedup_hit", distance))
+            job.recognized_text, job.audio_bytes = entry.recognized_text, entry.audio_bytes
+            job.streamed = False
+            job.record.result_source = "dedup"
+        else:
+            job.recognized_text, job.audio_bytes, job.streamed, partial = self.recognize(
+                job.image_bytes, job.prompt, job.cancel_event, job.record
+            )
+            # 字幕区域本来就没有文字（没有对话时按键）时识别不出文字不算编码方案的失败
+            if (self.config.ADAPTIVE_ENCODER and job.record.result_source == "api"
+                    and (job.recognized_text or job.has_text)):
+                self.report_encoder_result(job.encoder_settings, bool(job.recognized_text))
+            # 只朗读了新增部分时音频不完整，不作为该画面的结果重放
+            if (job.recognized_text or job.audio_bytes) and not partial:
+                self.deduplicator.remember(
+                    job.frame_hash, dedup_context, job.recognized_text, job.audio_bytes
+                )
+
+        # 显示识别结果
+        if job.recognized_text:
+            self.last_recognized_text = job.recognized_text
+            self.display_result(job.recognized_text)
+            self.log(t("log_complete"))
+        else:
+            self.log(t("log_no_text"))
+
+    def choose_encoder_settings(self) -> "EncoderSettings":
+        """为当前档案选择编码方案，方案变化时记录日志并保存档案"""
+        if not self.config.ADAPTIVE_ENCODER:
+            return self.encoder_ladder[0]
+        state = self.profile_manager.active.encoder
+        previous = state.get("choice")
+        settings = self.image_encoder.choose(state)
+        if settings.key != previous:
+            self.log(t("log_encoder_selected", settings.key))
+            self.save_profiles_quietly()
+        return settings
+
+    def report_encoder_result(self, settings: "EncoderSettings", success: bool):
+        """反馈识别结果，方案因识别失败被停用时保存档案"""
+        if self.image_encoder.record_result(self.profile_manager.active.encoder, settings, success):
+            self.log(t("log_encoder_disabled", settings.key))
+            self.save_profiles_quietly()
+
+    def save_profiles_quietly(self):
+        """保存档案，失败时只记录日志"""
+        try:
+            self.profile_manager.save()
+        except OSError as e:
+            self.log(t("log_save_failed", e))
 
-            # 3. 显示识别结果
-            if recognized_text:
-                self.last_recognized_text = recognized_text
-                self.display_result(recognized_text)
-                self.log(t("log_complete"))
-            else:
-                self.log(t("log_no_text"))
-
-            # 4. 播放音频
-            if audio_bytes:
-                self.log(t("log_playing"))
-                self.audio_player.play_wav_audio(audio_bytes)
-                self.log(t("log_play_done"))
-            else:
-                self.log(t("log_no_audio_play"))
+    def stage_playback(self, job: PipelineJob):
+        """阶段 3：播放音频（流式请求的音频在接收时已开始播放，这里等待播放结束）"""
+        start = time.perf_counter()
+        self.play_job_audio(job)
+        job.record.playback_ms = (time.perf_counter() - start) * 1000
+
+    def play_job_audio(self, job: PipelineJob):
+        """播放任务的音频"""
+        if job.streamed:
+            self.streaming_player.wait_for_complete()
+            self.log(t("log_play_done"))
+        elif job.audio_bytes:
+            self.log(t("log_playing"))
+            self.audio_player.play_wav_audio(job.audio_bytes)
+            self.log(t("log_play_done"))
+            stats = self.audio_player.describe_stats()
+            if stats["underruns"]:
+                self.log(t("log_player_stats", stats["underruns"], stats["latency_ms"]))
+        else:
+            self.log(t("log_no_audio_play"))
 
+    def on_job_done(self, job: PipelineJob):
+        """任务完成"""
+        self.finish_record(job, "done")
+        if self.pipeline.pending == 0:
             self.update_status(t("status_waiting"))
+            self.on_pipeline_idle()
+
+    def on_job_failed(self, job: PipelineJob, stage: str, error: Exception):
+        """任务在某个阶段失败"""
+        self.finish_record(job, "failed")
+        self.log(t("log_error", error))
+        self.update_status(t("status_error"))
+        if self.pipeline.pending == 0:
+            self.on_pipeline_idle()
+
+    def on_job_cancelled(self, job: PipelineJob):
+        """任务被取消"""
+        self.scheduler.on_job_cancelled(job)
+        self.finish_record(job, "cancelled")
+        self.log(t("log_job_cancelled", job.id))
+        if self.pipeline.pending == 0:
+            self.update_status(t("status_waiting"))
+            self.on_pipeline_idle()
+
+    def finish_record(self, job: PipelineJob, outcome: str):
+        """任务离开流水线时写入统计记录并刷新统计显示"""
+        record = getattr(job, "record", None)
+        if record is None:
+            return  # 尚未开始执行就被取消
+        record.outcome = outcome
+        record.total_ms = (time.perf_counter() - job.created_time) * 1000
+        try:
+            self.metrics.add(record)
+        except OSError as e:
+            self.log(t("log_metrics_failed", e))
+        self.update_stats_display()
+
+    def update_stats_display(self):
+        """在界面上显示最近任务的 p50/p95/p99"""
+        if not self.stats_label:
+            return
+        summary = self.metrics.summary(("first_text_ms", "first_sound_ms", "capture_ms", "total_ms"))
+        lines = []
+        for field, key in (("first_text_ms", "stats_first_text"), ("first_sound_ms", "stats_first_sound"),
+                           ("capture_ms", "stats_capture"), ("total_ms", "stats_total")):
+            values = summary[field]
+            text = " / ".join(f"{v:.0f}" for v in values) + " ms" if values else "-"
+            lines.append(f"{t(key)}: {text}")
+        scheduler = self.scheduler.snapshot()
+        lines.append(t("stats_scheduler", scheduler["max_queue_depth"], scheduler["avg_start_latency_ms"],
+                       scheduler["preemptions"], scheduler["coalesced"]))
+        self.post_ui("stats", self.stats_label.config, text="\n".join(lines))
+
+    def on_pipeline_idle(self):
+        """流水线空闲，更新悬浮窗口状态"""
+        self.post_ui("processing", self.set_floating_processing, False)
+
+    def set_floating_processing(self, is_processing: bool):
+        """更新悬浮窗口的处理状态指示（主线程）"""
+        if self.floating_window:
+            self.floating_window.set_processing(is_processing)
 
-        except Exception as e:
-            self.log(t("log_error", e))
-            self.update_status(t("status_error"))
+    def recognize(self, image_bytes: bytes, prompt: str, cancel_event=None, record=None):
+        """识别截图：优先读取磁盘缓存，未命中时调用 API 并写入缓存
 
+        调用 API 时音频边收边送入流式播放器。可选的 record 记录结果来源和请求统计。
+        开启增量朗读时（逐句合成模式），开头与上一次识别结果相同的句子不再合成和播放。
+
+        Returns:
+            (recognized_text, audio_bytes, streamed, partial): streamed 表示音频已送入流式播放器，
+            partial 表示音频只包含新增的句子
+        """
+        cache_key = None
+        if self.response_cache:
+            cache_key = ResponseCache.make_key(
+                image_bytes, prompt, self.config.VOICE, self.api_handler.model_name
+            )
+            cached = self.response_cache.get(cache_key)
+            if cached:
+                self.log(t("log_cache_hit"))
+                if record is not None:
+                    record.result_source = "cache"
+                return cached[0], cached[1], False, False
+
+        audio_sent = False
+
+        def on_audio(audio_b64):
+            nonlocal audio_sent
+            # 任务被抢占后不再向播放器推送音频
+            if cancel_event is None or not cancel_event.is_set():
+                self.streaming_player.add_data(audio_b64)
+                audio_sent = True
+
+        start = time.perf_counter()
+        image_b64 = self.screenshot_handler.image_to_base64(image_bytes)
+        if record is not None:
+            record.base64_ms = (time.perf_counter() - start) * 1000
+            record.result_source = "api"
+        spoken_text = ""
+        if self.config.INCREMENTAL_SPEECH and self.config.SPEECH_MODE == "sentence":
+            spoken_text = self.last_recognized_text
+        self.sound_record = record
+        self.first_sound_pending = True
+        completed = False
+        try:
+            recognized_text, audio_bytes = self.api_handler.process_image_and_prompt(
+                image_b64, prompt,
+                on_audio=on_audio,
+                cancel_event=cancel_event,
+                record=record,
+                spoken_text=spoken_text
+            )
+            completed = cancel_event is None or not cancel_event.is_set()
         finally:
-            self.is_processing = False
-            # 更新悬浮窗口状态
-            if self.floating_window:
-                self.floating_window.set_processing(False)
+            if audio_sent:
+                # 正常结束时输出变速器中剩余的样本；出错或被取消时丢弃残留的解码和变速状态
+                self.streaming_player.end_stream(discard=not completed)
+
+        partial = False
+        if spoken_text and recognized_text:
+            skipped = spoken_prefix(spoken_text, recognized_text, self.config.SENTENCE_MIN_CHARS)
+            partial = 0 < skipped < len(split_sentences(recognized_text, self.config.SENTENCE_MIN_CHARS))
+            if partial:
+                self.log(t("log_incremental_speech", skipped))
+
+        if cache_key and (recognized_text or audio_bytes) and not partial:
+            try:
+                self.response_cache.put(cache_key, recognized_text, audio_bytes)
+            except (OSError, sqlite3.Error) as e:
+                self.log(t("log_cache_failed", e))
+
+        return recognized_text, audio_bytes, bool(audio_bytes), partial
+
+    def on_playback_start(self, timestamp: float):
+        """流式播放器开始出声回调（播放线程中调用），记录首音延迟"""
+        if not self.first_sound_pending:
+            return
+        self.first_sound_pending = False
+        start = self.api_handler.request_start_time
+        if start is not None:
+            first_sound_ms = (timestamp - start) * 1000
+            if self.sound_record is not None:
+                self.sound_record.first_sound_ms = first_sound_ms
+            self.log(t("log_first_sound", first_sound_ms))
 
     def display_result(self, text: str):
-        """在结果区域显示识别文本"""
+        """在结果区域显示识别文本（任意线程）"""
+        self.post_ui("result", self.show_result, text)
+
+    def show_result(self, text: str):
+        """在结果区域显示识别文本（主线程）"""
         if self.result_text:
             self.result_text.config(state=tk.NORMAL)
             self.result_text.delete('1.0', tk.END)
@@ -529,18 +996,83 @@ class GameSubtitleReaderApp:
             self.is_floating = True
             self.log(t("log_floating_enter"))
 
+    # ============ 游戏档案 ============
+
+    def apply_profile(self):
+        """将当前档案应用到截图处理器和界面（仍在启动时由 on_components_ready 应用区域）"""
+        profile = self.profile_manager.active
+        if self.ready.is_set():
+            self.screenshot_handler.set_region(profile.region)
+            self.deduplicator.clear()  # 不同区域的哈希不可比较
+        if self.profile_var:
+            self.profile_var.set(profile.name)
+        if self.region_var:
+            self.region_var.set(format_region(profile.region))
+
+    def on_profile_selected(self, event=None):
+        """切换游戏档案"""
+        name = self.profile_var.get().strip()
+        if not name:
+            return
+        self.profile_manager.set_active(name)
+        self.apply_profile()
+        self.log(t("log_profile_loaded", name, self.describe_region(self.profile_manager.active.region)))
+
+    def save_profile(self):
+        """保存当前档案（名称取自档案下拉框，区域取自坐标输入框）"""
+        name = self.profile_var.get().strip()
+        if not name:
+            return
+
+        try:
+            region = parse_region(self.region_var.get())
+        except ValueError:
+            self.log(t("log_region_invalid", self.region_var.get()))
+            return
+
+        self.profile_manager.update_region(name, region)
+        try:
+            self.profile_manager.save()
+        except OSError as e:
+            self.log(t("log_save_failed", e))
+            return
+
+        self.apply_profile()
+        self.profile_combo.config(values=self.profile_manager.names())
+        self.log(t("log_profile_saved", name, self.describe_region(region)))
+
+    def select_region(self):
+        """打开框选窗口选择字幕区域"""
+        def on_selected(region):
+            self.region_var.set(format_region(region))
+            self.save_profile()
+
+        RegionSelector(self.root, on_selected)
+
+    def use_full_screen(self):
+        """当前档案改为截取整个屏幕"""
+        self.region_var.set("")
+        self.save_profile()
+
+    @staticmethod
+    def describe_region(region) -> str:
+        """生成区域的日志描述"""
+        return format_region(region) if region else t("region_full_screen")
+
     def setup_hotkey(self):
         """设置全局快捷键"""
         if self.hotkey_listener:
             return  # 已经设置
 
         try:
+            from pynput import keyboard  # 导入较慢，就绪后才需要
+
             hotkey_str = self.config.SCREENSHOT_HOTKEY
 
             def on_activate():
                 """快捷键触发回调"""
                 self.log(t("log_hotkey_trigger", hotkey_str))
-                threading.Thread(target=self.process_screenshot, daemon=True).start()
+                self.process_screenshot("hotkey")
 
             # 解析快捷键
             hotkey_combo = keyboard.HotKey(
@@ -559,6 +1091,36 @@ class GameSubtitleReaderApp:
         except Exception as e:
             self.log(t("log_hotkey_failed", e))
 
+    def on_speed_changed(self, value):
+        """语速滑块变化，立即应用到两个播放器（仍在启动时由 on_components_ready 应用）"""
+        if not self.ready.is_set():
+            return
+        speed = float(value)
+        self.audio_player.set_speed(speed)
+        self.streaming_player.set_speed(speed)
+
+    def on_prompt_modified(self, event=None):
+        """提示词编辑框内容变化（主线程），更新供工作线程读取的提示词"""
+        self.prompt = self.prompt_text.get('1.0', tk.END).strip()
+        # Tk 只在修改标记由假变真时触发 <<Modified>>，需要复位才能收到下一次修改
+        self.prompt_text.edit_modified(False)
+
+    def toggle_watch_mode(self):
+        """开启或关闭监视模式（仍在启动时由 on_components_ready 按勾选状态启动）"""
+        if not self.ready.is_set():
+            return
+        if self.watch_var.get():
+            self.watcher.start()
+            self.log(t("log_watch_enabled"))
+        else:
+            self.watcher.stop()
+            self.log(t("log_watch_disabled"))
+
+    def on_subtitle_changed(self):
+        """监视模式检测到新字幕（监视线程中调用）"""
+        self.log(t("log_watch_trigger"))
+        self.process_screenshot("watch")
+
     def stop_hotkey(self):
         """停止快捷键监听"""
         if self.hotkey_listener:
@@ -572,7 +1134,7 @@ class GameSubtitleReaderApp:
         """创建 tkinter GUI"""
         self.root = tk.Tk()
         self.root.title(t("app_title"))
-        self.root.geometry("550x700")
+        self.root.geometry("550x940")
 
         # 状态显示
         status_frame = tk.Frame(self.root, bg="#f0f0f0", pady=10)
@@ -632,6 +1194,81 @@ class GameSubtitleReaderApp:
         )
         voice_combo.pack(side=tk.LEFT, padx=5)
 
+        # 语速（变速不变调，对缓存和重放的音频同样生效）
+        speed_frame = tk.Frame(self.config_frame)
+        speed_frame.pack(fill=tk.X, pady=5)
+        self.speed_label = tk.Label(speed_frame, text=t("speed_label"), width=8, anchor='w')
+        self.speed_label.pack(side=tk.LEFT)
+        self.speed_var = tk.DoubleVar(value=self.config.PLAYBACK_SPEED)
+        speed_scale = tk.Scale(
+            speed_frame,
+            variable=self.speed_var,
+            from_=self.config.PLAYBACK_SPEED_RANGE[0],
+            to=self.config.PLAYBACK_SPEED_RANGE[1],
+            resolution=0.1,
+            orient=tk.HORIZONTAL,
+            length=200,
+            command=self.on_speed_changed
+        )
+        speed_scale.pack(side=tk.LEFT, padx=5)
+
+        # 游戏档案
+        profile_frame = tk.Frame(self.config_frame)
+        profile_frame.pack(fill=tk.X, pady=5)
+        self.profile_label = tk.Label(profile_frame, text=t("profile_label"), width=8, anchor='w')
+        self.profile_label.pack(side=tk.LEFT)
+        self.profile_var = tk.StringVar()
+        self.profile_combo = ttk.Combobox(
+            profile_frame,
+            textvariable=self.profile_var,
+            values=self.profile_manager.names(),
+            width=16
+        )
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        self.profile_combo.bind('<<ComboboxSelected>>', self.on_profile_selected)
+        self.save_profile_btn = tk.Button(
+            profile_frame,
+            text=t("btn_save_profile"),
+            command=self.save_profile,
+            font=("Arial", 9)
+        )
+        self.save_profile_btn.pack(side=tk.LEFT, padx=5)
+
+        # 字幕截图区域
+        region_frame = tk.Frame(self.config_frame)
+        region_frame.pack(fill=tk.X, pady=5)
+        self.region_label = tk.Label(region_frame, text=t("region_label"), width=8, anchor='w')
+        self.region_label.pack(side=tk.LEFT)
+        self.region_var = tk.StringVar()
+        region_entry = tk.Entry(region_frame, textvariable=self.region_var, width=18)
+        region_entry.pack(side=tk.LEFT, padx=5)
+        self.select_region_btn = tk.Button(
+            region_frame,
+            text=t("btn_select_region"),
+            command=self.select_region,
+            font=("Arial", 9)
+        )
+        self.select_region_btn.pack(side=tk.LEFT, padx=5)
+        self.full_screen_btn = tk.Button(
+            region_frame,
+            text=t("btn_full_screen"),
+            command=self.use_full_screen,
+            font=("Arial", 9)
+        )
+        self.full_screen_btn.pack(side=tk.LEFT)
+        self.apply_profile()
+
+        # 监视模式
+        self.watch_var = tk.BooleanVar(value=self.config.WATCH_MODE)
+        self.watch_check = tk.Checkbutton(
+            self.config_frame,
+            text=t("watch_mode"),
+            variable=self.watch_var,
+            command=self.toggle_watch_mode,
+            anchor='w'
+        )
+        self.watch_check.pack(fill=tk.X, pady=5)
+
         # 提示词编辑
         self.prompt_frame = tk.LabelFrame(
             self.config_frame,
@@ -644,6 +1281,8 @@ class GameSubtitleReaderApp:
 
         self.prompt_text = tk.Text(self.prompt_frame, height=4, wrap=tk.WORD, font=("Arial", 9))
         self.prompt_text.insert('1.0', self.config.PROMPT_TEMPLATE)
+        self.prompt_text.edit_modified(False)
+        self.prompt_text.bind('<<Modified>>', self.on_prompt_modified)
         self.prompt_text.pack(fill=tk.BOTH)
 
         # 按钮区域
@@ -661,6 +1300,7 @@ class GameSubtitleReaderApp:
             height=2
         )
         self.capture_btn_main.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=(0, 5))
+        self.capture_btn_main.config(state=tk.DISABLED)  # 后台组件就绪后启用
 
         # 悬浮模式按钮
         self.floating_btn = tk.Button(
@@ -694,6 +1334,20 @@ class GameSubtitleReaderApp:
         )
         self.result_text.pack(fill=tk.BOTH)
 
+        # 延迟统计（最近任务的 p50 / p95 / p99）
+        self.stats_frame = tk.LabelFrame(
+            self.root,
+            text=t("stats_title"),
+            font=("Arial", 11, "bold"),
+            padx=5,
+            pady=5
+        )
+        self.stats_frame.pack(padx=15, pady=(0, 10), fill=tk.X)
+
+        self.stats_label = tk.Label(self.stats_frame, justify=tk.LEFT, anchor='w', font=("Consolas", 9))
+        self.stats_label.pack(fill=tk.X)
+        self.update_stats_display()
+
         # 保存按钮
         self.save_btn = tk.Button(
             self.root,
@@ -724,6 +1378,9 @@ class GameSubtitleReaderApp:
         )
         self.log_text.pack(fill=tk.BOTH, expand=True)
 
+        # 工作线程的日志和状态更新由主线程按固定帧率批量应用
+        self.ui = UiSink(self.root, self.append_log_lines, self.config.UI_REFRESH_MS)
+
         # 控制按钮
         button_frame = tk.Frame(self.root)
         button_frame.pack(pady=10)
@@ -745,18 +1402,21 @@ class GameSubtitleReaderApp:
         self.log(t("log_api_model"))
         self.log(f"{t('log_voice')} {self.config.VOICE}")
         self.log(f"{t('log_hotkey')} {self.config.SCREENSHOT_HOTKEY}")
+        self.log(t("log_profile_loaded", self.profile_manager.active_name,
+                   self.describe_region(self.profile_manager.active.region)))
         self.log(t("log_hint"))
         self.log("=" * 50)
 
-        # 自动启用快捷键
-        self.setup_hotkey()
+        # 音频设备和 API 客户端在后台创建，窗口先显示出来
+        self.update_status(t("status_starting"))
+        threading.Thread(target=self.init_components, daemon=True).start()
 
     # ============ 事件处理 ============
 
     def on_manual_trigger(self):
         """手动触发按钮"""
         self.log(t("log_manual_trigger"))
-        threading.Thread(target=self.process_screenshot, daemon=True).start()
+        self.process_screenshot("button")
 
     def toggle_language(self):
         """切换语言"""
@@ -788,6 +1448,8 @@ class GameSubtitleReaderApp:
             self.status_label.config(text=t("status_waiting"))
         elif "错误" in status_text or "Error" in status_text:
             self.status_label.config(text=t("status_error"))
+        elif "启动" in status_text or "Starting" in status_text:
+            self.status_label.config(text=t("status_starting"))
 
         # 更新语言按钮
         self.language_btn.config(text=t("btn_language"))
@@ -795,6 +1457,13 @@ class GameSubtitleReaderApp:
         # 更新配置区
         self.config_frame.config(text=t("config_settings"))
         self.voice_label.config(text=t("voice"))
+        self.speed_label.config(text=t("speed_label"))
+        self.profile_label.config(text=t("profile_label"))
+        self.region_label.config(text=t("region_label"))
+        self.save_profile_btn.config(text=t("btn_save_profile"))
+        self.select_region_btn.config(text=t("btn_select_region"))
+        self.full_screen_btn.config(text=t("btn_full_screen"))
+        self.watch_check.config(text=t("watch_mode"))
         self.prompt_frame.config(text=t("prompt_label"))
 
         # 更新按钮
@@ -805,6 +1474,8 @@ class GameSubtitleReaderApp:
 
         # 更新结果和日志区
         self.result_frame.config(text=t("result_title"))
+        self.stats_frame.config(text=t("stats_title"))
+        self.update_stats_display()
         self.log_frame.config(text=t("log_title"))
 
         # 更新悬浮窗口（如果存在）
@@ -814,17 +1485,40 @@ class GameSubtitleReaderApp:
     def on_exit(self):
         """退出按钮"""
         try:
-            # 停止快捷键
+            # 停止快捷键和监视模式
             self.stop_hotkey()
+            if self.watcher:
+                self.watcher.stop()
 
             # 关闭悬浮窗口
             if self.floating_window:
                 self.floating_window.close()
 
+            # 停止处理流水线
+            self.cancel_processing()
+            self.pipeline.stop()
+
             # 关闭音频播放器
-            self.audio_player.shutdown()
+            if self.audio_player:
+                self.audio_player.shutdown()
+            if self.streaming_player:
+                self.streaming_player.shutdown()
+
+            # 释放截图引擎
+            if self.screenshot_handler:
+                self.screenshot_handler.close()
+
+            # 关闭 API 连接
+            if self.api_handler:
+                self.api_handler.close()
+
+            # 关闭响应缓存
+            if self.response_cache:
+                self.response_cache.close()
 
             self.log(t("log_exiting"))
+            self.ui.stop()
+            self.console.close()
             self.root.quit()
             self.root.destroy()
         except Exception as e:
@@ -833,12 +1527,23 @@ class GameSubtitleReaderApp:
 
     # ============ 辅助方法 ============
 
+    def post_ui(self, key: str, func, *args, **kwargs):
+        """提交界面更新：创建界面后交给主线程批量应用，之前直接调用"""
+        if self.ui:
+            self.ui.post(key, func, *args, **kwargs)
+        else:
+            func(*args, **kwargs)
+
     def update_status(self, status: str):
-        """更新状态显示"""
+        """更新状态显示（任意线程）"""
+        self.post_ui("status", self.apply_status, status)
+
+    def apply_status(self, status: str):
+        """更新状态显示（主线程）"""
         if self.status_label:
             self.status_label.config(text=status)
             # 根据状态内容判断颜色
-            if "Processing" in status or "处理" in status:
+            if "Processing" in status or "处理" in status or "Starting" in status or "启动" in status:
                 self.status_label.config(fg="orange")
             elif "Error" in status or "错误" in status:
                 self.status_label.config(fg="red")
@@ -846,20 +1551,23 @@ class GameSubtitleReaderApp:
                 self.status_label.config(fg="green")
 
     def log(self, message: str):
-        """添加日志"""
-        if self.log_text:
-            self.log_text.config(state=tk.NORMAL)
-            timestamp = time.strftime("%H:%M:%S")
-            self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.log_text.see(tk.END)
-            self.log_text.config(state=tk.DISABLED)
-
-        # 输出到控制台
-        try:
-            print(f"[{time.strftime('%H:%M:%S')}] {message}")
-        except UnicodeEncodeError:
-            safe_message = message.encode('ascii', 'replace').decode('ascii')
-            print(f"[{time.strftime('%H:%M:%S')}] {safe_message}")
+        """添加日志（任意线程）：放入界面更新队列，并交给后台线程输出到控制台"""
+        line = f"[{time.strftime('%H:%M:%S')}] {message}"
+        if self.ui:
+            self.ui.post_log(line)
+        self.console.write(line)
+
+    def append_log_lines(self, lines: list):
+        """一次插入一批日志行，只保留最近 LOG_MAX_LINES 行（主线程）"""
+        if not self.log_text:
+            return
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.config.LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f"{excess + 1}.0")
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
 
     # ============ 运行 ============
 
@@ -867,6 +1575,7 @@ class GameSubtitleReaderApp:
         """启动应用"""
         self.create_gui()
         self.root.protocol("WM_DELETE_WINDOW", self.on_exit)
+        self.root.after_idle(self.on_first_paint)
         self.root.mainloop()
 
 
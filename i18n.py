@@ -21,12 +21,18 @@ class I18n:
             "status_ready": "就绪",
             "status_processing": "处理中...",
             "status_error": "错误",
+            "status_starting": "启动中...",
             "status_waiting": "等待中",
 
             # 配置区
             "config_settings": "配置设置",
             "voice": "语音:",
+            "speed_label": "语速:",
             "prompt_label": "提示词",
+            "profile_label": "游戏:",
+            "region_label": "区域:",
+            "region_hint": "拖动鼠标框选字幕区域，按 Esc 取消",
+            "region_full_screen": "全屏",
 
             # 按钮
             "btn_capture": "📸 截图并朗读",
@@ -35,12 +41,22 @@ class I18n:
             "btn_exit": "❌ 退出",
             "btn_show_main": "📱 显示主窗口",
             "btn_language": "🌐 Language",
+            "btn_save_profile": "💾 保存档案",
+            "btn_select_region": "🔲 框选",
+            "btn_full_screen": "🖥 全屏",
+            "watch_mode": "监视模式：字幕变化后自动朗读",
 
             # 悬浮窗
             "floating_capture": "📸\n截图",
 
             # 结果区
             "result_title": "📝 识别结果",
+            "stats_title": "⏱ 延迟统计（p50 / p95 / p99）",
+            "stats_first_text": "首字",
+            "stats_first_sound": "首音",
+            "stats_capture": "截图",
+            "stats_total": "总计",
+            "stats_scheduler": "调度: 最大在途 {}, 平均等待 {:.0f} ms, 抢占 {}, 合并 {}",
             "log_title": "📋 日志输出",
 
             # 日志消息
@@ -64,6 +80,15 @@ class I18n:
             "log_no_text": "⚠️ 未识别到文本内容",
             "log_playing": "播放语音...",
             "log_play_done": "播放完成！",
+            "log_first_sound": "🔊 开始播放（首音延迟 {:.0f} ms）",
+            "log_incremental_speech": "⏭️ 跳过开头已朗读的 {} 句，只朗读新增内容",
+            "log_speech_cache_stats": "🗂️ 语音缓存: 命中 {} 句, 未命中 {} 句",
+            "log_player_stats": "⚠️ 播放欠载 {} 次（设备输出延迟 {:.0f} ms）",
+            "log_startup_timing": "🚀 启动完成: 首次绘制 {:.0f} ms, 就绪 {:.0f} ms（音频设备 {:.0f} ms, API 客户端 {:.0f} ms, 截图与缓存 {:.0f} ms）",
+            "log_startup_imports": "📦 最慢的模块导入: {}",
+            "log_startup_export_failed": "⚠️ 无法写入启动耗时记录: {}",
+            "log_startup_failed": "❌ 初始化失败: {}",
+            "log_not_ready": "⏳ 仍在启动中，请稍候...",
             "log_no_audio_play": "⚠️ 无音频数据可播放",
             "log_error": "错误: {}",
             "log_manual_trigger": "手动触发截图...",
@@ -76,9 +101,33 @@ class I18n:
             "log_save_success": "✅ 保存成功！",
             "log_save_failed": "保存失败: {}",
             "log_api_failed": "API 请求失败: {}",
+            "log_request_cancelled": "请求已取消",
+            "log_job_cancelled": "任务 #{} 已取消",
+            "log_job_started": "任务 #{}（{}）开始，触发到开始 {:.0f} ms",
+            "log_trigger_coalesced": "按键过快，已与上一次触发合并",
+            "log_preempted": "⏭ 新截图抢占在途任务（累计抢占 {} 次，取消任务 {} 个，合并按键 {} 次）",
+            "log_warmup_done": "API 连接已预热（{:.0f} ms）",
+            "log_warmup_failed": "API 连接预热失败: {}",
+            "log_keepalive_failed": "连接心跳失败: {}",
+            "log_connection_stats": "连接统计: 请求 {} 次，新建连接 {} 次，复用 {} 次（{}）",
+            "log_request_retry": "第 {} 次请求失败: {}，{:.0f}ms 后重试",
+            "log_hedge_sent": "{:.0f}ms 未收到响应，已发出对冲请求",
+            "log_retry_stats": "容错统计: 重试 {} 次，超时 {} 次，对冲 {} 次（胜出 {} 次）",
+            "log_metrics_failed": "写入统计失败: {}",
+            "log_encoder_selected": "图像编码方案: {}",
+            "log_encoder_disabled": "编码方案 {} 近期识别失败较多，暂时停用",
+            "log_watch_enabled": "监视模式已开启",
+            "log_watch_disabled": "监视模式已关闭",
+            "log_watch_trigger": "检测到新字幕，自动朗读",
             "log_hotkey_failed": "设置快捷键失败: {}",
             "log_play_failed": "播放音频失败: {}",
             "log_language_changed": "语言已切换为: {}",
+            "log_profile_loaded": "游戏档案: {}（截图区域: {}）",
+            "log_profile_saved": "✅ 档案已保存: {}（截图区域: {}）",
+            "log_region_invalid": "区域格式错误: '{}'，应为 x,y,宽,高",
+            "log_dedup_hit": "画面未变化（差异 {} 位），重放上一次结果",
+            "log_cache_hit": "⚡ 命中响应缓存，跳过 API 请求",
+            "log_cache_failed": "写入响应缓存失败: {}",
 
             # 提示词
             "default_prompt": "请帮我提取画面中角色的对话内容，并以角色名说：对话内容的格式输出。\n如果画面中没有对话，请回复‘未检测到对话’。",
@@ -98,12 +147,18 @@ class I18n:
             "status_ready": "Ready",
             "status_processing": "Processing...",
             "status_error": "Error",
+            "status_starting": "Starting...",
             "status_waiting": "Waiting",
 
             # Configuration
             "config_settings": "Configuration Settings",
             "voice": "Voice:",
+            "speed_label": "Speed:",
             "prompt_label": "Prompt",
+            "profile_label": "Game:",
+            "region_label": "Region:",
+            "region_hint": "Drag to select the subtitle area, press Esc to cancel",
+            "region_full_screen": "full screen",
 
             # Buttons
             "btn_capture": "📸 Capture & Read",
@@ -112,12 +167,22 @@ class I18n:
             "btn_exit": "❌ Exit",
             "btn_show_main": "📱 Show Main Window",
             "btn_language": "🌐 语言",
+            "btn_save_profile": "💾 Save Profile",
+            "btn_select_region": "🔲 Select",
+            "btn_full_screen": "🖥 Full",
+            "watch_mode": "Watch mode: read automatically when subtitles change",
 
             # Floating window
             "floating_capture": "📸\nCapture",
 
             # Result area
             "result_title": "📝 Recognition Result",
+            "stats_title": "⏱ Latency (p50 / p95 / p99)",
+            "stats_first_text": "First text",
+            "stats_first_sound": "First sound",
+            "stats_capture": "Capture",
+            "stats_total": "Total",
+            "stats_scheduler": "Scheduler: max in flight {}, avg wait {:.0f} ms, preempted {}, merged {}",
             "log_title": "📋 Log Output",
 
             # Log messages
@@ -141,6 +206,15 @@ class I18n:
             "log_no_text": "⚠️ No text content recognized",
             "log_playing": "Playing audio...",
             "log_play_done": "Playback completed!",
+            "log_first_sound": "🔊 Playback started (time to first sound {:.0f} ms)",
+            "log_incremental_speech": "⏭️ Skipped {} already-read sentence(s), reading only the new text",
+            "log_speech_cache_stats": "🗂️ Speech cache: {} sentence(s) hit, {} missed",
+            "log_player_stats": "⚠️ Playback underruns: {} (device output latency {:.0f} ms)",
+            "log_startup_timing": "🚀 Startup complete: first paint {:.0f} ms, ready {:.0f} ms (audio device {:.0f} ms, API client {:.0f} ms, capture and cache {:.0f} ms)",
+            "log_startup_imports": "📦 Slowest module imports: {}",
+            "log_startup_export_failed": "⚠️ Could not write startup timing: {}",
+            "log_startup_failed": "❌ Initialisation failed: {}",
+            "log_not_ready": "⏳ Still starting up, please wait...",
             "log_no_audio_play": "⚠️ No audio data to play",
             "log_error": "Error: {}",
             "log_manual_trigger": "Manual trigger capture...",
@@ -153,9 +227,33 @@ class I18n:
             "log_save_success": "✅ Save successful!",
             "log_save_failed": "Save failed: {}",
             "log_api_failed": "API request failed: {}",
+            "log_request_cancelled": "Request cancelled",
+            "log_job_cancelled": "Job #{} cancelled",
+            "log_job_started": "Job #{} ({}) started, trigger to start {:.0f} ms",
+            "log_trigger_coalesced": "Presses too fast, merged with the previous trigger",
+            "log_preempted": "⏭ New capture preempted in-flight jobs (total preemptions {}, cancelled jobs {}, merged presses {})",
+            "log_warmup_done": "API connection warmed up ({:.0f} ms)",
+            "log_warmup_failed": "API connection warm-up failed: {}",
+            "log_keepalive_failed": "Connection keep-alive failed: {}",
+            "log_connection_stats": "Connections: {} requests, {} new connections, {} reused ({})",
+            "log_request_retry": "Attempt {} failed: {}, retrying in {:.0f}ms",
+            "log_hedge_sent": "No response after {:.0f}ms, hedged request sent",
+            "log_retry_stats": "Resilience: {} retries, {} timeouts, {} hedges ({} won)",
+            "log_metrics_failed": "Failed to write metrics: {}",
+            "log_encoder_selected": "Image encoding: {}",
+            "log_encoder_disabled": "Encoding {} failed recognition too often and is temporarily disabled",
+            "log_watch_enabled": "Watch mode enabled",
+            "log_watch_disabled": "Watch mode disabled",
+            "log_watch_trigger": "New subtitle detected, reading automatically",
             "log_hotkey_failed": "Failed to setup hotkey: {}",
             "log_play_failed": "Failed to play audio: {}",
             "log_language_changed": "Language changed to: {}",
+            "log_profile_loaded": "Game profile: {} (capture region: {})",
+            "log_profile_saved": "✅ Profile saved: {} (capture region: {})",
+            "log_region_invalid": "Invalid region '{}', expected x,y,width,height",
+            "log_dedup_hit": "Screen unchanged ({} bits differ), replaying previous result",
+            "log_cache_hit": "⚡ Response cache hit, skipping API request",
+            "log_cache_failed": "Failed to write response cache: {}",
 
             # Default prompt
             "default_prompt": "Please extract the dialogue content of the characters in the screen and output it in the format \"Character name says: dialogue content\".\nIf there is no dialogue in the screen, please reply \"No dialogue detected\".",
@@ -0,0 +1,222 @@
+"""
+自适应图像编码模块
+在一组从高保真到低开销排列的编码方案（缩放算法、灰度、JPEG/WebP 质量）中，
+根据实测的字节数、编码耗时和识别是否成功，为每个游戏档案选出满足字节预算的最佳方案
+"""
+import io
+import threading
+import time
+
+from PIL import Image, features
+
+from capture_engine import CaptureEngine
+
+
+class EncoderSettings:
+    """一种编码方案"""
+
+    def __init__(self, fmt="jpeg", quality=85, grayscale=False, fast_resize=False, optimize=False):
+        """初始化编码方案
+
+        Args:
+            fmt: "jpeg" 或 "webp"
+            quality: 压缩质量
+            grayscale: 是否转为灰度
+            fast_resize: 使用整数倍 reduce + 双线性缩放代替完整的 LANCZOS 缩放
+            optimize: JPEG 是否进行额外的霍夫曼表优化（更小但更慢）
+        """
+        self.fmt = fmt
+        self.quality = quality
+        self.grayscale = grayscale
+        self.fast_resize = fast_resize
+        self.optimize = optimize
+
+    @property
+    def key(self) -> str:
+        """方案标识，用于统计和档案缓存"""
+        return "-".join([
+            self.fmt,
+            f"q{self.quality}",
+            "gray" if self.grayscale else "rgb",
+            "fast" if self.fast_resize else "lanczos",
+        ])
+
+    def __repr__(self):
+        return f"EncoderSettings({self.key})"
+
+
+def build_ladder(jpeg_quality=85, allow_webp=True) -> list:
+    """构建编码方案阶梯，按保真度从高到低排列
+
+    第一级与原有编码方式完全相同（LANCZOS + JPEG optimize）。
+    """
+    ladder = [
+        EncoderSettings("jpeg", jpeg_quality, optimize=True),
+        EncoderSettings("jpeg", 75, fast_resize=True),
+    ]
+    if allow_webp:
+        ladder.append(EncoderSettings("webp", 75, fast_resize=True))
+    ladder.append(EncoderSettings("jpeg", 70, grayscale=True, fast_resize=True))
+    if allow_webp:
+        ladder.append(EncoderSettings("webp", 60, grayscale=True, fast_resize=True))
+    ladder.append(EncoderSettings("jpeg", 55, grayscale=True, fast_resize=True))
+    return ladder
+
+
+def webp_available() -> bool:
+    """Pillow 是否支持 WebP 编码"""
+    return features.check("webp")
+
+
+def encode_frame(frame, settings: EncoderSettings, max_size=1280, timings=None) -> bytes:
+    """按编码方案将 RGB 帧缩放并编码
+
+    Args:
+        frame: RGB 帧
+        settings: 编码方案
+        max_size: 最长边上限，None 表示保持原始分辨率
+        timings: 可选字典，写入缩放耗时 resize_ms 和编码耗时 encode_ms
+    """
+    if settings.fmt == "jpeg" and not settings.grayscale and not settings.fast_resize:
+        # 基准方案沿用截图引擎的编码实现
+        return CaptureEngine.encode_jpeg(frame, max_size, settings.quality, timings, settings.optimize)
+
+    start = time.perf_counter()
+    img = CaptureEngine.frame_to_image(frame)
+    size = CaptureEngine.fit_size(img.size, max_size)
+    if size != img.size:
+        if settings.fast_resize:
+            # reducing_gap=1 时先按整数倍 reduce（盒式滤波）快速缩小，再做剩余比例的双线性缩放，
+            # 2 倍缩小时比完整的 LANCZOS 快一个数量级
+            img = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=1.0)
+        else:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+    if settings.grayscale:
+        img = img.convert('L')
+    resized = time.perf_counter()
+
+    img_bytes = io.BytesIO()
+    if settings.fmt == "webp":
+        img.save(img_bytes, format='WEBP', quality=settings.quality, method=0)
+    else:
+        img.save(img_bytes, format='JPEG', quality=settings.quality, optimize=settings.optimize)
+    if timings is not None:
+        timings["resize_ms"] = (resized - start) * 1000
+        timings["encode_ms"] = (time.perf_counter() - resized) * 1000
+    return img_bytes.getvalue()
+
+
+class AdaptiveEncoder:
+    """自适应编码方案选择器（线程安全）
+
+    每个游戏档案保存一份状态：各方案的平均字节数、平均编码耗时、识别成功率的滑动得分，
+    以及当前选中的方案。得分随每次识别结果衰减更新（成功记 1、失败记 0），
+    低于 min_score 的方案被停用，停用超过 reprobe_interval 秒后重新试用一次。
+    只考虑未停用的方案，按保真度从高到低：
+    1. 取第一个平均字节数不超过 byte_budget 且平均耗时不超过 latency_budget_ms 的方案，
+       途中遇到尚无统计的方案先试用一次
+    2. 没有同时满足两项预算的方案时，取第一个满足字节预算的方案
+    3. 仍没有时取平均字节数最小的方案
+    """
+
+    EMA_ALPHA = 0.3  # 滑动平均系数
+
+    def __init__(self, ladder: list, byte_budget: int, latency_budget_ms: float,
+                 min_score=0.4, reprobe_interval=30 * 60):
+        """初始化选择器
+
+        Args:
+            ladder: 编码方案阶梯（build_ladder 的返回值）
+            byte_budget: 单张图像的目标字节数上限
+            latency_budget_ms: 缩放加编码的目标耗时上限（毫秒）
+            min_score: 识别得分低于该值的方案被停用（从 1 开始，连续失败 3 次后低于默认值）
+            reprobe_interval: 停用的方案过多少秒后重新试用
+        """
+        self.ladder = ladder
+        self.byte_budget = byte_budget
+        self.latency_budget_ms = latency_budget_ms
+        self.min_score = min_score
+        self.reprobe_interval = reprobe_interval
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _new_stats(size=0, elapsed_ms=0.0) -> dict:
+        return {"bytes": size, "ms": elapsed_ms, "score": 1.0}
+
+    def _migrate(self, stats: dict):
+        """把旧版档案的成功/失败次数换算为得分；旧版已停用的方案立即重新试用"""
+        if "score" in stats:
+            return
+        ok, fail = stats.pop("ok", 0), stats.pop("fail", 0)
+        stats["score"] = ok / (ok + fail) if ok + fail else 1.0
+        if stats["score"] < self.min_score:
+            stats["disabled_at"] = 0.0
+
+    def _usable(self, stats, now: float) -> bool:
+        """方案的识别效果是否可接受；停用已久的方案恢复为刚好可用，再失败一次即重新停用"""
+        if not stats:
+            return True
+        self._migrate(stats)
+        if stats["score"] >= self.min_score:
+            return True
+        if now - stats.get("disabled_at", 0.0) >= self.reprobe_interval:
+            stats["score"] = self.min_score
+            stats.pop("disabled_at", None)
+            return True
+        return False
+
+    def choose(self, state: dict) -> EncoderSettings:
+        """为档案选择编码方案
+
+        Args:
+            state: 档案的编码状态（会被就地更新 choice 字段）
+        """
+        with self.lock:
+            all_stats = state.setdefault("stats", {})
+            now = time.time()
+            candidates = [s for s in self.ladder if self._usable(all_stats.get(s.key), now)]
+            chosen = None
+            for settings in candidates:
+                stats = all_stats.get(settings.key)
+                if stats is None or (stats["bytes"] <= self.byte_budget
+                                     and stats["ms"] <= self.latency_budget_ms):
+                    chosen = settings  # 尚无统计的方案先试用
+                    break
+
+            if chosen is None:
+                within_budget = [s for s in candidates if all_stats[s.key]["bytes"] <= self.byte_budget]
+                if within_budget:
+                    chosen = within_budget[0]
+                elif candidates:
+                    chosen = min(candidates, key=lambda s: all_stats[s.key]["bytes"])
+                else:
+                    chosen = self.ladder[0]
+
+            state["choice"] = chosen.key
+            return chosen
+
+    def record_encode(self, state: dict, settings: EncoderSettings, size: int, elapsed_ms: float):
+        """记录一次编码的字节数和耗时"""
+        with self.lock:
+            stats = state.setdefault("stats", {}).get(settings.key)
+            if stats is None:
+                state["stats"][settings.key] = self._new_stats(size, elapsed_ms)
+                return
+            stats["bytes"] += self.EMA_ALPHA * (size - stats["bytes"])
+            stats["ms"] += self.EMA_ALPHA * (elapsed_ms - stats["ms"])
+
+    def record_result(self, state: dict, settings: EncoderSettings, success: bool) -> bool:
+        """记录一次识别结果（只应在画面确实有文字或识别出了文字时调用）
+
+        Returns:
+            该方案是否因此变为不可用（调用方可据此保存档案）
+        """
+        with self.lock:
+            stats = state.setdefault("stats", {}).setdefault(settings.key, self._new_stats())
+            self._migrate(stats)
+            was_usable = stats["score"] >= self.min_score
+            stats["score"] += self.EMA_ALPHA * ((1.0 if success else 0.0) - stats["score"])
+            if was_usable and stats["score"] < self.min_score:
+                stats["disabled_at"] = time.time()
+                return True
+            return False
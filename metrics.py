@@ -0,0 +1,127 @@
+"""
+性能统计模块
+每次流水线任务生成一条结构化记录（各阶段耗时、首字/首音延迟、用量和字节数），
+在滚动窗口中计算 p50/p95/p99，并以 JSONL 追加导出
+"""
+import collections
+import json
+import os
+import threading
+import time
+
+
+# 记录字段（毫秒字段以 _ms 结尾）
+RECORD_FIELDS = (
+    "job_id", "source", "timestamp", "outcome", "result_source", "encoder",
+    "queue_ms", "capture_ms", "frame_age_ms", "hash_ms", "preprocess_ms", "resize_ms", "encode_ms", "base64_ms",
+    "first_text_ms", "first_audio_ms", "first_sound_ms", "stream_ms", "playback_ms", "total_ms",
+    "input_tokens", "output_tokens", "audio_tokens",
+    "upload_bytes", "audio_bytes_received",
+)
+
+
+def percentile(values, percent: float):
+    """最近秩百分位数；values 为空时返回 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_usage(usage: dict):
+    """从用量事件中提取 (输入 token, 输出 token, 音频 token)
+
+    兼容 OpenAI 兼容模式（prompt_tokens/completion_tokens）和实时接口（input_tokens/output_tokens）。
+    """
+    input_tokens = usage.get("prompt_tokens", usage.get("input_tokens")) or 0
+    output_tokens = usage.get("completion_tokens", usage.get("output_tokens")) or 0
+    details = usage.get("completion_tokens_details") or usage.get("output_tokens_details") or {}
+    audio_tokens = details.get("audio_tokens") or 0
+    return input_tokens, output_tokens, audio_tokens
+
+
+class RunRecord:
+    """一次流水线任务的统计记录，未测量的字段为 None"""
+
+    def __init__(self, job_id: int, source: str):
+        for field in RECORD_FIELDS:
+            setattr(self, field, None)
+        self.job_id = job_id
+        self.source = source
+        self.timestamp = time.time()
+
+    def update(self, values: dict):
+        """批量设置字段"""
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    def add_usage(self, usage: dict):
+        """累加一次用量事件（逐句合成时一次任务会有多个用量事件）"""
+        input_tokens, output_tokens, audio_tokens = parse_usage(usage)
+        self.input_tokens = (self.input_tokens or 0) + input_tokens
+        self.output_tokens = (self.output_tokens or 0) + output_tokens
+        self.audio_tokens = (self.audio_tokens or 0) + audio_tokens
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典（毫秒字段保留一位小数）"""
+        result = {}
+        for field in RECORD_FIELDS:
+            value = getattr(self, field)
+            if field.endswith("_ms") and value is not None:
+                value = round(value, 1)
+            result[field] = value
+        return result
+
+
+class MetricsRecorder:
+    """统计记录器 - 保留最近 window 条记录并追加导出到 JSONL 文件（线程安全）"""
+
+    def __init__(self, window=200, export_path=None):
+        """初始化统计记录器
+
+        Args:
+            window: 滚动窗口大小
+            export_path: JSONL 导出文件路径，None 表示不导出
+        """
+        self.records = collections.deque(maxlen=window)
+        self.export_path = export_path
+        self.lock = threading.Lock()
+        if export_path:
+            directory = os.path.dirname(export_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def add(self, record: RunRecord):
+        """添加一条记录"""
+        data = record.to_dict()
+        with self.lock:
+            self.records.append(data)
+            if self.export_path:
+                with open(self.export_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+    def summary(self, fields, outcome="done") -> dict:
+        """计算窗口内指定字段的百分位数
+
+        Args:
+            fields: 字段名列表
+            outcome: 只统计该结果的任务，None 表示全部
+
+        Returns:
+            {字段: (p50, p95, p99) 或 None}
+        """
+        with self.lock:
+            records = [r for r in self.records if outcome is None or r["outcome"] == outcome]
+        result = {}
+        for field in fields:
+            values = [r[field] for r in records if r[field] is not None]
+            if values:
+                result[field] = tuple(percentile(values, p) for p in (50, 95, 99))
+            else:
+                result[field] = None
+        return result
+
+    def __len__(self):
+        with self.lock:
+            return len(self.records)
@@ -0,0 +1,94 @@
+"""
+PCM 环形缓冲模块
+预分配的 int16 环形缓冲，写入方（解码/播放线程）与读取方（声卡回调）之间
+只拷贝样本，不分配内存；满时写入方可等待，读取方从不阻塞
+"""
+import threading
+
+import numpy as np
+
+
+class PcmRingBuffer:
+    """单声道 int16 环形缓冲（线程安全）"""
+
+    def __init__(self, capacity: int):
+        """初始化缓冲
+
+        Args:
+            capacity: 最多缓存的样本数
+        """
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=np.int16)
+        self.read_pos = 0
+        self.count = 0  # 当前缓存的样本数
+        self.generation = 0  # 每次 clear() 加一，用于让等待中的写入方放弃旧数据
+        self.cond = threading.Condition()
+
+    def __len__(self):
+        with self.cond:
+            return self.count
+
+    def write(self, data: np.ndarray, block=True, cancel_event=None, generation=None) -> int:
+        """写入样本
+
+        Args:
+            data: int16 样本数组（可以是其他缓冲区的视图，只在这里拷贝一次）
+            block: 缓冲已满时是否等待读取方腾出空间
+            cancel_event: 可选 threading.Event，被设置时停止等待
+            generation: 可选，数据所属的 generation；此后缓冲被清空过时直接丢弃
+
+        Returns:
+            实际写入的样本数（被取消、清空或非阻塞且缓冲已满时少于 len(data)）
+        """
+        written = 0
+        with self.cond:
+            if generation is None:
+                generation = self.generation
+            elif generation != self.generation:
+                return 0
+            while written < len(data):
+                free = self.capacity - self.count
+                if free == 0:
+                    if not block:
+                        break
+                    # 只有需要检查 cancel_event 时才定时醒来，否则等读取方或 clear() 唤醒
+                    self.cond.wait(0.1 if cancel_event is not None else None)
+                    if self.generation != generation or (cancel_event is not None and cancel_event.is_set()):
+                        break
+                    continue
+
+                n = min(free, len(data) - written)
+                start = (self.read_pos + self.count) % self.capacity
+                first = min(n, self.capacity - start)
+                self.samples[start:start + first] = data[written:written + first]
+                self.samples[:n - first] = data[written + first:written + n]
+                self.count += n
+                written += n
+                self.cond.notify_all()
+        return written
+
+    def read_into(self, out: np.ndarray) -> int:
+        """读取样本填满 out（不阻塞），不足部分填零
+
+        Returns:
+            实际读到的样本数
+        """
+        with self.cond:
+            n = min(len(out), self.count)
+            first = min(n, self.capacity - self.read_pos)
+            out[:first] = self.samples[self.read_pos:self.read_pos + first]
+            out[first:n] = self.samples[:n - first]
+            self.read_pos = (self.read_pos + n) % self.capacity
+            self.count -= n
+            if n:
+                self.cond.notify_all()
+        out[n:] = 0
+        return n
+
+    def clear(self):
+        """丢弃所有缓存的样本，并唤醒等待中的写入方"""
+        with self.cond:
+            self.read_pos = 0
+            self.count = 0
+            self.generation += 1
+            self.cond.notify_all()
@@ -0,0 +1,240 @@
+"""
+分阶段处理流水线模块
+在后台线程中运行 asyncio 事件循环，各阶段之间用有界队列连接，
+使下一次截图/编码、网络流式接收和音频播放可以并行进行
+"""
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CancelEvent(threading.Event):
+    """取消事件：除了 threading.Event 的接口，还可以注册在 set() 时调用的回调
+
+    回调在调用 set() 的线程中执行（例如流水线事件循环线程），只应做不阻塞的操作，
+    如唤醒等待中的线程、关闭网络连接。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks = []
+        self._callbacks_lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """注册回调；已经被设置时立即调用"""
+        with self._callbacks_lock:
+            if not self.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        """移除回调"""
+        with self._callbacks_lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def set(self):
+        with self._callbacks_lock:
+            if self.is_set():
+                return
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # 回调失败不影响取消本身
+
+
+class PipelineJob:
+    """流水线中的一个任务，各阶段通过属性传递数据"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, source: str, **attrs):
+        """初始化任务
+
+        Args:
+            source: 触发来源（如 "hotkey"、"button"）
+            **attrs: 任务初始数据
+        """
+        self.id = next(self._ids)
+        self.source = source
+        self.created_time = time.perf_counter()
+        self.start_time = None  # 第一个阶段开始执行的时间
+        self.cancel_event = CancelEvent()
+        self.error = None
+        self.__dict__.update(attrs)
+
+    def cancel(self):
+        """请求取消任务：各阶段在检查点响应，注册在 cancel_event 上的回调立即中止网络请求"""
+        self.cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """任务是否已被取消"""
+        return self.cancel_event.is_set()
+
+
+class StagedPipeline:
+    """分阶段流水线
+
+    每个阶段是一个阻塞函数 fn(job)，在该阶段专用的线程中执行；
+    阶段之间用容量为 queue_size 的 asyncio.Queue 连接，下游繁忙时上游自然等待。
+    取消是协作式的：cancel_all() 标记所有在途任务，阶段函数在检查点中止，
+    已取消的任务不会再进入后续阶段。
+    """
+
+    def __init__(self, stages, queue_size=1, on_done=None, on_error=None, on_cancelled=None):
+        """初始化流水线
+
+        Args:
+            stages: [(阶段名, fn(job)), ...]
+            queue_size: 每个阶段输入队列的容量
+            on_done: 任务完成最后一个阶段时回调 on_done(job)
+            on_error: 阶段抛出异常时回调 on_error(job, stage_name, exc)
+            on_cancelled: 任务被取消时回调 on_cancelled(job)
+
+        回调都在单独的回调线程中按顺序执行。
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancelled = on_cancelled
+
+        self.loop = None
+        self.queues = []
+        self.tasks = []
+        self.jobs = set()  # 在途任务（只在事件循环线程中修改）
+        self.thread = None
+        self._ready = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(stages), thread_name_prefix="pipeline"
+        )
+        # 回调可能会等待 GUI 线程（例如写日志），放到单独线程中按顺序执行，
+        # 避免事件循环被阻塞，也避免 GUI 线程在 submit() 中等待事件循环时互相等待
+        self._callback_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pipeline-callback"
+        )
+
+    # ============ 生命周期 ============
+
+    def start(self):
+        """在后台线程中启动事件循环和各阶段 worker"""
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        """事件循环线程入口"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        for index, (name, fn) in enumerate(self.stages):
+            outbox = self.queues[index + 1] if index + 1 < len(self.stages) else None
+            self.tasks.append(self.loop.create_task(self._worker(name, fn, self.queues[index], outbox)))
+        self._ready.set()
+        self.loop.run_forever()
+
+        # 事件循环停止后清理 worker
+        for task in self.tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*self.tasks, return_exceptions=True))
+        self.loop.close()
+
+    def stop(self):
+        """取消所有任务并停止流水线"""
+        if not self.loop or self.loop.is_closed():
+            return
+        self.cancel_all()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+        self._executor.shutdown(wait=False)
+        self._callback_executor.shutdown(wait=False)
+
+    # ============ 任务提交与取消 ============
+
+    def submit(self, job: PipelineJob, preempt=False) -> bool:
+        """提交任务（线程安全）
+
+        Args:
+            job: 任务
+            preempt: 为 True 时先取消所有在途任务并清空第一阶段队列，
+                     保证新任务一定能入队（返回前取消已生效）
+
+        Returns:
+            True 表示已入队；第一阶段队列已满时返回 False
+        """
+        future = asyncio.run_coroutine_threadsafe(self._submit(job, preempt), self.loop)
+        return future.result()
+
+    async def _submit(self, job: PipelineJob, preempt: bool) -> bool:
+        if preempt:
+            for pending_job in self.jobs:
+                pending_job.cancel()
+            # 尚未开始的任务直接移出队列
+            while not self.queues[0].empty():
+                dropped = self.queues[0].get_nowait()
+                self.queues[0].task_done()
+                self._finish(dropped)
+                self._notify(self.on_cancelled, dropped)
+
+        if self.queues[0].full():
+            return False
+        self.jobs.add(job)
+        self.queues[0].put_nowait(job)
+        return True
+
+    def cancel_all(self):
+        """取消所有在途任务（线程安全）"""
+        def cancel():
+            for job in self.jobs:
+                job.cancel()
+        self.loop.call_soon_threadsafe(cancel)
+
+    @property
+    def pending(self) -> int:
+        """在途任务数"""
+        return len(self.jobs)
+
+    # ============ worker ============
+
+    async def _worker(self, name, fn, inbox: asyncio.Queue, outbox):
+        """单个阶段的 worker：取任务 → 在阶段线程中执行 → 交给下一阶段"""
+        while True:
+            job = await inbox.get()
+            try:
+                if not job.is_cancelled:
+                    if job.start_time is None:
+                        job.start_time = time.perf_counter()
+                    await self.loop.run_in_executor(self._executor, fn, job)
+            except Exception as e:
+                if not job.is_cancelled:
+                    job.error = e
+                    self._finish(job)
+                    self._notify(self.on_error, job, name, e)
+                    continue
+            finally:
+                inbox.task_done()
+
+            if job.is_cancelled:
+                self._finish(job)
+                self._notify(self.on_cancelled, job)
+            elif outbox is not None:
+                await outbox.put(job)  # 下游繁忙时在此等待（背压）
+            else:
+                self._finish(job)
+                self._notify(self.on_done, job)
+
+    def _finish(self, job: PipelineJob):
+        """任务离开流水线"""
+        self.jobs.discard(job)
+
+    def _notify(self, callback, *args):
+        """在回调线程中执行回调（不等待结果）"""
+        if callback:
+            self._callback_executor.submit(callback, *args)
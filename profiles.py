@@ -0,0 +1,151 @@
+"""
+游戏配置档案模块
+按游戏保存字幕截图区域等设置，启动时自动加载上次使用的档案
+"""
+import json
+import os
+import threading
+
+
+DEFAULT_PROFILE_NAME = "default"
+
+
+def parse_region(text: str):
+    """解析 "x,y,w,h" 格式的区域字符串
+
+    Args:
+        text: 区域字符串，为空时表示全屏
+
+    Returns:
+        mss 区域字典，或 None 表示全屏
+
+    Raises:
+        ValueError: 格式错误或宽高不为正数
+    """
+    text = text.strip()
+    if not text:
+        return None
+
+    parts = [p.strip() for p in text.replace('，', ',').split(',')]
+    if len(parts) != 4:
+        raise ValueError(f"invalid region: {text}")
+
+    left, top, width, height = (int(p) for p in parts)
+    return make_region(left, top, width, height)
+
+
+def make_region(left, top, width, height):
+    """构建 mss 区域字典
+
+    Raises:
+        ValueError: 宽高不为正数
+    """
+    if width <= 0 or height <= 0:
+        raise ValueError(f"invalid region size: {width}x{height}")
+    return {"left": int(left), "top": int(top), "width": int(width), "height": int(height)}
+
+
+def format_region(region) -> str:
+    """将区域字典格式化为 "x,y,w,h" 字符串，全屏返回空字符串"""
+    if not region:
+        return ""
+    return f"{region['left']},{region['top']},{region['width']},{region['height']}"
+
+
+class GameProfile:
+    """单个游戏的配置档案"""
+
+    def __init__(self, name: str, region=None, encoder=None):
+        """初始化档案
+
+        Args:
+            name: 档案名称（通常是游戏名）
+            region: 字幕截图区域，None 表示整个主显示器
+            encoder: 自适应编码器为该游戏记录的状态（选中的方案和各方案统计）
+        """
+        self.name = name
+        self.region = region
+        self.encoder = encoder if encoder is not None else {}
+
+    def to_dict(self) -> dict:
+        """序列化为字典"""
+        return {"region": self.region, "encoder": self.encoder}
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> "GameProfile":
+        """从字典反序列化"""
+        region = data.get("region")
+        if region:
+            region = make_region(region["left"], region["top"], region["width"], region["height"])
+        return cls(name, region, data.get("encoder"))
+
+
+class ProfileManager:
+    """档案管理器 - 负责档案的加载、保存和切换"""
+
+    def __init__(self, path: str):
+        """初始化档案管理器
+
+        Args:
+            path: 档案 JSON 文件路径
+        """
+        self.path = path
+        self.profiles = {}
+        self.active_name = DEFAULT_PROFILE_NAME
+        self.lock = threading.Lock()  # 界面和流水线线程都可能保存档案
+        self.load()
+
+    def load(self):
+        """从磁盘加载档案，文件不存在或损坏时使用默认档案"""
+        self.profiles = {}
+        self.active_name = DEFAULT_PROFILE_NAME
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for name, profile_data in data.get("profiles", {}).items():
+                    self.profiles[name] = GameProfile.from_dict(name, profile_data)
+                self.active_name = data.get("active", DEFAULT_PROFILE_NAME)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"[Profiles] 加载档案失败，使用默认档案: {e}")
+                self.profiles = {}
+
+        if DEFAULT_PROFILE_NAME not in self.profiles:
+            self.profiles[DEFAULT_PROFILE_NAME] = GameProfile(DEFAULT_PROFILE_NAME)
+        if self.active_name not in self.profiles:
+            self.active_name = DEFAULT_PROFILE_NAME
+
+    def save(self):
+        """保存档案到磁盘（先写临时文件再替换，避免写坏）"""
+        with self.lock:
+            data = {
+                "active": self.active_name,
+                "profiles": {name: p.to_dict() for name, p in self.profiles.items()},
+            }
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def names(self) -> list:
+        """获取所有档案名称"""
+        return list(self.profiles.keys())
+
+    @property
+    def active(self) -> GameProfile:
+        """当前激活的档案"""
+        return self.profiles[self.active_name]
+
+    def set_active(self, name: str) -> GameProfile:
+        """切换当前档案，不存在时自动创建"""
+        if name not in self.profiles:
+            self.profiles[name] = GameProfile(name)
+        self.active_name = name
+        return self.active
+
+    def update_region(self, name: str, region) -> GameProfile:
+        """更新指定档案的截图区域并设为当前档案"""
+        profile = self.set_active(name)
+        profile.region = region
+        return profile
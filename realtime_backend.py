@@ -0,0 +1,241 @@
+"""
+实时 WebSocket 后端模块
+使用 qwen3-omni-flash-realtime 在多次截图之间保持同一个 WebSocket 会话，
+每次截图只发送输入事件，省去每次请求的连接建立开销
+"""
+import base64
+import queue
+import threading
+import time
+
+import dashscope
+from dashscope.audio.qwen_omni import (
+    AudioFormat,
+    MultiModality,
+    OmniRealtimeCallback,
+    OmniRealtimeConversation,
+)
+
+from backends import EVENT_AUDIO, EVENT_TEXT, EVENT_USAGE, EventStream, RequestCancelled
+
+
+# 实时接口要求在图像之前至少发送一次音频，这里发送 100ms 的 16kHz 静音
+SILENCE_B64 = base64.b64encode(b"\x00" * 3200).decode('ascii')
+
+# 响应流结束标记
+_END = object()
+
+
+class RealtimeError(Exception):
+    """实时会话返回错误或连接中断"""
+
+
+class _ConversationCallback(OmniRealtimeCallback):
+    """将 SDK 回调转发给后端"""
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def on_open(self) -> None:
+        pass
+
+    def on_close(self, close_status_code, close_msg) -> None:
+        self.backend.on_session_closed(self, close_status_code, close_msg)
+
+    def on_event(self, response) -> None:
+        self.backend.on_session_event(self, response)
+
+
+class RealtimeBackend:
+    """实时 WebSocket 后端
+
+    会话在首次请求时建立并在之后的截图中复用；会话被服务端关闭，
+    或对话轮数达到 REALTIME_MAX_TURNS（限制上下文增长）时自动重建。
+    同一时间只处理一个请求。
+    """
+
+    concurrent_requests = False  # 会话内请求串行执行，不能对冲
+
+    def __init__(self, config):
+        """初始化实时后端"""
+        # dashscope SDK 使用全局 API Key
+        dashscope.api_key = config.DASHSCOPE_API_KEY
+        self.config = config
+        self.model_name = config.MODEL
+        self.conversation = None
+        self.callback = None
+        self.session_voice = None
+        self.turns = 0
+        self.sessions_opened = 0
+        self.requests = 0
+        self.reused_requests = 0  # 使用已有会话（包括预热建立的会话）的请求数
+        self.keep_alives = 0  # 在已有会话上发送的心跳数
+        self.last_activity = time.perf_counter()
+
+        self._request_lock = threading.Lock()
+        self._events = None  # 当前请求的事件队列
+
+    # ============ 会话管理 ============
+
+    def connect(self):
+        """建立（或重建）WebSocket 会话"""
+        self.close()
+        self.callback = _ConversationCallback(self)
+        self.conversation = OmniRealtimeConversation(
+            model=self.model_name,
+            callback=self.callback,
+            url=self.config.API_URL,
+        )
+        self.conversation.connect()
+        self.update_session()
+        self.turns = 0
+        self.sessions_opened += 1
+        self.last_activity = time.perf_counter()
+
+    def update_session(self):
+        """同步会话参数（语音、输出格式），关闭服务端语音活动检测以手动提交"""
+        self.conversation.update_session(
+            output_modalities=[MultiModality.TEXT, MultiModality.AUDIO],
+            voice=self.config.VOICE,
+            output_audio_format=getattr(AudioFormat, self.config.OUTPUT_AUDIO_FORMAT),
+            enable_turn_detection=False,
+        )
+        self.session_voice = self.config.VOICE
+
+    def ensure_session(self):
+        """确保会话可用"""
+        if self.conversation is None or self.turns >= self.config.REALTIME_MAX_TURNS:
+            self.connect()
+        elif self.session_voice != self.config.VOICE:
+            self.update_session()
+
+    def warm_up(self):
+        """预先建立会话，或在已有会话上发送心跳；请求进行中时跳过
+
+        心跳是不触发生成的 input_audio_buffer.clear 事件，避免空闲的 WebSocket 被服务端或 NAT 断开；
+        发送失败说明会话已经断开，立即重建，下一次截图不必再等待建立连接。
+        """
+        if not self._request_lock.acquire(blocking=False):
+            return
+        try:
+            opened = self.sessions_opened
+            self.ensure_session()
+            if self.sessions_opened == opened:
+                try:
+                    self.conversation.clear_appended_audio()
+                except Exception:
+                    self.connect()
+                else:
+                    self.keep_alives += 1
+            self.last_activity = time.perf_counter()
+        finally:
+            self._request_lock.release()
+
+    def describe_stats(self) -> dict:
+        """会话复用统计"""
+        return {
+            "requests": self.requests,
+            "new_connections": self.sessions_opened,
+            "reused": self.reused_requests,
+            "warm_ups": self.keep_alives,
+            "http_version": "WebSocket",
+        }
+
+    def on_session_closed(self, callback, close_status_code, close_msg):
+        """会话被关闭（SDK 线程中调用）"""
+        if callback is not self.callback:
+            return  # 已被替换的旧会话
+        self.conversation = None
+        self.callback = None
+        events = self._events
+        if events is not None:
+            events.put(RealtimeError(f"session closed: {close_status_code} {close_msg}"))
+
+    def on_session_event(self, callback, response: dict):
+        """处理服务端事件（SDK 线程中调用）"""
+        events = self._events
+        if events is None or callback is not self.callback:
+            return
+
+        event_type = response.get("type", "")
+        if event_type in ("response.audio_transcript.delta", "response.text.delta"):
+            events.put((EVENT_TEXT, response.get("delta", "")))
+        elif event_type == "response.audio.delta":
+            events.put((EVENT_AUDIO, response.get("delta", "")))
+        elif event_type == "response.done":
+            usage = response.get("response", {}).get("usage")
+            if usage:
+                events.put((EVENT_USAGE, usage))
+            events.put(_END)
+        elif event_type == "error":
+            message = response.get("error", {}).get("message", str(response))
+            events.put(RealtimeError(message))
+
+    # ============ 请求 ============
+
+    def stream(self, image_b64: str, prompt: str, spoken_text: str = "") -> EventStream:
+        """发送一帧图像并逐个产出响应事件，直到 response.done
+
+        文字和语音由同一个响应一起生成，忽略 spoken_text。
+
+        开始迭代时才发送请求，迭代结束（或被关闭）时释放会话；
+        abort() 让等待中的迭代立即抛出 RequestCancelled，并丢弃这个会话。
+        """
+        events = queue.Queue()
+        return EventStream(
+            self._stream(image_b64, prompt, events),
+            abort=lambda: events.put(RequestCancelled())
+        )
+
+    def _stream(self, image_b64: str, prompt: str, events: queue.Queue):
+        """stream() 的生成器实现，events 接收服务端事件和中止信号"""
+        with self._request_lock:
+            if not events.empty():
+                raise events.get()  # 开始之前已被中止
+            opened = self.sessions_opened
+            self.ensure_session()
+            reused = self.sessions_opened == opened
+            self._events = events
+            completed = False
+            try:
+                self.conversation.append_audio(SILENCE_B64)
+                self.conversation.append_video(image_b64)
+                self.conversation.commit()
+                self.conversation.create_response(instructions=prompt)
+                self.turns += 1
+                self.requests += 1
+                self.reused_requests += reused
+                self.last_activity = time.perf_counter()
+
+                # 与 ResilientBackend 使用相同的首包/块间超时，超时后尽快释放会话以便重试
+                timeout = self.config.FIRST_BYTE_TIMEOUT
+                while True:
+                    try:
+                        item = events.get(timeout=timeout)
+                    except queue.Empty:
+                        raise RealtimeError("response timed out")
+                    timeout = self.config.CHUNK_TIMEOUT
+
+                    if item is _END:
+                        completed = True
+                        return
+                    if isinstance(item, Exception):
+                        raise item
+                    self.last_activity = time.perf_counter()
+                    yield item
+            finally:
+                self._events = None
+                if not completed:
+                    # 响应未正常结束时服务端可能仍在发送旧事件，直接丢弃会话
+                    self.close()
+
+    def close(self):
+        """关闭 WebSocket 会话"""
+        conversation, self.conversation = self.conversation, None
+        self.callback = None
+        if conversation is not None:
+            try:
+                conversation.close()
+            except Exception:
+                pass
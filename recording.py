@@ -0,0 +1,205 @@
+"""
+录制与回放模块
+录制模式把每次请求收到的事件（文本、音频、用量）连同到达时间写入 JSONL 文件；
+回放后端按原始节奏（或加速）重新产出这些事件，无需网络即可复现和测量完整流程
+"""
+import glob
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+
+RECORDING_VERSION = 1
+
+
+def image_digest(image_b64: str) -> str:
+    """图像内容摘要，用于在回放时匹配录制"""
+    return hashlib.sha256(image_b64.encode('ascii')).hexdigest()
+
+
+class RecordingBackend:
+    """录制后端
+
+    包装任意后端，事件原样转发，同时写入 recordings_dir/<时间>_<序号>.jsonl：
+    第一行是请求信息（{"type": "meta", ...}），之后每行一个事件
+    （{"t": 距发出请求的秒数, "kind": 事件类型, "data": 数据}）。
+    录制先写入 <名称>.jsonl.tmp，底层流正常结束后才改名为 .jsonl；
+    被取消、抢占或出错的请求只有不完整的响应，临时文件被删除，不会被回放。
+    """
+
+    def __init__(self, inner, recordings_dir: str):
+        """初始化录制后端
+
+        Args:
+            inner: 被包装的后端
+            recordings_dir: 录制文件目录
+        """
+        self.inner = inner
+        self.recordings_dir = recordings_dir
+        self._counter = itertools.count(1)
+        os.makedirs(recordings_dir, exist_ok=True)
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model_name
+
+    @property
+    def last_activity(self) -> float:
+        return self.inner.last_activity
+
+    @last_activity.setter
+    def last_activity(self, value: float):
+        self.inner.last_activity = value
+
+    def warm_up(self):
+        """预热底层连接"""
+        self.inner.warm_up()
+
+    def describe_stats(self) -> dict:
+        """底层后端统计"""
+        return self.inner.describe_stats()
+
+    def stream(self, image_b64: str, prompt: str, spoken_text: str = "", cancel_event=None):
+        """转发底层事件并写入录制文件（生成器），cancel_event 原样交给底层后端"""
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{next(self._counter):04d}.jsonl"
+        path = os.path.join(self.recordings_dir, name)
+        temp_path = path + ".tmp"
+        start = time.perf_counter()
+        complete = False
+
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                meta = {
+                    "type": "meta",
+                    "version": RECORDING_VERSION,
+                    "model": self.inner.model_name,
+                    "prompt": prompt,
+                    "image_sha256": image_digest(image_b64),
+                    "created": time.time(),
+                }
+                f.write(json.dumps(meta, ensure_ascii=False) + "\n")
+
+                for kind, data in self.inner.stream(image_b64, prompt, spoken_text, cancel_event=cancel_event):
+                    event = {"t": round(time.perf_counter() - start, 6), "kind": kind, "data": data}
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                    yield kind, data
+            os.replace(temp_path, path)
+            complete = True
+        finally:
+            if not complete:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def close(self):
+        """关闭底层后端"""
+        self.inner.close()
+
+
+class Recording:
+    """一个录制文件的内容"""
+
+    def __init__(self, path: str, meta: dict, events: list):
+        self.path = path
+        self.meta = meta
+        self.events = events  # [(t, kind, data), ...]
+
+    @classmethod
+    def load(cls, path: str) -> "Recording":
+        """读取录制文件"""
+        meta = {}
+        events = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if record.get("type") == "meta":
+                    meta = record
+                else:
+                    events.append((record["t"], record["kind"], record["data"]))
+        return cls(path, meta, events)
+
+
+class ReplayBackend:
+    """回放后端
+
+    从 recordings_dir 读取录制文件，按图像摘要匹配录制；没有匹配时按文件名顺序循环使用。
+    事件按录制时的到达时间除以 speed 产出（speed=1 为原始节奏，0 表示不等待）。
+    """
+
+    def __init__(self, recordings_dir: str, speed=1.0):
+        """初始化回放后端
+
+        Args:
+            recordings_dir: 录制文件目录
+            speed: 回放速度倍数
+        """
+        self.speed = speed
+        self.recordings = [
+            Recording.load(path)
+            for path in sorted(glob.glob(os.path.join(recordings_dir, "*.jsonl")))
+        ]
+        if not self.recordings:
+            raise ValueError(f"no recordings found in {recordings_dir}")
+
+        self.by_image = {}
+        for recording in self.recordings:
+            digest = recording.meta.get("image_sha256")
+            if digest:
+                self.by_image.setdefault(digest, []).append(recording)
+
+        self.model_name = "replay"  # 独立的模型名，避免与真实响应共用缓存
+        self.last_activity = time.perf_counter()
+        self.requests = 0
+        self.matched = 0
+        self._lock = threading.Lock()
+        self._cursor = itertools.cycle(self.recordings)
+
+    def select(self, image_b64: str, prompt: str) -> Recording:
+        """选择要回放的录制（优先选择图像和提示词都相同的录制）"""
+        candidates = self.by_image.get(image_digest(image_b64), [])
+        with self._lock:
+            self.requests += 1
+            for recording in candidates:
+                if recording.meta.get("prompt") == prompt:
+                    self.matched += 1
+                    return recording
+            if candidates:
+                self.matched += 1
+                return candidates[0]
+            return next(self._cursor)
+
+    def warm_up(self):
+        """无需建立连接"""
+        self.last_activity = time.perf_counter()
+
+    def describe_stats(self) -> dict:
+        """回放统计（字段与连接统计一致）"""
+        return {
+            "requests": self.requests,
+            "new_connections": 0,
+            "reused": self.requests,
+            "http_version": "replay",
+            "matched": self.matched,
+        }
+
+    def stream(self, image_b64: str, prompt: str, spoken_text: str = ""):
+        """按录制节奏产出事件（生成器），录制内容固定，忽略 spoken_text"""
+        recording = self.select(image_b64, prompt)
+        start = time.perf_counter()
+        for t, kind, data in recording.events:
+            if self.speed > 0:
+                delay = start + t / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.last_activity = time.perf_counter()
+            yield kind, data
+
+    def close(self):
+        pass
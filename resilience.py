@@ -0,0 +1,328 @@
+"""
+请求容错模块
+为任意后端的事件流加上首包/块间超时、抖动退避重试和可选的对冲请求（hedging），
+避免一次卡住的流式请求让玩家无限等待
+"""
+import collections
+import queue
+import random
+import threading
+import time
+
+from backends import RequestCancelled
+from metrics import percentile
+
+
+# 流结束标记
+_DONE = object()
+
+# 等待数据时检查普通 threading.Event 取消的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.05
+
+
+class StreamTimeout(Exception):
+    """等待首个数据块或下一个数据块超时"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """错误是否值得重试
+
+    超时、连接错误等没有 HTTP 状态码的错误，以及 429 和 5xx 可以重试；
+    鉴权失败、参数错误等 4xx 重试也不会成功。
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        return True
+    return status == 429 or status >= 500
+
+
+def backoff_delay(retry: int, base: float, cap: float) -> float:
+    """第 retry 次重试前的等待时长（全抖动指数退避）"""
+    return random.uniform(0, min(cap, base * (2 ** retry)))
+
+
+class LatencyTracker:
+    """记录最近若干次请求的首包延迟，用于计算对冲延迟"""
+
+    def __init__(self, size=50):
+        self.lock = threading.Lock()
+        self.samples = collections.deque(maxlen=size)
+
+    def add(self, seconds: float):
+        """记录一次首包延迟（秒）"""
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, percent: float, min_samples=1):
+        """返回百分位延迟（秒）；样本不足时返回 None"""
+        with self.lock:
+            samples = list(self.samples)
+        if len(samples) < max(1, min_samples):
+            return None
+        return percentile(samples, percent)
+
+
+class _Attempt:
+    """一次实际发出的请求，在独立线程中读取事件并放入共享队列"""
+
+    def __init__(self, backend, image_b64: str, prompt: str, spoken_text: str, out: queue.Queue, hedge=False):
+        self.backend = backend
+        self.hedge = hedge
+        self.started = time.perf_counter()
+        self.stop_event = threading.Event()
+        self.out = out
+        self.events = None
+        self.lock = threading.Lock()
+        threading.Thread(target=self._pump, args=(image_b64, prompt, spoken_text), daemon=True).start()
+
+    def _pump(self, image_b64, prompt, spoken_text):
+        """读取后端事件（请求线程中执行）
+
+        后端返回可中止的事件流（EventStream）时，取消会关闭底层响应，卡住的读取立即出错退出；
+        否则在下一个事件到达或底层读取超时时退出。
+        """
+        try:
+            events = iter(self.backend.stream(image_b64, prompt, spoken_text))
+            with self.lock:
+                self.events = events
+            if self.stop_event.is_set():
+                self._abort(events)  # 建立请求期间已被取消
+            try:
+                for item in events:
+                    if self.stop_event.is_set():
+                        break
+                    self.out.put((self, item))
+            finally:
+                close = getattr(events, "close", None)
+                if close:
+                    close()
+        except Exception as e:
+            self.out.put((self, e))
+        finally:
+            self.out.put((self, _DONE))
+
+    def cancel(self):
+        """放弃这次请求并中止底层响应"""
+        with self.lock:
+            if self.stop_event.is_set():
+                return
+            self.stop_event.set()
+            events = self.events
+        if events is not None:
+            self._abort(events)
+
+    @staticmethod
+    def _abort(events):
+        abort = getattr(events, "abort", None)
+        if abort:
+            try:
+                abort()
+            except Exception:
+                pass  # 响应可能已经结束
+
+
+class ResilientBackend:
+    """容错后端
+
+    包装任意后端，对外提供相同的 stream(image_b64, prompt) 事件接口：
+    - 首个数据块在 FIRST_BYTE_TIMEOUT 秒内未到达、或相邻数据块间隔超过 CHUNK_TIMEOUT 秒时超时
+    - 尚未产出任何内容时，可重试的错误按抖动指数退避重试，最多 RETRY_MAX_ATTEMPTS 次；
+      已经产出内容（文字已显示、音频已播放）后出错不再重试
+    - 开启 HEDGE_ENABLED 时，主请求超过近期首包延迟的 HEDGE_PERCENTILE 分位仍无响应，
+      就再发一个相同请求，先产出内容的一方胜出，另一方被取消
+    - 传入 cancel_event 时，等待数据、重试和退避期间被取消都会立即抛出 RequestCancelled，
+      并中止在途请求的底层响应
+    """
+
+    def __init__(self, inner, config, log=None):
+        """初始化容错后端
+
+        Args:
+            inner: 被包装的后端
+            config: 配置
+            log: 可选日志函数 log(key, *args)
+        """
+        self.inner = inner
+        self.config = config
+        self.log = log
+        self.latency = LatencyTracker()
+        # 不支持并发请求的后端（实时会话）无法对冲
+        self.hedge_enabled = config.HEDGE_ENABLED and getattr(inner, "concurrent_requests", True)
+
+        self.stats_lock = threading.Lock()
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model_name
+
+    @property
+    def last_activity(self) -> float:
+        return self.inner.last_activity
+
+    @last_activity.setter
+    def last_activity(self, value: float):
+        self.inner.last_activity = value
+
+    def warm_up(self):
+        """预热底层连接"""
+        self.inner.warm_up()
+
+    def describe_stats(self) -> dict:
+        """底层连接统计，附加重试与对冲统计"""
+        stats = dict(self.inner.describe_stats())
+        with self.stats_lock:
+            stats.update({
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            })
+        return stats
+
+    def _log(self, key: str, *args):
+        if self.log:
+            self.log(key, *args)
+
+    def _count(self, name: str):
+        with self.stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def hedge_delay(self) -> float:
+        """发出对冲请求前等待的时长（秒）"""
+        delay = self.latency.percentile(self.config.HEDGE_PERCENTILE, self.config.HEDGE_MIN_SAMPLES)
+        return self.config.HEDGE_DELAY if delay is None else delay
+
+    # ============ 请求 ============
+
+    def stream(self, image_b64: str, prompt: str, spoken_text: str = "", cancel_event=None):
+        """带超时、重试和对冲地发起请求，逐个产出事件（生成器）
+
+        Args:
+            cancel_event: 可选 threading.Event，被设置后放弃在途请求并抛出 RequestCancelled；
+                          支持 add_callback 的 CancelEvent 会在设置时立即唤醒等待，否则定时检查
+        """
+        max_attempts = max(1, self.config.RETRY_MAX_ATTEMPTS)
+        for attempt in range(max_attempts):
+            produced = False
+            try:
+                for item in self._stream_once(image_b64, prompt, spoken_text, cancel_event):
+                    produced = True
+                    yield item
+                return
+            except RequestCancelled:
+                raise
+            except Exception as e:
+                if isinstance(e, StreamTimeout):
+                    self._count("timeouts")
+                if produced or attempt + 1 >= max_attempts or not is_retryable(e):
+                    raise
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled()
+                delay = backoff_delay(attempt, self.config.RETRY_BACKOFF_BASE, self.config.RETRY_BACKOFF_MAX)
+                self._count("retries")
+                self._log("log_request_retry", attempt + 1, e, delay * 1000)
+                if cancel_event is None:
+                    time.sleep(delay)
+                elif cancel_event.wait(delay):
+                    raise RequestCancelled()
+
+    def _stream_once(self, image_b64: str, prompt: str, spoken_text: str, cancel_event=None):
+        """发起一轮请求（可能包含一个对冲请求），产出胜出请求的事件"""
+        first_byte_timeout = self.config.FIRST_BYTE_TIMEOUT
+        chunk_timeout = self.config.CHUNK_TIMEOUT
+
+        out = queue.Queue()
+
+        def wake_on_cancel():
+            out.put((None, None))  # 不属于任何请求，只用于唤醒等待
+
+        # CancelEvent 被设置时立即唤醒等待；普通 Event 只能定时检查
+        add_callback = getattr(cancel_event, "add_callback", None)
+        if add_callback:
+            add_callback(wake_on_cancel)
+        poll_cancel = cancel_event is not None and add_callback is None
+
+        primary = _Attempt(self.inner, image_b64, prompt, spoken_text, out)
+        attempts = [primary]
+        live = [primary]
+        hedge_at = primary.started + self.hedge_delay() if self.hedge_enabled else None
+        winner = None
+        last_event = None
+        last_error = None
+
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled()
+
+                now = time.perf_counter()
+                if winner is None:
+                    # 首包超时的请求直接放弃
+                    for attempt in [a for a in live if now - a.started >= first_byte_timeout]:
+                        attempt.cancel()
+                        live.remove(attempt)
+                    if not live:
+                        raise last_error or StreamTimeout(f"no response within {first_byte_timeout}s")
+
+                    if hedge_at is not None and now >= hedge_at:
+                        hedge_at = None
+                        hedge = _Attempt(self.inner, image_b64, prompt, spoken_text, out, hedge=True)
+                        attempts.append(hedge)
+                        live.append(hedge)
+                        self._count("hedges")
+                        self._log("log_hedge_sent", (now - primary.started) * 1000)
+                        continue
+
+                    wake = min(a.started + first_byte_timeout for a in live)
+                    if hedge_at is not None:
+                        wake = min(wake, hedge_at)
+                else:
+                    if now - last_event >= chunk_timeout:
+                        raise StreamTimeout(f"no data for {chunk_timeout}s")
+                    wake = last_event + chunk_timeout
+                if poll_cancel:
+                    wake = min(wake, now + CANCEL_POLL_INTERVAL)
+
+                try:
+                    attempt, item = out.get(timeout=max(0.0, wake - now))
+                except queue.Empty:
+                    continue
+
+                if attempt not in live:
+                    continue  # 已放弃的请求或取消唤醒
+
+                if item is _DONE:
+                    return  # 正常结束（没有内容的空响应也算完成）
+
+                if isinstance(item, Exception):
+                    live.remove(attempt)
+                    if attempt is winner or not live:
+                        raise item
+                    last_error = item  # 另一个请求仍可能成功
+                    continue
+
+                if winner is None:
+                    winner = attempt
+                    self.latency.add(time.perf_counter() - attempt.started)
+                    for other in live:
+                        if other is not winner:
+                            other.cancel()
+                    live = [winner]
+                    if winner.hedge:
+                        self._count("hedge_wins")
+
+                last_event = time.perf_counter()
+                yield item
+        finally:
+            if add_callback:
+                cancel_event.remove_callback(wake_on_cancel)
+            for attempt in attempts:
+                attempt.cancel()
+
+    def close(self):
+        """关闭底层后端"""
+        self.inner.close()
@@ -0,0 +1,149 @@
+"""
+响应缓存模块
+将识别文本和解码后的音频持久化到磁盘（SQLite 索引 + 音频文件），
+按图像内容、提示词、语音和模型名作为键，支持 LRU 淘汰和容量上限
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """磁盘响应缓存
+
+    索引保存在 cache_dir/index.sqlite3，音频保存为 cache_dir/<前两位>/<键>.pcm。
+    所有方法都是线程安全的。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 音频和文本总大小上限（字节），超出时淘汰最久未使用的条目
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(cache_dir, "index.sqlite3"),
+            check_same_thread=False
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " has_audio INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, prompt: str, voice: str, model: str) -> str:
+        """根据图像内容和请求参数生成缓存键"""
+        digest = hashlib.sha256(image_bytes)
+        for part in (prompt, voice, model):
+            digest.update(b"\0")
+            digest.update(part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _audio_path(self, key: str) -> str:
+        """音频文件路径"""
+        return os.path.join(self.cache_dir, key[:2], key + ".pcm")
+
+    def get(self, key: str):
+        """读取缓存
+
+        Returns:
+            (recognized_text, audio_bytes)，未命中时返回 None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, has_audio FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            text, has_audio = row
+            audio_bytes = None
+            if has_audio:
+                try:
+                    with open(self._audio_path(key), 'rb') as f:
+                        audio_bytes = f.read()
+                except OSError:
+                    # 音频文件丢失，删除失效条目
+                    self._delete(key)
+                    self._db.commit()
+                    return None
+
+            self._db.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+            return text, audio_bytes
+
+    def put(self, key: str, recognized_text: str, audio_bytes: bytes):
+        """写入缓存并按需淘汰旧条目"""
+        text = recognized_text or ""
+        size = len(text.encode('utf-8')) + (len(audio_bytes) if audio_bytes else 0)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if audio_bytes:
+                path = self._audio_path(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(audio_bytes)
+                os.replace(tmp_path, path)
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, text, has_audio, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, text, 1 if audio_bytes else 0, size, time.time())
+            )
+            self._evict()
+            self._db.commit()
+
+    def total_bytes(self) -> int:
+        """当前缓存总大小"""
+        with self._lock:
+            return self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到总大小不超过上限（调用方持有锁）"""
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._delete(key)
+            total -= size
+
+    def _delete(self, key: str):
+        """删除单个条目及其音频文件（调用方持有锁）"""
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._audio_path(key))
+        except OSError:
+            pass
+
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            self._db.close()
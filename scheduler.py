@@ -0,0 +1,115 @@
+"""
+请求调度模块
+最新优先（latest-wins）：合并短时间内的连续按键，新截图到达时抢占在途任务，
+保证总是朗读最新的对话
+"""
+import threading
+import time
+
+
+class SchedulerStats:
+    """调度统计"""
+
+    def __init__(self):
+        self.triggers = 0  # 触发次数
+        self.coalesced = 0  # 被合并（忽略）的触发次数
+        self.preemptions = 0  # 抢占次数
+        self.cancelled_jobs = 0  # 被取消的任务数
+        self.max_queue_depth = 0  # 触发时观察到的最大在途任务数
+        self.started_jobs = 0
+        self.total_start_latency = 0.0  # 触发到开始执行的累计耗时（秒）
+
+    @property
+    def avg_start_latency_ms(self) -> float:
+        """平均触发到开始耗时（毫秒）"""
+        if not self.started_jobs:
+            return 0.0
+        return self.total_start_latency / self.started_jobs * 1000
+
+    def snapshot(self) -> dict:
+        """统计快照"""
+        return {
+            "triggers": self.triggers,
+            "coalesced": self.coalesced,
+            "preemptions": self.preemptions,
+            "cancelled_jobs": self.cancelled_jobs,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_start_latency_ms": self.avg_start_latency_ms,
+        }
+
+
+class RequestScheduler:
+    """最新优先调度器
+
+    - 距离上一次被接受的触发不足 coalesce_window 秒的触发会被合并（忽略）
+    - 有任务在途时，新触发会取消所有在途任务并清空播放，再提交新任务；
+      取消任务时 cancel_event 上注册的回调立即关闭其 HTTP 流，卡住的流也会被打断
+    """
+
+    def __init__(self, pipeline, coalesce_window=0.3, on_preempt=None):
+        """初始化调度器
+
+        Args:
+            pipeline: StagedPipeline
+            coalesce_window: 合并窗口（秒）
+            on_preempt: 抢占时回调（在旧任务取消之后调用），用于清空播放
+        """
+        self.pipeline = pipeline
+        self.coalesce_window = coalesce_window
+        self.on_preempt = on_preempt
+        self.stats = SchedulerStats()
+        self.lock = threading.Lock()  # 串行化触发
+        # 任务开始/取消回调来自流水线事件循环线程，而 trigger 持有 self.lock 时
+        # 会等待事件循环完成提交，因此这两类统计使用单独的锁以免死锁
+        self.stats_lock = threading.Lock()
+        self.last_accepted = None
+
+    def trigger(self, job):
+        """处理一次触发（线程安全）
+
+        Returns:
+            "submitted"、"preempted" 或 "coalesced"
+        """
+        with self.lock:
+            now = time.perf_counter()
+            self.stats.triggers += 1
+
+            if self.last_accepted is not None and now - self.last_accepted < self.coalesce_window:
+                self.stats.coalesced += 1
+                return "coalesced"
+
+            depth = self.pipeline.pending
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+            preempt = depth > 0
+
+            self.pipeline.submit(job, preempt=preempt)
+            self.last_accepted = now
+
+            if preempt:
+                self.stats.preemptions += 1
+                if self.on_preempt:
+                    self.on_preempt()
+                return "preempted"
+            return "submitted"
+
+    def on_job_started(self, job) -> float:
+        """任务开始执行时调用
+
+        Returns:
+            触发到开始的耗时（毫秒）
+        """
+        latency = job.start_time - job.created_time
+        with self.stats_lock:
+            self.stats.started_jobs += 1
+            self.stats.total_start_latency += latency
+        return latency * 1000
+
+    def on_job_cancelled(self, job):
+        """任务被取消时调用"""
+        with self.stats_lock:
+            self.stats.cancelled_jobs += 1
+
+    def snapshot(self) -> dict:
+        """调度统计快照（线程安全）"""
+        with self.stats_lock:
+            return self.stats.snapshot()
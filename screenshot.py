@@ -0,0 +1,142 @@
+"""
+截图处理模块
+持有长期存在的截图引擎和预截图环形缓冲，截图后计算字幕区域哈希、检测文字、预处理并编码
+"""
+import base64
+import time
+
+from capture_engine import CaptureEngine
+from frame_dedup import dhash
+from frame_ring import FrameRing, RingRecorder
+from image_encoder import EncoderSettings, encode_frame
+from subtitle_preprocess import has_text, luma, preprocess
+
+
+class ScreenshotHandler:
+    """处理屏幕截图"""
+
+    def __init__(self, region=None, hash_size=32, fullscreen_band=0.33, auto_crop=False, enhance="none"):
+        """初始化截图处理器（持有长期存在的截图引擎）
+
+        Args:
+            region: 字幕截图区域，None 表示整个主显示器
+            hash_size: 字幕区域 dHash 边长
+            fullscreen_band: 全屏截图时用于计算哈希的底部区域比例
+            auto_crop: 全屏截图时是否自动裁剪到文字最密集的区域
+            enhance: 上传前的增强方式，"none"、"stretch"（对比度拉伸）或 "binarize"（二值化）
+        """
+        self.engine = CaptureEngine()
+        self.region = region
+        self.hash_size = hash_size
+        self.fullscreen_band = fullscreen_band
+        self.auto_crop = auto_crop
+        self.enhance = enhance
+        self.ring = None  # 预截图环形缓冲
+        self.ring_recorder = None
+
+    def set_region(self, region):
+        """设置字幕截图区域"""
+        self.region = region
+        if self.ring:
+            self.ring.text_band = None if region else self.fullscreen_band
+            self.ring.clear()  # 旧区域的帧不再可用
+
+    def start_ring(self, capacity=8, interval=0.1):
+        """开始在后台持续抓帧到环形缓冲"""
+        if self.ring is None:
+            self.ring = FrameRing(capacity, text_band=None if self.region else self.fullscreen_band)
+            self.ring_recorder = RingRecorder(
+                lambda: self.engine.process(self.ring.store, self.region), interval
+            )
+        self.ring_recorder.start()
+
+    def stop_ring(self):
+        """停止后台抓帧"""
+        if self.ring_recorder:
+            self.ring_recorder.stop()
+
+    def capture_screen(self, max_size=1280, settings=None, timings=None, ring_window=None):
+        """截取屏幕并返回编码后的图像字节、字幕区域的感知哈希和字幕区域是否有文字
+
+        设置了字幕区域时只截取该区域，并保持原始分辨率以免小字模糊；
+        否则截取整个主显示器，哈希只取屏幕底部的字幕带。
+        环形缓冲在运行且有足够新的帧时，直接使用其中最好的一帧，不再截图。
+
+        Args:
+            max_size: 全屏截图的最长边上限
+            settings: 编码方案（EncoderSettings），None 表示 JPEG 质量 85
+            timings: 可选字典，写入 capture_ms（或使用缓冲帧时的 frame_age_ms）、
+                     hash_ms、preprocess_ms、resize_ms、encode_ms
+            ring_window: 从环形缓冲中挑选最近多少秒内的帧，None 表示总是重新截图
+
+        Returns:
+            (image_bytes, frame_hash, has_text)
+        """
+        region = self.region
+        settings = settings or EncoderSettings("jpeg", 85, optimize=True)
+
+        if ring_window and self.ring_recorder and self.ring_recorder.running:
+            age = self.ring.newest_age()
+            if age is not None and age <= ring_window:
+                # 两次调用之间 set_region 可能清空了缓冲，此时改为直接截图
+                frame, frame_age = self.ring.best(ring_window)
+                if frame is not None:
+                    if timings is not None:
+                        timings["frame_age_ms"] = frame_age * 1000
+                    return self.encode_frame(frame, region, max_size, settings, timings)
+
+        return self.engine.process(
+            lambda frame: self.encode_frame(frame, region, max_size, settings, timings),
+            region, timings
+        )
+
+    def encode_frame(self, frame, region, max_size, settings, timings=None):
+        """计算字幕区域哈希并检测其中是否有文字，预处理并编码一帧
+
+        Returns:
+            (image_bytes, frame_hash, has_text)
+        """
+        start = time.perf_counter()
+        if region:
+            band = frame
+        else:
+            band = frame[int(frame.shape[0] * (1 - self.fullscreen_band)):]
+        frame_hash = dhash(band, self.hash_size)
+        band_has_text = has_text(band)
+        hashed = time.perf_counter()
+        if timings is not None:
+            timings["hash_ms"] = (hashed - start) * 1000
+
+        # 字幕预处理：全屏时裁剪到底部字幕带中的文字区域（找不到时不裁剪），按需增强
+        auto_crop = self.auto_crop and not region
+        if auto_crop or self.enhance != "none":
+            frame, _ = preprocess(frame, auto_crop, self.enhance, self.fullscreen_band)
+            if timings is not None:
+                timings["preprocess_ms"] = (time.perf_counter() - hashed) * 1000
+
+        image_bytes = encode_frame(frame, settings, None if region else max_size, timings)
+        return image_bytes, frame_hash, band_has_text
+
+    def sample_luma(self, step=4):
+        """低开销采样字幕区域：只返回降采样亮度数组，不编码图像（用于监视模式）
+
+        全屏时只采样屏幕底部的字幕带。
+        """
+        region = self.region
+
+        def sample(frame):
+            if not region:
+                frame = frame[int(frame.shape[0] * (1 - self.fullscreen_band)):]
+            return luma(frame, step)
+
+        return self.engine.process(sample, region)
+
+    def close(self):
+        """停止后台抓帧并释放截图引擎"""
+        self.stop_ring()
+        self.engine.close()
+
+    @staticmethod
+    def image_to_base64(image_bytes: bytes) -> str:
+        """图像字节转 Base64"""
+        return base64.b64encode(image_bytes).decode('ascii')
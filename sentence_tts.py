@@ -0,0 +1,344 @@
+"""
+逐句并行语音合成模块
+先用纯文本请求快速识别对话，文字一边到达一边分句，每句立即并发请求语音，
+音频按句子顺序输出，首音延迟只取决于第一句而不是整段对话；
+对话框在原有内容后追加新行时，开头与上一次识别结果相同的句子不再合成；
+可选的语音缓存命中时直接输出缓存的音频，不再请求合成
+"""
+import base64
+import difflib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_decode import StreamingAudioDecoder
+from backends import EVENT_AUDIO, EVENT_TEXT, EVENT_USAGE, EventStream, RequestCancelled, build_messages
+
+
+# 句末标点，以及紧跟在句末标点之后、应归入同一句的字符
+SENTENCE_TERMINATORS = "。！？!?；;…\n"
+SENTENCE_TRAILERS = "”’」』）)\"'"
+
+# 两句话去掉空白和标点后的相似度不低于该值时视为同一句（容忍个别字识别差异）
+SAME_SENTENCE_RATIO = 0.9
+
+# 流结束标记
+_DONE = object()
+
+
+class SentenceSplitter:
+    """增量分句器 - 文本分段到达，凑成完整句子后输出"""
+
+    def __init__(self, min_chars=6):
+        """初始化分句器
+
+        Args:
+            min_chars: 句子最少字符数，过短的句子与下一句合并，避免过多小请求
+        """
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> list:
+        """输入一段文本，返回其中已完整的句子"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        i = 0
+        while i < len(self.buffer):
+            if self.buffer[i] in SENTENCE_TERMINATORS:
+                end = i + 1
+                while end < len(self.buffer) and (
+                        self.buffer[end] in SENTENCE_TERMINATORS or self.buffer[end] in SENTENCE_TRAILERS):
+                    end += 1
+                sentence = self.buffer[start:end].strip()
+                if len(sentence) >= self.min_chars:
+                    sentences.append(sentence)
+                    start = end
+                i = end
+            else:
+                i += 1
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> list:
+        """输出剩余文本"""
+        rest = self.buffer.strip()
+        self.buffer = ""
+        return [rest] if rest else []
+
+
+def split_sentences(text: str, min_chars=6) -> list:
+    """将完整文本分句"""
+    splitter = SentenceSplitter(min_chars)
+    return splitter.feed(text) + splitter.flush()
+
+
+def _normalize(sentence: str) -> str:
+    """只保留文字和数字，忽略空白和标点差异"""
+    return "".join(ch for ch in sentence if ch.isalnum())
+
+
+def is_same_sentence(a: str, b: str) -> bool:
+    """两句话是否相同（忽略空白、标点和个别字的识别差异）"""
+    a, b = _normalize(a), _normalize(b)
+    if a == b:
+        return True
+    return bool(a and b) and difflib.SequenceMatcher(None, a, b, autojunk=False).ratio() >= SAME_SENTENCE_RATIO
+
+
+def spoken_prefix(previous: str, current: str, min_chars=6) -> int:
+    """current 开头有多少句与 previous 开头的句子相同（按句比较的最长公共前缀）"""
+    count = 0
+    for old, new in zip(split_sentences(previous, min_chars), split_sentences(current, min_chars)):
+        if not is_same_sentence(old, new):
+            break
+        count += 1
+    return count
+
+
+class _SpeechSlot:
+    """一句话的合成结果槽位，音频块按到达顺序放入队列，最后放入 _DONE 或异常"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.chunks = queue.Queue()
+        self.cache_key = None  # 语音缓存键，未启用缓存时为 None
+
+
+class _Request:
+    """一次逐句合成请求的共享状态：事件输出队列、句子槽位队列、停止标记和进行中的底层响应"""
+
+    def __init__(self):
+        self.out = queue.Queue()
+        self.slots = queue.Queue()
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.streams = set()
+
+    def open(self, events):
+        """登记一个进行中的底层响应；请求已被中止时立即中止它"""
+        with self.lock:
+            if not self.stop.is_set():
+                self.streams.add(events)
+                return events
+        events.abort()  # HttpBackend.stream_messages 返回 EventStream
+        return events
+
+    def release(self, events):
+        with self.lock:
+            self.streams.discard(events)
+
+    def abort(self):
+        """中止整个请求（任意线程）：关闭所有底层响应，让等待中的迭代立即抛出 RequestCancelled"""
+        with self.lock:
+            self.stop.set()
+            streams, self.streams = list(self.streams), set()
+        for events in streams:
+            try:
+                events.abort()
+            except Exception:
+                pass
+        self.out.put(RequestCancelled())
+
+
+class SentenceBackend:
+    """逐句并行合成后端
+
+    包装 HttpBackend，对外提供相同的 stream(image_b64, prompt) 事件接口：
+    文本事件来自纯文本识别请求，音频事件按句子顺序来自各句的合成请求。
+    """
+
+    def __init__(self, inner, config, speech_cache=None):
+        """初始化逐句合成后端
+
+        Args:
+            inner: HttpBackend
+            config: 配置
+            speech_cache: 可选的 SpeechCache，重复出现的句子直接使用缓存的音频
+        """
+        self.inner = inner
+        self.config = config
+        self.speech_cache = speech_cache
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.SENTENCE_TTS_WORKERS, thread_name_prefix="tts"
+        )
+
+    @property
+    def model_name(self) -> str:
+        """模型名（带模式后缀，避免与整段合成的缓存混用）"""
+        return f"{self.inner.model_name}+sentence"
+
+    @property
+    def last_activity(self) -> float:
+        return self.inner.last_activity
+
+    @last_activity.setter
+    def last_activity(self, value: float):
+        self.inner.last_activity = value
+
+    def warm_up(self):
+        """预热底层连接"""
+        self.inner.warm_up()
+
+    def describe_stats(self) -> dict:
+        """底层连接复用统计，加上语音缓存命中统计"""
+        stats = self.inner.describe_stats()
+        if self.speech_cache:
+            stats.update(self.speech_cache.describe_stats())
+        return stats
+
+    # ============ 请求 ============
+
+    def stream(self, image_b64: str, prompt: str, spoken_text: str = "") -> EventStream:
+        """识别并逐句合成，逐个产出事件
+
+        迭代结束或被关闭时停止所有未完成的请求；abort() 同时关闭它们的底层响应。
+
+        Args:
+            image_b64: Base64 编码的图像
+            prompt: 识别提示词
+            spoken_text: 上一次已朗读的文本；识别结果开头与它相同的句子只输出文字、不合成语音，
+                         全部相同时（重复朗读同一段对话）仍完整合成
+        """
+        request = _Request()
+        threading.Thread(
+            target=self._read_text, args=(image_b64, prompt, spoken_text, request), daemon=True
+        ).start()
+        threading.Thread(
+            target=self._forward_audio, args=(request,), daemon=True
+        ).start()
+        return EventStream(self._iter_events(request), abort=request.abort)
+
+    @staticmethod
+    def _iter_events(request: _Request):
+        """按到达顺序产出文本和音频事件，直到识别和音频转发都结束"""
+        finished = 0
+        try:
+            while finished < 2:
+                item = request.out.get()
+                if item is _DONE:
+                    finished += 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            request.stop.set()
+
+    def _read_text(self, image_b64, prompt, spoken_text, request: _Request):
+        """读取纯文本识别结果，每凑成一句就提交合成请求（跳过开头已朗读过的句子）"""
+        splitter = SentenceSplitter(self.config.SENTENCE_MIN_CHARS)
+        spoken = split_sentences(spoken_text, self.config.SENTENCE_MIN_CHARS)
+        skipped = []  # 与上一次相同、暂不合成的句子
+        submitted = False
+
+        def on_sentence(sentence):
+            nonlocal submitted
+            if not submitted and len(skipped) < len(spoken) and is_same_sentence(sentence, spoken[len(skipped)]):
+                skipped.append(sentence)
+                return
+            submitted = True
+            request.slots.put(self._submit_speech(sentence, request))
+
+        try:
+            events = request.open(
+                self.inner.stream_messages(build_messages(image_b64, prompt), with_audio=False)
+            )
+            try:
+                for kind, data in events:
+                    if request.stop.is_set():
+                        events.close()
+                        return
+                    if kind == EVENT_TEXT:
+                        request.out.put((EVENT_TEXT, data))
+                        for sentence in splitter.feed(data):
+                            on_sentence(sentence)
+                    elif kind == EVENT_USAGE:
+                        request.out.put((EVENT_USAGE, data))
+            finally:
+                request.release(events)
+
+            for sentence in splitter.flush():
+                on_sentence(sentence)
+
+            if not submitted:
+                # 没有新内容：用户在重复朗读同一段对话
+                for sentence in skipped:
+                    request.slots.put(self._submit_speech(sentence, request))
+        except Exception as e:
+            request.out.put(e)
+        finally:
+            request.slots.put(None)
+            request.out.put(_DONE)
+
+    def _submit_speech(self, sentence: str, request: _Request) -> _SpeechSlot:
+        """提交一句话的合成请求，语音缓存命中时直接填入音频"""
+        slot = _SpeechSlot(sentence)
+        if self.speech_cache:
+            slot.cache_key = self.speech_cache.make_key(
+                sentence, self.config.VOICE, self.inner.model_name, self.config.TTS_PROMPT_TEMPLATE
+            )
+            audio_bytes = self.speech_cache.get(slot.cache_key)
+            if audio_bytes:
+                slot.chunks.put(base64.b64encode(audio_bytes).decode('ascii'))
+                slot.chunks.put(_DONE)
+                return slot
+        self.executor.submit(self._synthesize, slot, request)
+        return slot
+
+    def _synthesize(self, slot: _SpeechSlot, request: _Request):
+        """合成一句话（在合成线程池中执行），完整合成后写入语音缓存"""
+        try:
+            if request.stop.is_set():
+                return
+            messages = [{
+                "role": "user",
+                "content": self.config.TTS_PROMPT_TEMPLATE.format(text=slot.text)
+            }]
+            audio_decoder = StreamingAudioDecoder(keep=True) if slot.cache_key else None
+            events = request.open(self.inner.stream_messages(messages))
+            try:
+                for kind, data in events:
+                    if request.stop.is_set():
+                        events.close()
+                        return
+                    if kind == EVENT_AUDIO:
+                        if audio_decoder:
+                            audio_decoder.feed(data)
+                        slot.chunks.put(data)
+                    elif kind == EVENT_USAGE:
+                        request.out.put((EVENT_USAGE, data))
+            finally:
+                request.release(events)
+
+            if audio_decoder:
+                self.speech_cache.put(slot.cache_key, slot.text, audio_decoder.getvalue())
+        except Exception as e:
+            slot.chunks.put(e)
+        finally:
+            slot.chunks.put(_DONE)
+
+    def _forward_audio(self, request: _Request):
+        """按句子顺序转发音频：当前句的音频一到达就转发，该句结束后再转发下一句"""
+        try:
+            while not request.stop.is_set():
+                slot = request.slots.get()
+                if slot is None:
+                    return
+                while True:
+                    chunk = slot.chunks.get()
+                    if chunk is _DONE:
+                        break
+                    if isinstance(chunk, Exception):
+                        request.out.put(chunk)
+                        return
+                    request.out.put((EVENT_AUDIO, chunk))
+        finally:
+            request.out.put(_DONE)
+
+    def close(self):
+        """关闭合成线程池、语音缓存和底层连接"""
+        self.executor.shutdown(wait=False)
+        if self.speech_cache:
+            self.speech_cache.close()
+        self.inner.close()
@@ -0,0 +1,100 @@
+"""
+语音缓存模块
+按规范化后的句子文本、语音、模型和朗读提示词缓存解码后的音频：
+内存中按 LRU 保留最近使用的句子（有字节上限），并写入磁盘响应缓存，重启后仍可命中
+"""
+import collections
+import hashlib
+import threading
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """规范化句子文本：统一全角/半角字符并去掉所有空白"""
+    return "".join(unicodedata.normalize("NFKC", text).split())
+
+
+class SpeechCache:
+    """两级语音缓存（线程安全）
+
+    内存层是按字节计量的 LRU；磁盘层是一个 ResponseCache（可选），
+    内存未命中而磁盘命中时，条目会被提升回内存。
+    """
+
+    def __init__(self, memory_bytes: int, disk=None):
+        """初始化语音缓存
+
+        Args:
+            memory_bytes: 内存中音频总大小上限（字节）
+            disk: 可选的 ResponseCache，作为持久化层
+        """
+        self.memory_bytes = memory_bytes
+        self.disk = disk
+        self.entries = collections.OrderedDict()  # key -> 音频字节
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str, template: str) -> str:
+        """根据规范化文本和合成参数生成缓存键"""
+        digest = hashlib.sha256(normalize_text(text).encode('utf-8'))
+        for part in (voice, model, template):
+            digest.update(b"\0")
+            digest.update(part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """读取音频，未命中时返回 None"""
+        with self.lock:
+            audio_bytes = self.entries.get(key)
+            if audio_bytes is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return audio_bytes
+
+        cached = self.disk.get(key) if self.disk else None
+        with self.lock:
+            if not cached or not cached[1]:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, cached[1])
+            return cached[1]
+
+    def put(self, key: str, text: str, audio_bytes: bytes):
+        """写入内存和磁盘"""
+        if not audio_bytes:
+            return
+        with self.lock:
+            self._remember(key, audio_bytes)
+        if self.disk:
+            self.disk.put(key, text, audio_bytes)
+
+    def _remember(self, key: str, audio_bytes: bytes):
+        """放入内存层并淘汰最久未使用的条目（调用方持有锁）"""
+        if len(audio_bytes) > self.memory_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = audio_bytes
+        self.size += len(audio_bytes)
+        while self.size > self.memory_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def describe_stats(self) -> dict:
+        """命中统计"""
+        with self.lock:
+            return {
+                "speech_cache_hits": self.hits,
+                "speech_cache_misses": self.misses,
+                "speech_cache_entries": len(self.entries),
+            }
+
+    def close(self):
+        """关闭磁盘层"""
+        if self.disk:
+            self.disk.close()
@@ -0,0 +1,87 @@
+"""
+启动计时模块
+记录从进程导入主模块开始的各个时间点（首次绘制、就绪等）和各模块首次导入的耗时，
+输出到日志并可追加到 JSONL 文件，方便发现启动变慢的回归
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+
+
+class StartupTimer:
+    """启动计时器
+
+    install_import_hook() 之后，每个顶层包第一次被导入时记录耗时（包含它导入的依赖，
+    在后台线程中导入的模块同样会被记录）；mark() 记录距开始的毫秒数。
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = {}  # 名称 -> 距开始的毫秒数
+        self.durations = {}  # 名称 -> 耗时（毫秒），如设备初始化
+        self.imports = {}  # 顶层包名 -> 首次导入耗时（毫秒）
+        self.lock = threading.Lock()
+        self._original_import = None
+
+    def install_import_hook(self):
+        """开始记录模块导入耗时"""
+        if self._original_import:
+            return
+        original = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            top = name.partition('.')[0]
+            if level or top in sys.modules:
+                return original(name, globals, locals, fromlist, level)
+            start = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                with self.lock:
+                    self.imports.setdefault(top, (time.perf_counter() - start) * 1000)
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self):
+        """停止记录模块导入耗时"""
+        if self._original_import:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, name: str) -> float:
+        """记录一个时间点，返回距开始的毫秒数"""
+        elapsed = (time.perf_counter() - self.start) * 1000
+        with self.lock:
+            self.marks[name] = elapsed
+        return elapsed
+
+    def record(self, name: str, duration_ms: float):
+        """记录一段耗时（毫秒）"""
+        with self.lock:
+            self.durations[name] = duration_ms
+
+    def slowest_imports(self, count=5) -> list:
+        """导入最慢的 count 个模块 [(模块名, 毫秒), ...]"""
+        with self.lock:
+            return sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def to_dict(self) -> dict:
+        """转换为可序列化的字典（毫秒保留一位小数）"""
+        with self.lock:
+            return {
+                "timestamp": time.time(),
+                "marks": {k: round(v, 1) for k, v in self.marks.items()},
+                "durations": {k: round(v, 1) for k, v in self.durations.items()},
+                "imports": {k: round(v, 1) for k, v in self.imports.items()},
+            }
+
+    def export(self, path: str):
+        """追加一条启动记录到 JSONL 文件"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False) + "\n")
@@ -0,0 +1,181 @@
+"""
+字幕预处理模块
+在截图和编码之间用 NumPy 向量化处理帧：根据行/列边缘能量投影找到字幕带中文字最密集的区域并裁剪，
+可选地做对比度拉伸或二值化，得到更小、更易压缩的图像
+"""
+import numpy as np
+
+
+PREPROCESS_MODES = ("none", "stretch", "binarize")
+
+# 行边缘能量峰值低于该值时认为画面中没有文字
+MIN_TEXT_ENERGY = 0.02
+
+
+def luma(frame: np.ndarray, step=1) -> np.ndarray:
+    """按步长采样并计算整数亮度（BT.601 近似，结果为 int32）"""
+    sample = frame[::step, ::step]
+    return (sample[..., 0].astype(np.int32) * 77
+            + sample[..., 1].astype(np.int32) * 150
+            + sample[..., 2].astype(np.int32) * 29) >> 8
+
+
+def edge_map(y: np.ndarray, threshold=40) -> np.ndarray:
+    """水平方向亮度突变超过阈值的像素
+
+    只统计水平梯度（竖直笔画）：文字笔画密集，而对话框的横向边框、地平线等长直线不会被计入。
+    """
+    return np.abs(np.diff(y, axis=1)) > threshold
+
+
+def _smooth(values: np.ndarray, window: int) -> np.ndarray:
+    """滑动平均"""
+    window = max(1, window)
+    return np.convolve(values, np.ones(window) / window, mode='same')
+
+
+def _row_energy(edges: np.ndarray) -> np.ndarray:
+    """每行竖直笔画边缘的比例（平滑后）"""
+    return _smooth(edges.mean(axis=1), max(1, edges.shape[0] // 100))
+
+
+def has_text(frame: np.ndarray, sample_step=4, edge_threshold=40) -> bool:
+    """画面中是否有文字（存在笔画边缘足够密集的行）"""
+    edges = edge_map(luma(frame, sample_step), edge_threshold)
+    if edges.size == 0:
+        return False
+    return bool(_row_energy(edges).max() >= MIN_TEXT_ENERGY)
+
+
+def _runs(mask: np.ndarray):
+    """返回布尔数组中连续 True 区间的 [(start, end), ...]（end 不含）"""
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(changes[::2], changes[1::2]))
+
+
+def find_text_band(frame: np.ndarray, sample_step=4, edge_threshold=40,
+                   min_height=0.04, max_height=0.6, margin=0.02, search_band=None):
+    """检测文字最密集的区域
+
+    先按行统计竖直笔画边缘的比例，取能量最高的连续行带（相距很近的多行文字合并为一带），
+    再在该行带内按列统计，去掉两侧没有文字的部分。
+
+    Args:
+        frame: (H, W, 3) RGB 帧
+        sample_step: 采样步长，越大越快
+        edge_threshold: 边缘亮度差阈值
+        min_height: 行带的最小高度（占帧高比例），过窄时按该高度扩展
+        max_height: 行带超过搜索区域高度的该比例时认为没有明显的字幕区域
+        margin: 裁剪边距（占帧高比例）
+        search_band: 只在帧底部该比例的区域内搜索（字幕所在位置），避免把纹理丰富的场景误认为文字；
+                     行带紧贴搜索区域上沿时文字可能延伸到区域之外，返回 None。None 表示搜索整帧
+
+    Returns:
+        (top, bottom, left, right) 全分辨率坐标；没有明显的文字区域时返回 None
+    """
+    height, width = frame.shape[:2]
+    offset = int(height * (1 - search_band)) // sample_step * sample_step if search_band else 0
+    edges = edge_map(luma(frame[offset:], sample_step), edge_threshold)
+    rows, cols = edges.shape
+    if rows < 8 or cols < 8:
+        return None
+
+    # 行投影：相距不超过 gap 行的高能量行合并为一带
+    row_energy = _row_energy(edges)
+    peak = row_energy.max()
+    if peak < MIN_TEXT_ENERGY:
+        return None
+    gap = max(1, int(rows * 0.05))
+    dense = _smooth((row_energy >= peak * 0.35).astype(float), gap) > 0
+    runs = _runs(dense)
+    top, bottom = max(runs, key=lambda run: row_energy[run[0]:run[1]].sum())
+
+    if bottom - top > rows * max_height:
+        return None
+    if offset and top == 0:
+        return None  # 文字延伸到搜索区域之外
+
+    # 列投影：去掉行带两侧没有文字的部分
+    col_energy = _smooth(edges[top:bottom].mean(axis=0), max(1, cols // 50))
+    text_cols = np.flatnonzero(col_energy >= col_energy.max() * 0.1)
+    left, right = text_cols[0], text_cols[-1] + 1
+
+    # 换算回全分辨率并加上边距
+    pad = int(height * margin)
+    top = max(0, offset + int(top) * sample_step - pad)
+    bottom = min(height, offset + int(bottom) * sample_step + pad)
+    left = max(0, int(left) * sample_step - pad)
+    right = min(width, int(right) * sample_step + pad)
+
+    min_rows = int(height * min_height)
+    if bottom - top < min_rows:
+        center = (top + bottom) // 2
+        top = max(0, center - min_rows // 2)
+        bottom = min(height, top + min_rows)
+    return top, bottom, left, right
+
+
+def contrast_stretch(frame: np.ndarray, low=2, high=98) -> np.ndarray:
+    """将亮度的 low~high 百分位线性拉伸到 0~255，返回 (H, W) 灰度帧"""
+    y = luma(frame)
+    # 用亮度直方图的累积分布求百分位，比 np.percentile 排序快得多
+    cdf = np.cumsum(np.bincount(y.ravel(), minlength=256))
+    lo, hi = np.searchsorted(cdf, (cdf[-1] * low / 100, cdf[-1] * high / 100))
+    if hi <= lo:
+        return y.astype(np.uint8)
+    # 查表完成线性映射
+    table = np.clip((np.arange(256) - lo) * (255.0 / (hi - lo)), 0, 255).astype(np.uint8)
+    return table[y]
+
+
+def otsu_threshold(y: np.ndarray) -> int:
+    """大津法阈值（向量化计算类间方差）"""
+    hist = np.bincount(y.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    weight = np.cumsum(hist)
+    mean = np.cumsum(hist * np.arange(256))
+    background = weight
+    foreground = total - weight
+    valid = (background > 0) & (foreground > 0)
+    between = np.zeros(256)
+    between[valid] = (mean[-1] * background[valid] - total * mean[valid]) ** 2 / (
+        background[valid] * foreground[valid])
+    return int(np.argmax(between))
+
+
+def binarize(frame: np.ndarray) -> np.ndarray:
+    """大津法二值化，返回白底黑字的 (H, W) 灰度帧
+
+    文字笔画通常是像素较少的一类，若它是亮色则反转，使输出统一为白底黑字。
+    """
+    y = luma(frame)
+    text = y > otsu_threshold(y)
+    if text.mean() > 0.5:
+        text = ~text
+    return np.where(text, 0, 255).astype(np.uint8)
+
+
+def preprocess(frame: np.ndarray, auto_crop=True, mode="none", search_band=None):
+    """字幕预处理
+
+    Args:
+        frame: (H, W, 3) RGB 帧
+        auto_crop: 是否裁剪到文字最密集的区域
+        mode: "none" 保持彩色，"stretch" 灰度对比度拉伸，"binarize" 二值化
+        search_band: 只在帧底部该比例的区域内寻找文字（见 find_text_band），None 表示整帧
+
+    Returns:
+        (处理后的帧, 裁剪框 (top, bottom, left, right) 或 None)；
+        帧为 (H, W, 3) RGB 或 (H, W) 灰度数组
+    """
+    box = find_text_band(frame, search_band=search_band) if auto_crop else None
+    if box:
+        top, bottom, left, right = box
+        frame = frame[top:bottom, left:right]
+
+    if mode == "stretch":
+        frame = contrast_stretch(frame)
+    elif mode == "binarize":
+        frame = binarize(frame)
+    return frame, box
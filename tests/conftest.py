@@ -0,0 +1,7 @@
+"""
+测试公共配置：让测试可以直接导入项目根目录下的模块
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,78 @@
+"""
+HTTP 连接复用统计测试
+用本地 HTTP 服务器代替 DashScope，检查预热/心跳请求不计入请求数并带上 API Key
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+import backends
+from backends import WARM_UP_EXTENSION, ConnectionStats, HttpBackend
+from config import Config
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 保持连接
+    seen = []
+
+    def do_HEAD(self):
+        self.seen.append(("HEAD", self.path, self.headers.get("Authorization")))
+        self.send_response(200 if self.headers.get("Authorization") else 401)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.seen.append(("GET", self.path, self.headers.get("Authorization")))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_warm_up_requests_are_not_counted(server):
+    stats = ConnectionStats()
+    with httpx.Client(event_hooks={"request": [stats.on_request]}) as client:
+        client.head(server + "/models", extensions={WARM_UP_EXTENSION: True})
+        client.get(server + "/chat")
+        client.head(server + "/models", extensions={WARM_UP_EXTENSION: True})
+        client.get(server + "/chat")
+
+    snapshot = stats.snapshot()
+    # 预热建立的连接被之后的请求使用，算作复用
+    assert snapshot["requests"] == 2
+    assert snapshot["new_connections"] == 0
+    assert snapshot["reused"] == 2
+    assert snapshot["warm_ups"] == 2
+    assert snapshot["http_version"] == "HTTP/1.1"
+
+
+def test_http_backend_warm_up_is_authenticated(server, monkeypatch):
+    monkeypatch.setattr(backends, "HTTP_BASE_URL", server)
+    pytest.importorskip("openai")
+    config = Config()
+    config.DASHSCOPE_API_KEY = "sk-test"
+    config.HTTP2 = False
+    backend = HttpBackend(config)
+    try:
+        backend.warm_up()
+    finally:
+        backend.close()
+
+    assert _Handler.seen == [("HEAD", "/models", "Bearer sk-test")]
+    assert backend.describe_stats()["requests"] == 0
@@ -0,0 +1,75 @@
+"""
+自适应编码方案选择器测试：识别得分衰减、停用后重新试用、旧版档案迁移，以及字幕区域文字检测
+"""
+import numpy as np
+
+import image_encoder
+from image_encoder import AdaptiveEncoder, build_ladder
+from subtitle_preprocess import has_text
+
+
+def make_encoder(**kwargs):
+    ladder = build_ladder(allow_webp=False)
+    return ladder, AdaptiveEncoder(ladder, byte_budget=10 ** 9, latency_budget_ms=10 ** 9, **kwargs)
+
+
+def test_single_failure_does_not_disable_best_rung():
+    ladder, encoder = make_encoder()
+    state = {}
+    best = ladder[0]
+    assert encoder.choose(state) is best
+    assert not encoder.record_result(state, best, False)
+    assert not encoder.record_result(state, best, False)
+    assert encoder.choose(state) is best
+
+
+def test_failures_decay_after_successes():
+    ladder, encoder = make_encoder()
+    state = {}
+    best = ladder[0]
+    for _ in range(20):
+        encoder.record_result(state, best, True)
+    encoder.record_result(state, best, False)
+    encoder.record_result(state, best, False)
+    encoder.record_result(state, best, True)
+    assert not encoder.record_result(state, best, False)
+    assert encoder.choose(state) is best
+
+
+def test_disabled_rung_is_reprobed(monkeypatch):
+    ladder, encoder = make_encoder(reprobe_interval=60)
+    state = {}
+    best = ladder[0]
+    now = [1000.0]
+    monkeypatch.setattr(image_encoder.time, "time", lambda: now[0])
+
+    disabled = [encoder.record_result(state, best, False) for _ in range(3)]
+    assert disabled == [False, False, True]
+    assert encoder.choose(state) is ladder[1]
+
+    now[0] += 61
+    assert encoder.choose(state) is best  # 重新试用
+    assert encoder.record_result(state, best, False)  # 仍然失败则立即重新停用
+    assert encoder.choose(state) is ladder[1]
+
+    now[0] += 61
+    assert encoder.choose(state) is best
+    assert not encoder.record_result(state, best, True)
+    assert encoder.choose(state) is best
+
+
+def test_legacy_counts_are_migrated():
+    ladder, encoder = make_encoder()
+    best = ladder[0]
+    state = {"stats": {best.key: {"bytes": 100, "ms": 5.0, "ok": 0, "fail": 2}}}
+    assert encoder.choose(state) is best  # 旧版停用的方案立即重新试用
+    stats = state["stats"][best.key]
+    assert "ok" not in stats and "fail" not in stats
+    assert stats["score"] == encoder.min_score
+
+
+def test_has_text_distinguishes_dialogue_from_flat_band():
+    band = np.full((120, 640, 3), 40, dtype=np.uint8)
+    assert not has_text(band)
+    band[40:80, 20:620:6] = 240  # 密集的竖直笔画
+    assert has_text(band)
@@ -0,0 +1,250 @@
+"""
+实时 WebSocket 后端测试
+RealtimeBackend 连接本地替身服务器（Config.API_URL 指向它），服务器回放录制的事件流
+"""
+import base64
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("dashscope")
+
+from backends import EVENT_AUDIO, EVENT_TEXT, EVENT_USAGE, RequestCancelled
+from config import Config
+from realtime_backend import RealtimeBackend, RealtimeError
+from ws_replay_server import ReplayWebSocketServer, load_events
+
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "realtime_response.jsonl")
+IMAGE_B64 = base64.b64encode(b"\xff\xd8\xff\xe0fake-jpeg").decode('ascii')
+PROMPT = "请读出画面中的对话"
+
+
+def make_config(url, **overrides):
+    config = Config()
+    config.DASHSCOPE_API_KEY = "sk-test"
+    config.API_URL = url
+    config.FIRST_BYTE_TIMEOUT = 5.0
+    config.CHUNK_TIMEOUT = 5.0
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+@pytest.fixture
+def recorded():
+    return load_events(FIXTURE)
+
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(responses):
+        server = ReplayWebSocketServer(responses).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def make_backend():
+    backends = []
+
+    def make(server, **overrides):
+        backend = RealtimeBackend(make_config(server.url, **overrides))
+        backends.append(backend)
+        return backend
+
+    yield make
+    for backend in backends:
+        backend.close()
+
+
+def collect(events):
+    text, audio, usage = "", [], None
+    for kind, data in events:
+        if kind == EVENT_TEXT:
+            text += data
+        elif kind == EVENT_AUDIO:
+            audio.append(data)
+        elif kind == EVENT_USAGE:
+            usage = data
+    return text, audio, usage
+
+
+def test_stream_replays_recorded_response(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server)
+
+    text, audio, usage = collect(backend.stream(IMAGE_B64, PROMPT))
+
+    assert text == "勇者说：我们出发吧！"
+    assert audio == [e["delta"] for e in recorded if e["type"] == "response.audio.delta"]
+    assert usage["output_tokens_details"]["audio_tokens"] == 50
+
+    # 请求按实时接口的要求发送：先音频再图像，手动提交后创建响应
+    types = [event["type"] for _, event in server.received]
+    assert types == [
+        "session.update",
+        "input_audio_buffer.append",
+        "input_image_buffer.append",
+        "input_audio_buffer.commit",
+        "response.create",
+    ]
+    session = server.events_of_type("session.update")[0]["session"]
+    assert session["voice"] == backend.config.VOICE
+    assert session["turn_detection"] is None
+    assert server.events_of_type("input_image_buffer.append")[0]["image"] == IMAGE_B64
+    assert server.events_of_type("response.create")[0]["response"]["instructions"] == PROMPT
+
+    # 连接带上 API Key 和模型名
+    conn = server.connections[0]
+    assert conn.headers["authorization"] == "Bearer sk-test"
+    assert conn.path.endswith("?model=" + backend.config.MODEL)
+
+
+def test_session_is_reused_across_captures(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server)
+
+    for _ in range(3):
+        text, _, _ = collect(backend.stream(IMAGE_B64, PROMPT))
+        assert text == "勇者说：我们出发吧！"
+
+    assert len(server.connections) == 1
+    assert len(server.events_of_type("session.update")) == 1
+    stats = backend.describe_stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused"]) == (3, 1, 2)
+
+
+def test_warm_up_opens_session_before_first_request(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server)
+
+    backend.warm_up()
+    assert len(server.connections) == 1
+    collect(backend.stream(IMAGE_B64, PROMPT))
+    assert len(server.connections) == 1
+    stats = backend.describe_stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused"]) == (1, 1, 1)
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_warm_up_on_open_session_sends_keep_alive(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server)
+
+    backend.warm_up()
+    backend.warm_up()
+    backend.warm_up()
+    assert wait_until(lambda: len(server.events_of_type("input_audio_buffer.clear")) == 2)
+    assert len(server.connections) == 1
+    assert backend.describe_stats()["warm_ups"] == 2
+
+    # 心跳不占用对话轮次，之后的截图仍复用同一个会话
+    text, _, _ = collect(backend.stream(IMAGE_B64, PROMPT))
+    assert text
+    assert len(server.connections) == 1
+
+
+def test_warm_up_reconnects_dropped_session(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server)
+
+    backend.warm_up()
+    server.connections[0].close()  # 服务端（或 NAT）断开空闲连接
+    assert wait_until(lambda: backend.conversation is None)
+    backend.warm_up()
+    assert len(server.connections) == 2
+    collect(backend.stream(IMAGE_B64, PROMPT))
+    assert len(server.connections) == 2
+
+
+def test_session_rebuilt_after_max_turns(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server, REALTIME_MAX_TURNS=2)
+
+    for _ in range(3):
+        collect(backend.stream(IMAGE_B64, PROMPT))
+
+    assert len(server.connections) == 2
+
+
+def test_voice_change_updates_session(start_server, make_backend, recorded):
+    server = start_server([recorded])
+    backend = make_backend(server)
+
+    collect(backend.stream(IMAGE_B64, PROMPT))
+    backend.config.VOICE = "Luna"
+    collect(backend.stream(IMAGE_B64, PROMPT))
+
+    updates = server.events_of_type("session.update")
+    assert [u["session"]["voice"] for u in updates][-1] == "Luna"
+    assert len(server.connections) == 1
+
+
+def test_error_event_raises_and_next_request_reconnects(start_server, make_backend, recorded):
+    error = [{"type": "error", "error": {"type": "invalid_request_error", "message": "image too large"}}]
+    server = start_server([error, recorded])
+    backend = make_backend(server)
+
+    with pytest.raises(RealtimeError, match="image too large"):
+        collect(backend.stream(IMAGE_B64, PROMPT))
+
+    # 未正常结束的会话被丢弃，下一次请求建立新会话
+    text, _, _ = collect(backend.stream(IMAGE_B64, PROMPT))
+    assert text == "勇者说：我们出发吧！"
+    assert len(server.connections) == 2
+
+
+def test_connection_lost_mid_response(start_server, make_backend, recorded):
+    server = start_server([recorded[:4] + [{"type": "test.disconnect"}], recorded])
+    backend = make_backend(server)
+
+    events = backend.stream(IMAGE_B64, PROMPT)
+    with pytest.raises(RealtimeError):
+        collect(events)
+
+    text, _, _ = collect(backend.stream(IMAGE_B64, PROMPT))
+    assert text == "勇者说：我们出发吧！"
+
+
+def test_stalled_response_times_out(start_server, make_backend, recorded):
+    server = start_server([recorded[:3], recorded])
+    backend = make_backend(server, CHUNK_TIMEOUT=0.3)
+
+    with pytest.raises(RealtimeError, match="timed out"):
+        collect(backend.stream(IMAGE_B64, PROMPT))
+    assert backend.conversation is None
+
+
+def test_abort_interrupts_stalled_response(start_server, make_backend, recorded):
+    server = start_server([recorded[:3], recorded])
+    backend = make_backend(server, CHUNK_TIMEOUT=10.0)
+
+    events = backend.stream(IMAGE_B64, PROMPT)
+    assert next(events) == (EVENT_TEXT, "勇者说：")
+    threading.Timer(0.2, events.abort).start()
+    start = time.perf_counter()
+    with pytest.raises(RequestCancelled):
+        next(events)
+    assert time.perf_counter() - start < 0.5
+    assert backend.conversation is None
+
+    # 会话被丢弃后下一次请求正常完成
+    text, _, _ = collect(backend.stream(IMAGE_B64, PROMPT))
+    assert text == "勇者说：我们出发吧！"
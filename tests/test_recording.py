@@ -0,0 +1,57 @@
+"""
+录制后端测试：只有正常结束的请求才留下可回放的录制
+"""
+import os
+
+import pytest
+
+from backends import EVENT_TEXT, RequestCancelled
+from recording import RecordingBackend, ReplayBackend
+
+
+class FakeBackend:
+    """按脚本产出事件，可在中途抛出异常"""
+
+    model_name = "fake"
+
+    def __init__(self, events, error=None):
+        self.events = events
+        self.error = error
+
+    def stream(self, image_b64, prompt, spoken_text="", cancel_event=None):
+        for event in self.events:
+            yield event
+        if self.error:
+            raise self.error
+
+
+EVENTS = [(EVENT_TEXT, "你好。"), (EVENT_TEXT, "再见。")]
+
+
+def recordings(path):
+    return sorted(os.listdir(path))
+
+
+def test_completed_stream_is_replayable(tmp_path):
+    backend = RecordingBackend(FakeBackend(EVENTS), str(tmp_path))
+    assert list(backend.stream("aW1n", "prompt")) == EVENTS
+    files = recordings(tmp_path)
+    assert len(files) == 1 and files[0].endswith(".jsonl")
+
+    replay = ReplayBackend(str(tmp_path), speed=0)
+    assert list(replay.stream("aW1n", "prompt")) == EVENTS
+
+
+def test_failed_stream_leaves_no_recording(tmp_path):
+    backend = RecordingBackend(FakeBackend(EVENTS[:1], RequestCancelled()), str(tmp_path))
+    with pytest.raises(RequestCancelled):
+        list(backend.stream("aW1n", "prompt"))
+    assert recordings(tmp_path) == []
+
+
+def test_abandoned_stream_leaves_no_recording(tmp_path):
+    backend = RecordingBackend(FakeBackend(EVENTS), str(tmp_path))
+    events = backend.stream("aW1n", "prompt")
+    assert next(events) == EVENTS[0]
+    events.close()  # 被抢占：消费方不再读取
+    assert recordings(tmp_path) == []
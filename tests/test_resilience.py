@@ -0,0 +1,252 @@
+"""
+请求容错测试
+本地模拟服务器代替 DashScope 的 OpenAI 兼容接口：按脚本正常返回 SSE 流，或卡住不响应，
+检查 ResilientBackend 的超时重试、对冲请求，以及任务被取消时能否立即返回
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+import backends
+from backends import EVENT_TEXT, EventStream, HttpBackend, RequestCancelled
+from config import Config
+from pipeline import CancelEvent
+from resilience import ResilientBackend, StreamTimeout
+from sentence_tts import SentenceBackend
+
+
+def sse_chunk(content=None, usage=None):
+    chunk = {
+        "id": "chatcmpl-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "qwen3-omni-flash",
+        "choices": [] if content is None else [
+            {"index": 0, "delta": {"content": content}, "finish_reason": None}
+        ],
+    }
+    if usage:
+        chunk["usage"] = usage
+    return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8')
+
+
+class MockServer:
+    """按脚本响应 chat completions 请求：每个请求依次取 "ok"、"stall"（不发响应头）
+    或 "stall_body"（发出响应头和第一个数据块后卡住），用完后重复最后一项"""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = 0
+        self.release = threading.Event()  # 测试结束时放开卡住的请求
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                action = server.next_action()
+                if action == "stall":
+                    server.release.wait(30)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.send_chunk(sse_chunk("勇者说："))
+                if action == "stall_body":
+                    server.release.wait(30)
+                    return
+                self.send_chunk(sse_chunk("出发吧！"))
+                self.send_chunk(sse_chunk(usage={"prompt_tokens": 10, "completion_tokens": 4, "total_tokens": 14}))
+                self.send_chunk(b"data: [DONE]\n\n")
+                self.send_chunk(b"")
+
+            def send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def next_action(self):
+        self.requests += 1
+        return self.script.pop(0) if len(self.script) > 1 else self.script[0]
+
+    def stop(self):
+        self.release.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def make_backend(monkeypatch):
+    servers, created = [], []
+
+    def make(script, **overrides):
+        server = MockServer(script)
+        servers.append(server)
+        monkeypatch.setattr(backends, "HTTP_BASE_URL", server.url)
+        config = Config()
+        config.DASHSCOPE_API_KEY = "sk-test"
+        config.HTTP2 = False
+        config.HEDGE_ENABLED = False
+        config.FIRST_BYTE_TIMEOUT = 2.0
+        config.CHUNK_TIMEOUT = 2.0
+        config.RETRY_MAX_ATTEMPTS = 3
+        config.RETRY_BACKOFF_BASE = 0.05
+        config.RETRY_BACKOFF_MAX = 0.1
+        for name, value in overrides.items():
+            setattr(config, name, value)
+        backend = ResilientBackend(HttpBackend(config), config)
+        created.append(backend)
+        return backend, server
+
+    yield make
+    for server in servers:
+        server.stop()
+    for backend in created:
+        backend.close()
+
+
+def read_text(events):
+    return "".join(data for kind, data in events if kind == EVENT_TEXT)
+
+
+def cancel_after(event, delay):
+    timer = threading.Timer(delay, event.set)
+    timer.start()
+    return timer
+
+
+def test_stream_returns_text(make_backend):
+    backend, server = make_backend(["ok"])
+    assert read_text(backend.stream("img", "prompt")) == "勇者说：出发吧！"
+    assert server.requests == 1
+
+
+def test_first_byte_timeout_is_retried(make_backend):
+    backend, server = make_backend(["stall", "ok"], FIRST_BYTE_TIMEOUT=0.5)
+    assert read_text(backend.stream("img", "prompt")) == "勇者说：出发吧！"
+    assert server.requests == 2
+    stats = backend.describe_stats()
+    assert (stats["timeouts"], stats["retries"]) == (1, 1)
+
+
+def test_gives_up_after_max_attempts(make_backend):
+    backend, server = make_backend(["stall"], FIRST_BYTE_TIMEOUT=0.3, RETRY_MAX_ATTEMPTS=2)
+    with pytest.raises(StreamTimeout):
+        read_text(backend.stream("img", "prompt"))
+    assert server.requests == 2
+
+
+def test_hedge_wins_over_stalled_primary(make_backend):
+    backend, server = make_backend(["stall", "ok"], HEDGE_ENABLED=True, HEDGE_DELAY=0.2, HEDGE_MIN_SAMPLES=100)
+    start = time.perf_counter()
+    assert read_text(backend.stream("img", "prompt")) == "勇者说：出发吧！"
+    # 对冲请求在首包超时之前就拿到了结果，不需要重试
+    assert time.perf_counter() - start < backend.config.FIRST_BYTE_TIMEOUT
+    assert server.requests == 2
+    stats = backend.describe_stats()
+    assert (stats["hedges"], stats["hedge_wins"], stats["retries"], stats["timeouts"]) == (1, 1, 0, 0)
+
+
+def test_cancel_while_waiting_for_first_byte(make_backend):
+    backend, server = make_backend(["stall"])
+    cancel = threading.Event()
+    cancel_after(cancel, 0.2)
+
+    start = time.perf_counter()
+    with pytest.raises(RequestCancelled):
+        read_text(backend.stream("img", "prompt", cancel_event=cancel))
+    # 不等首包超时，也不重试
+    assert time.perf_counter() - start < 0.6
+    assert server.requests == 1
+    assert backend.describe_stats()["retries"] == 0
+
+
+def test_cancel_while_stream_is_stalled(make_backend):
+    backend, server = make_backend(["stall_body"])
+    cancel = threading.Event()
+    events = backend.stream("img", "prompt", cancel_event=cancel)
+
+    assert next(events) == (EVENT_TEXT, "勇者说：")
+    cancel_after(cancel, 0.2)
+    start = time.perf_counter()
+    with pytest.raises(RequestCancelled):
+        next(events)
+    assert time.perf_counter() - start < 0.6
+
+
+def test_cancel_during_backoff(make_backend, monkeypatch):
+    backend, server = make_backend(
+        ["stall"], FIRST_BYTE_TIMEOUT=0.2, RETRY_BACKOFF_BASE=5.0, RETRY_BACKOFF_MAX=5.0
+    )
+    monkeypatch.setattr("resilience.random.uniform", lambda low, high: high)
+    cancel = threading.Event()
+    cancel_after(cancel, 0.5)  # 首包超时后处于 5 秒的退避中
+
+    start = time.perf_counter()
+    with pytest.raises(RequestCancelled):
+        read_text(backend.stream("img", "prompt", cancel_event=cancel))
+    assert time.perf_counter() - start < 1.0
+    assert server.requests == 1
+
+
+def track_finish(backend):
+    """包装底层后端，记录每次请求的事件流何时真正结束（底层读取退出）"""
+    finished = threading.Event()
+    original = backend.inner.stream
+
+    def stream(*args):
+        events = original(*args)
+
+        def run():
+            try:
+                yield from events
+            finally:
+                finished.set()
+        return EventStream(run(), abort=events.abort)
+
+    backend.inner.stream = stream
+    return finished
+
+
+def test_cancel_event_closes_stalled_response(make_backend):
+    backend, server = make_backend(["stall_body"])
+    finished = track_finish(backend)
+    cancel = CancelEvent()
+    events = backend.stream("img", "prompt", cancel_event=cancel)
+    assert next(events) == (EVENT_TEXT, "勇者说：")
+
+    cancel_after(cancel, 0.2)
+    start = time.perf_counter()
+    with pytest.raises(RequestCancelled):
+        next(events)
+    # 回调立即唤醒等待，不依赖定时检查
+    assert time.perf_counter() - start < 0.3
+    # 卡在网络读取上的请求线程也被打断，不会一直占着连接
+    assert finished.wait(1.0)
+
+
+def test_sentence_backend_abort_closes_requests(make_backend):
+    backend, server = make_backend(["stall_body"])
+    sentence = SentenceBackend(backend.inner, backend.config)
+    events = sentence.stream("img", "prompt")
+    assert next(events) == (EVENT_TEXT, "勇者说：")
+
+    threading.Timer(0.2, events.abort).start()
+    start = time.perf_counter()
+    with pytest.raises(RequestCancelled):
+        next(events)
+    assert time.perf_counter() - start < 0.5
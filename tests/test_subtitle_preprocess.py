@@ -0,0 +1,35 @@
+"""
+字幕预处理测试：自动裁剪只在底部字幕带中寻找文字
+"""
+import numpy as np
+
+from subtitle_preprocess import find_text_band, preprocess
+
+
+def make_frame(seed=0):
+    """1920x1080 的暗色画面：上方 255~749 行是高对比度的纹理场景，880~970 行是一行对话"""
+    rng = np.random.default_rng(seed)
+    frame = np.full((1080, 1920, 3), 30, dtype=np.uint8)
+    frame[255:749] = rng.integers(0, 256, size=(494, 1920, 1), dtype=np.uint8)
+    frame[880:970, 200:1700:8] = 230  # 竖直笔画
+    return frame
+
+
+def test_textured_scenery_beats_dialogue_without_search_band():
+    top, bottom, _, _ = find_text_band(make_frame())
+    assert bottom < 880  # 不限制搜索范围时选中了场景纹理
+
+
+def test_search_band_finds_dialogue():
+    top, bottom, left, right = find_text_band(make_frame(), search_band=0.33)
+    assert top <= 880 and bottom >= 970
+    assert top >= 1080 * (1 - 0.33) - 1080 * 0.02
+    assert left <= 200 and right >= 1690
+
+
+def test_text_above_search_band_falls_back_to_full_frame():
+    frame = np.full((1080, 1920, 3), 30, dtype=np.uint8)
+    frame[600:1000, 200:1700:8] = 230  # 文字从字幕带上方一直延伸下来
+    cropped, box = preprocess(frame, auto_crop=True, search_band=0.33)
+    assert box is None
+    assert cropped.shape == frame.shape
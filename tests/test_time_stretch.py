@@ -0,0 +1,47 @@
+"""
+变速器测试：播放中途调整语速时输出不出现静音或音量跌落
+"""
+import numpy as np
+
+from time_stretch import TimeStretcher
+
+RATE = 24000
+
+
+def tone(seconds, freq=220.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (8000 * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def min_window_rms(samples, window=48):
+    """最小的短窗（2ms）均方根"""
+    usable = len(samples) // window * window
+    blocks = samples[:usable].astype(np.float64).reshape(-1, window)
+    return np.sqrt((blocks ** 2).mean(axis=1)).min()
+
+
+def test_speed_change_mid_clip_has_no_gap():
+    stretcher = TimeStretcher(RATE)
+    audio = tone(1.0)
+    block = RATE // 10
+    output = []
+    for i in range(0, len(audio), block):
+        if i == 3 * block:
+            stretcher.speed = 1.3  # 播放中途拖动语速滑块
+        output.append(stretcher.process(audio[i:i + block]))
+    output = np.concatenate(output)
+
+    steady = np.sqrt((audio.astype(np.float64) ** 2).mean())
+    transition = output[3 * block - 2 * RATE // 100:3 * block + 4 * RATE // 100]
+    assert min_window_rms(transition) > 0.6 * steady
+
+
+def test_speed_change_preserves_duration():
+    stretcher = TimeStretcher(RATE, speed=1.0)
+    audio = tone(1.0)
+    half = len(audio) // 2
+    first = stretcher.process(audio[:half])
+    stretcher.speed = 2.0
+    rest = np.concatenate((stretcher.process(audio[half:]), stretcher.flush()))
+    assert len(first) == half
+    assert abs(len(rest) - half / 2) < RATE * 0.03
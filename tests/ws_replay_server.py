@@ -0,0 +1,203 @@
+"""
+本地 WebSocket 替身服务器
+只用标准库实现最小的 WebSocket 服务端：握手、收发文本帧和关闭帧。
+收到 response.create 时按顺序回放录制的服务端事件，供实时后端测试使用
+"""
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+def load_events(path: str) -> list:
+    """读取录制的服务端事件（JSONL，每行一个事件）"""
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class _Connection:
+    """一个客户端连接"""
+
+    def __init__(self, server, sock):
+        self.server = server
+        self.sock = sock
+        self.headers = {}
+        self.send_lock = threading.Lock()
+
+    def handshake(self) -> bool:
+        """完成 HTTP Upgrade 握手，记录请求头"""
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                return False
+            data += chunk
+        lines = data.split(b"\r\n\r\n", 1)[0].decode('latin-1').split("\r\n")
+        self.path = lines[0].split(" ")[1]
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            self.headers[name.strip().lower()] = value.strip()
+
+        accept = base64.b64encode(
+            hashlib.sha1((self.headers["sec-websocket-key"] + WS_GUID).encode()).digest()
+        ).decode()
+        self.sock.sendall(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        return True
+
+    def recv_exact(self, n: int) -> bytes:
+        data = b""
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError("client disconnected")
+            data += chunk
+        return data
+
+    def recv_frame(self):
+        """读取一帧，返回 (opcode, payload)（客户端帧都带掩码）"""
+        first, second = self.recv_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.recv_exact(8))[0]
+        mask = self.recv_exact(4) if second & 0x80 else None
+        payload = self.recv_exact(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+    def send_frame(self, opcode: int, payload: bytes):
+        """发送一帧（服务端帧不带掩码）"""
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 1 << 16:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+        else:
+            header += bytes([127]) + struct.pack("!Q", len(payload))
+        with self.send_lock:
+            self.sock.sendall(header + payload)
+
+    def send_event(self, event: dict):
+        self.send_frame(OP_TEXT, json.dumps(event).encode('utf-8'))
+
+    def serve(self):
+        """连接主循环：记录客户端事件，收到 response.create 时回放下一段响应"""
+        try:
+            if not self.handshake():
+                return
+            self.send_event({"type": "session.created", "session": {"id": f"sess_{id(self)}"}})
+            while True:
+                opcode, payload = self.recv_frame()
+                if opcode == OP_CLOSE:
+                    self.send_frame(OP_CLOSE, payload[:2])
+                    return
+                if opcode == OP_PING:
+                    self.send_frame(OP_PONG, payload)
+                    continue
+                if opcode != OP_TEXT:
+                    continue
+
+                event = json.loads(payload.decode('utf-8'))
+                self.server.record(self, event)
+                if event.get("type") == "session.update":
+                    self.send_event({"type": "session.updated", "session": event.get("session", {})})
+                elif event.get("type") == "response.create":
+                    if not self.replay(self.server.next_response()):
+                        return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.close()
+
+    def replay(self, events: list) -> bool:
+        """回放一段响应；遇到 {"type": "test.disconnect"} 时断开连接并返回 False"""
+        for event in events:
+            if event.get("type") == "test.disconnect":
+                self.close()
+                return False
+            self.send_event(event)
+        return True
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ReplayWebSocketServer:
+    """回放录制事件流的本地 WebSocket 服务器
+
+    responses 中的每一项是一次响应要回放的服务端事件列表，按 response.create 的顺序依次使用；
+    用完后重复最后一项。
+    """
+
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+        self.received = []  # 客户端发送的事件
+        self.connections = []
+        self.lock = threading.Lock()
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self.accept_loop, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/api-ws/v1/realtime"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def accept_loop(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                return  # 服务器已关闭
+            conn = _Connection(self, sock)
+            with self.lock:
+                self.connections.append(conn)
+            threading.Thread(target=conn.serve, daemon=True).start()
+
+    def record(self, conn, event: dict):
+        with self.lock:
+            self.received.append((conn, event))
+
+    def events_of_type(self, event_type: str) -> list:
+        """客户端发送的某类事件"""
+        with self.lock:
+            return [event for _, event in self.received if event.get("type") == event_type]
+
+    def next_response(self) -> list:
+        with self.lock:
+            return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def stop(self):
+        self.listener.close()
+        with self.lock:
+            connections = list(self.connections)
+        for conn in connections:
+            conn.close()
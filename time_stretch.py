@@ -0,0 +1,122 @@
+"""
+变速不变调模块
+用 WSOLA（波形相似叠加）在播放前改变语速：按 speed 倍的步长取分析帧，
+在小范围内搜索与上一帧自然延续最相似的位置（NumPy 向量化互相关），再加窗叠加输出，
+音高不变；流式处理，额外延迟不超过一帧加搜索范围（约 30ms）
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+MIN_SPEED = 0.5
+MAX_SPEED = 2.0
+
+
+class TimeStretcher:
+    """流式 WSOLA 变速器（非线程安全；speed 可由其他线程随时修改，下一帧生效）"""
+
+    def __init__(self, sample_rate=24000, speed=1.0, frame_ms=20, search_ms=8):
+        """初始化变速器
+
+        Args:
+            sample_rate: 采样率
+            speed: 播放速度，>1 加快，<1 放慢
+            frame_ms: 分析帧长（毫秒），合成步长为半帧
+            search_ms: 相似位置的搜索范围（±毫秒）
+        """
+        self.speed = speed
+        self.frame = int(sample_rate * frame_ms / 1000) // 2 * 2
+        self.hop = self.frame // 2
+        self.search = int(sample_rate * search_ms / 1000)
+        # 周期 Hann 窗在半帧步长下叠加恒为 1
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.frame) / self.frame)).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """丢弃缓存的样本（新的一段音频或取消播放时调用）"""
+        self.active = False  # 速度为 1 且没有缓存时直接透传
+        self.history = np.zeros(0, dtype=np.float32)  # 透传时最近的 search 个样本，开始变速时用于向前搜索
+        self.input = np.zeros(0, dtype=np.float32)
+        self.position = 0.0  # 下一帧的名义分析位置（相对 input 开头）
+        self.natural = None  # 上一帧的自然延续位置
+        self.seed_ola = False  # 第一帧是否需要补上假想前一帧的后半窗
+        self.ola = np.zeros(self.frame, dtype=np.float32)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """输入 int16 样本，返回已能输出的 int16 样本"""
+        if not self.active:
+            if self.speed == 1.0:
+                self.history = np.concatenate((self.history, samples.astype(np.float32)))[-self.search:]
+                return samples
+            # 从透传的位置无缝接上：之前的样本供第一帧向前搜索（不足时补静音），
+            # 并假想前一帧恰好延续到这里，第一帧不会从静音淡入
+            self.active = True
+            pad = np.zeros(self.search - len(self.history), dtype=np.float32)
+            self.input = np.concatenate((pad, self.history))
+            self.position = float(self.search)
+            self.natural = self.search
+            self.seed_ola = True
+
+        self.input = np.concatenate((self.input, samples.astype(np.float32)))
+        return self._run(len(self.input))
+
+    def flush(self) -> np.ndarray:
+        """输出剩余样本并复位（一段音频结束时调用）"""
+        if not self.active:
+            return np.zeros(0, dtype=np.int16)
+        end = len(self.input)
+        self.input = np.concatenate((self.input, np.zeros(self.frame + 2 * self.search, dtype=np.float32)))
+        out = np.concatenate((self._run(end), self._to_int16(self.ola[:self.hop])))
+        self.reset()
+        return out
+
+    def _run(self, end: int) -> np.ndarray:
+        """处理名义位置在 end 之前、且所需样本都已到达的帧"""
+        frame, hop, search = self.frame, self.hop, self.search
+        outputs = []
+        while True:
+            pos = int(round(self.position))
+            if pos >= end or pos + search + frame > len(self.input):
+                break
+            if self.natural is not None and self.natural + frame > len(self.input):
+                break
+
+            if self.natural is None:
+                best = pos
+            else:
+                # 在 [pos - search, pos + search] 中找与自然延续最相似的帧（归一化互相关）
+                target = self.input[self.natural:self.natural + frame]
+                region = self.input[pos - search:pos + search + frame]
+                candidates = sliding_window_view(region, frame)
+                corr = candidates @ target
+                power = np.cumsum(np.concatenate(([0.0], region * region)))
+                energy = np.sqrt(power[frame:] - power[:-frame]) + 1e-3
+                best = pos - search + int(np.argmax(corr / energy))
+
+            if self.seed_ola:
+                self.ola[:hop] += self.input[self.natural:self.natural + hop] * self.window[hop:]
+                self.seed_ola = False
+            self.ola += self.input[best:best + frame] * self.window
+            outputs.append(self.ola[:hop].copy())
+            self.ola[:hop] = self.ola[hop:]
+            self.ola[hop:] = 0
+            self.natural = best + hop
+            self.position += hop * min(MAX_SPEED, max(MIN_SPEED, self.speed))
+
+        # 丢弃之后不会再用到的样本
+        keep_from = int(self.position) - search
+        if self.natural is not None:
+            keep_from = min(keep_from, self.natural)
+        if keep_from > 0:
+            self.input = self.input[keep_from:]
+            self.position -= keep_from
+            if self.natural is not None:
+                self.natural -= keep_from
+
+        if not outputs:
+            return np.zeros(0, dtype=np.int16)
+        return self._to_int16(np.concatenate(outputs))
+
+    @staticmethod
+    def _to_int16(samples: np.ndarray) -> np.ndarray:
+        return np.clip(samples, -32768, 32767).astype(np.int16)
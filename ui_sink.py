@@ -0,0 +1,119 @@
+"""
+界面更新模块
+工作线程和快捷键线程不直接操作 Tk 控件：日志和状态更新放入无锁队列（collections.deque），
+由 root.after 在主线程中按固定帧率批量取出并应用；控制台输出由后台线程批量写出
+"""
+import collections
+import sys
+import threading
+
+
+class ConsoleWriter:
+    """后台控制台输出 - 调用方只把行放入队列，由写线程批量写出并刷新"""
+
+    def __init__(self, stream=None):
+        """初始化并启动写线程
+
+        Args:
+            stream: 输出流，默认 sys.stdout
+        """
+        self.stream = stream or sys.stdout
+        self.lines = collections.deque()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, line: str):
+        """写入一行（任意线程）"""
+        self.lines.append(line)
+        self.wakeup.set()
+
+    def run(self):
+        """写线程：等待唤醒，一次写出所有积压的行"""
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            batch = []
+            while self.lines:
+                batch.append(self.lines.popleft())
+            if batch:
+                self._write_batch(batch)
+            if self.closed and not self.lines:
+                return
+
+    def _write_batch(self, batch: list):
+        text = "\n".join(batch) + "\n"
+        try:
+            self.stream.write(text)
+        except UnicodeEncodeError:
+            self.stream.write(text.encode('ascii', 'replace').decode('ascii'))
+        except (OSError, ValueError):
+            return  # 控制台已关闭
+        try:
+            self.stream.flush()
+        except (OSError, ValueError):
+            pass
+
+    def close(self, timeout=1.0):
+        """写出剩余的行并停止写线程"""
+        self.closed = True
+        self.wakeup.set()
+        self.thread.join(timeout)
+
+
+class UiSink:
+    """Tk 界面更新队列
+
+    post_log() 追加的日志行按顺序批量插入；post(key, ...) 的更新按 key 只保留最新一次，
+    例如状态文字连续变化时，一帧内只应用最后一个值。
+    """
+
+    def __init__(self, root, apply_log, interval_ms=50):
+        """初始化并开始定时取出更新
+
+        Args:
+            root: Tk 根窗口
+            apply_log: 在主线程中调用的 apply_log(lines)，一次插入一批日志行
+            interval_ms: 刷新间隔（毫秒）
+        """
+        self.root = root
+        self.apply_log = apply_log
+        self.interval_ms = interval_ms
+        self.logs = collections.deque()
+        self.updates = collections.deque()
+        self.stopped = False
+        self.root.after(self.interval_ms, self.drain)
+
+    def post_log(self, line: str):
+        """追加一行日志（任意线程）"""
+        self.logs.append(line)
+
+    def post(self, key: str, func, *args, **kwargs):
+        """提交一次界面更新（任意线程），同一 key 在一帧内只应用最后一次"""
+        self.updates.append((key, func, args, kwargs))
+
+    def drain(self):
+        """取出并应用所有积压的更新（主线程中由 root.after 调用）"""
+        if self.stopped:
+            return
+        try:
+            lines = []
+            while self.logs:
+                lines.append(self.logs.popleft())
+            latest = {}
+            while self.updates:
+                key, func, args, kwargs = self.updates.popleft()
+                latest.pop(key, None)
+                latest[key] = (func, args, kwargs)  # 保持最后一次提交的顺序
+
+            if lines:
+                self.apply_log(lines)
+            for func, args, kwargs in latest.values():
+                func(*args, **kwargs)
+        finally:
+            self.root.after(self.interval_ms, self.drain)
+
+    def stop(self):
+        """停止刷新（退出时调用）"""
+        self.stopped = True
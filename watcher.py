@@ -0,0 +1,114 @@
+"""
+字幕监视模块
+在后台以较低频率只抓取字幕区域，计算降采样亮度帧差；
+字幕区域发生变化并稳定下来后自动触发一次朗读
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class SubtitleWatcher:
+    """字幕变化监视器
+
+    每次采样只得到一个降采样的亮度数组（不编码图像）。相邻两次采样中
+    变化明显的像素比例超过 change_ratio 视为"正在变化"；变化停止 settle_time 秒后，
+    若画面与上一次触发时不同且含有文字笔画（对话框被清空时不触发），就调用 on_settled()。
+    画面持续不变时采样间隔逐步放慢到 idle_interval，一旦发生变化立即恢复到 interval。
+    """
+
+    PIXEL_THRESHOLD = 32  # 亮度差超过该值的像素视为发生变化
+    MIN_EDGE_RATIO = 0.002  # 水平亮度突变像素比例低于该值时认为画面中没有文字
+
+    def __init__(self, sample, on_settled, interval=0.25, idle_interval=1.0,
+                 settle_time=0.6, change_ratio=0.01):
+        """初始化监视器
+
+        Args:
+            sample: 采样函数，返回降采样亮度数组（在监视线程中调用）
+            on_settled: 字幕变化并稳定后的回调（在监视线程中调用）
+            interval: 活跃时的采样间隔（秒）
+            idle_interval: 画面长时间不变时的最大采样间隔（秒）
+            settle_time: 变化停止多久后视为稳定（秒）
+            change_ratio: 变化像素比例阈值
+        """
+        self.sample = sample
+        self.on_settled = on_settled
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.settle_time = settle_time
+        self.change_ratio = change_ratio
+
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.current_interval = interval
+        self.samples = 0
+        self.triggers = 0
+
+    @property
+    def running(self) -> bool:
+        """监视线程是否在运行"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """启动监视线程"""
+        if self.running:
+            return
+        # 每个监视线程使用自己的停止事件，避免刚停止的旧线程被重新唤醒
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(self.stop_event,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self.stop_event.set()
+        self.thread = None
+
+    def changed(self, a: np.ndarray, b: np.ndarray) -> bool:
+        """两次采样之间是否有明显变化"""
+        if a.shape != b.shape:
+            return True
+        diff = np.abs(a - b) > self.PIXEL_THRESHOLD
+        return diff.mean() > self.change_ratio
+
+    def has_text(self, image: np.ndarray) -> bool:
+        """采样中是否有文字笔画（水平方向的明显亮度突变）"""
+        edges = np.abs(np.diff(image, axis=1)) > self.PIXEL_THRESHOLD
+        return edges.mean() > self.MIN_EDGE_RATIO
+
+    def run(self, stop_event: threading.Event):
+        """监视循环"""
+        previous = None
+        baseline = None  # 上一次触发（或开始监视）时的画面
+        last_motion = None
+
+        self.current_interval = self.interval
+        while not stop_event.wait(self.current_interval):
+            try:
+                current = self.sample()
+            except Exception:
+                continue  # 截图偶尔失败（如锁屏）时跳过本次采样
+            self.samples += 1
+
+            if previous is None or previous.shape != current.shape:
+                # 首次采样或截图区域变化：重新建立基准
+                previous = baseline = current
+                last_motion = None
+                continue
+
+            now = time.perf_counter()
+            if self.changed(previous, current):
+                last_motion = now
+                self.current_interval = self.interval
+            else:
+                self.current_interval = min(self.idle_interval, self.current_interval * 1.5)
+            previous = current
+
+            if last_motion is not None and now - last_motion >= self.settle_time:
+                last_motion = None
+                if self.changed(baseline, current):
+                    baseline = current
+                    if self.has_text(current):
+                        self.triggers += 1
+                        self.on_settled()